@@ -0,0 +1,66 @@
+"""Compare the per-record cost of `upandup.load` called once per record with `upandup.load_many`.
+
+Run from the root directory, discarding the debug logs:
+
+    python benchmarks/bench_load_many.py --records 100000 --versions 5 2> /dev/null
+
+Each case is measured twice: with the default log handler, whose debug output is part of the per-record cost of `load` in a default setup, and without any log handler, which isolates the gain of batching.
+"""
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import make_dataclass
+from loguru import logger
+import argparse
+import gc
+import time
+
+
+def make_chain(label: str, no_versions: int):
+    """Register a chain of versions, each adding one integer field.
+    """    
+    classes = []
+    for i in range(no_versions):
+        fields = [ (f"f{j}", int) for j in range(i+1) ]
+        classes.append(make_dataclass(f"{label}V{i}", fields, bases=(DataClassDictMixin,)))
+    
+    for cls_start, cls_end in zip(classes[:-1], classes[1:]):
+        fn_update = lambda cls_start, cls_end, obj_start: cls_end(*obj_start.__dict__.values(), 0)
+        upup.register_updates(label, cls_start, cls_end, fn_update=fn_update)
+    return classes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000, help="Number of records to load.")
+    parser.add_argument("--versions", type=int, default=5, help="Number of versions in the chain.")
+    args = parser.parse_args()
+
+    classes = make_chain("BenchLoadMany", args.versions)
+    cases = {
+        "mixed versions, untagged": [ classes[i % len(classes)](*range(i % len(classes) + 1)).to_dict() for i in range(args.records) ],
+        "oldest version, tagged": [ upup.serialize(classes[0](i), label="BenchLoadMany") for i in range(args.records) ]
+        }
+
+    for logging in [ "default log handler", "no log handler" ]:
+        if logging == "no log handler":
+            logger.remove()
+        for name, records in cases.items():
+            gc.collect()
+            t0 = time.perf_counter()
+            objs_single = [ upup.load("BenchLoadMany", r) for r in records ]
+            t_single = time.perf_counter() - t0
+
+            gc.collect()
+            t0 = time.perf_counter()
+            objs_many = upup.load_many("BenchLoadMany", records)
+            t_many = time.perf_counter() - t0
+
+            assert objs_single == objs_many
+            print(f"{name}, {logging}:")
+            print(f"  load:      {1e6 * t_single / args.records:.2f} us/record")
+            print(f"  load_many: {1e6 * t_many / args.records:.2f} us/record")
+            print(f"  speedup:   {t_single / t_many:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark suite for loading, updating, registering and writing versions, on synthetic schema chains in all serializer formats.
+
+Run from the root directory:
+
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json
+
+Results are the median time per operation in microseconds over several runs. With --baseline, each result is compared to the stored baseline, and the exit status is 1 if any result is slower than the baseline by more than the threshold ratio and by more than the noise floor.
+"""
+import upandup as upup
+from upandup.updater import Updater
+from mashumaro import DataClassDictMixin
+from dataclasses import make_dataclass
+from typing import Callable, Dict, List, Optional
+from loguru import logger
+import argparse
+import importlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+
+FORMATS = {
+    "dict": ("mashumaro", "DataClassDictMixin", None),
+    "json": ("mashumaro.mixins.json", "DataClassJSONMixin", None),
+    "yaml": ("mashumaro.mixins.yaml", "DataClassYAMLMixin", "yaml"),
+    "toml": ("mashumaro.mixins.toml", "DataClassTOMLMixin", "tomli_w"),
+    "msgpack": ("mashumaro.mixins.msgpack", "DataClassMessagePackMixin", "msgpack"),
+    "cbor": ("upandup.cbor", "DataClassCBORMixin", "cbor2")
+    }
+"Module and name of the mixin class of each serializer format, and the optional package it needs, if any."
+
+_label_ids = itertools.count()
+
+
+def load_mixins(formats: List[str]) -> Dict[str,type]:
+    """Import the mixin classes of serializer formats. Formats whose optional package is not installed are skipped.
+    """    
+    mixins = {}
+    for fmt in formats:
+        module_name, cls_name, package = FORMATS[fmt]
+        try:
+            if package is not None:
+                importlib.import_module(package)
+            mixins[fmt] = getattr(importlib.import_module(module_name), cls_name)
+        except ImportError as e:
+            print(f"Skipping format {fmt}: {e}", file=sys.stderr)
+    return mixins
+
+
+def make_classes(label: str, mixin: type, no_steps: int) -> List[type]:
+    """Make a chain of versions: the first has a string payload, and each later version adds one integer field.
+    """    
+    classes = []
+    for i in range(no_steps + 1):
+        fields = [ ("payload", str) ] + [ (f"f{j}", int) for j in range(1, i+1) ]
+        classes.append(make_dataclass(f"{label}V{i}", fields, bases=(mixin,)))
+    return classes
+
+
+def fn_update(cls_start, cls_end, obj_start):
+    return cls_end(*obj_start.__dict__.values(), 0)
+
+
+def register_chain(label: str, classes: List[type]):
+    """Register updates between consecutive classes.
+    """    
+    for cls_start, cls_end in zip(classes[:-1], classes[1:]):
+        upup.register_updates(label, cls_start, cls_end, fn_update=fn_update)
+
+
+def register_chain_private(classes: List[type]):
+    """Register updates between consecutive classes on a private updater, which is discarded, so repeated runs do not grow the registry.
+    """    
+    updater = Updater("Bench_register")
+    for cls_start, cls_end in zip(classes[:-1], classes[1:]):
+        updater.register_updates(cls_start, cls_end, fn_update=fn_update)
+
+
+def new_label(name: str) -> str:
+    """Unique label, since labels cannot be unregistered.
+    """    
+    return f"Bench_{name}_{next(_label_ids)}"
+
+
+def time_per_op(fn: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Time per call of a function in microseconds: the median of several runs, each long enough to be measured reliably.
+    """    
+    fn()
+    loops = 1
+    while True:
+        t_start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t_start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+
+    times = [ elapsed / loops ]
+    for _ in range(repeat - 1):
+        t_start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - t_start) / loops)
+    return 1e6 * statistics.median(times)
+
+
+def run_suite(mixins: Dict[str,type], chain_lengths: List[int], payload_sizes: List[int], min_time: float, repeat: int, write_dir: Optional[str]) -> Dict[str,float]:
+    """Run the benchmarks. Intermediate versions are written to a temporary directory in write_dir.
+
+    Returns:
+        Dict[str,float]: Time per operation in microseconds, by benchmark name.
+    """    
+    results: Dict[str,float] = {}
+    def record(name: str, fn: Callable[[], object]):
+        results[name] = time_per_op(fn, min_time, repeat)
+        print(f"{name:<55} {results[name]:12.2f} us", flush=True)
+
+    with tempfile.TemporaryDirectory(dir=write_dir) as dir_name:
+        for (fmt, mixin), no_steps, size in itertools.product(mixins.items(), chain_lengths, payload_sizes):
+            label = new_label(fmt)
+            classes = make_classes(label, mixin, no_steps)
+            register_chain(label, classes)
+            payload = "x" * size
+            obj_oldest = classes[0](payload)
+            data_oldest = upup.serialize(obj_oldest)
+            data_latest = upup.serialize(classes[-1](payload, *range(1, no_steps + 1)))
+            updater = upup.updater.get_updater(label)
+            options_write = upup.LoadOptions(write_versions=True, write_versions_dir=dir_name, write_version_prefix=label)
+
+            key = f"{fmt}/steps={no_steps}/payload={size}"
+            record(f"load_oldest/{key}", lambda: upup.load(label, data_oldest))
+            record(f"load_latest/{key}", lambda: upup.load(label, data_latest))
+            record(f"update/{key}", lambda: updater.update(obj_oldest, Updater.Options()))
+            record(f"write_versions/{key}", lambda: upup.load(label, data_oldest, options=options_write))
+
+        # Registration cost depends only on the chain length
+        for no_steps in chain_lengths:
+            classes = make_classes(new_label("register"), DataClassDictMixin, no_steps)
+            record(f"register_chain/steps={no_steps}", lambda: register_chain_private(classes))
+
+    return results
+
+
+def compare(results: Dict[str,float], baseline: Dict[str,float], threshold: float, noise_floor: float) -> List[str]:
+    """Compare results to a baseline.
+
+    Returns:
+        List[str]: Names of the benchmarks slower than the baseline by more than the threshold ratio, and by more than the noise floor in microseconds.
+    """    
+    regressions = []
+    print(f"\n{'benchmark':<55} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, t in results.items():
+        if name not in baseline:
+            continue
+        ratio = t / baseline[name]
+        is_regression = ratio > threshold and t - baseline[name] > noise_floor
+        flag = "  REGRESSION" if is_regression else ""
+        print(f"{name:<55} {baseline[name]:12.2f} {t:12.2f} {ratio:7.2f}{flag}")
+        if is_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS), help="Serializer formats. Formats whose optional package is not installed are skipped.")
+    parser.add_argument("--chain-lengths", nargs="+", type=int, default=[1, 10, 100], help="Numbers of update steps in the chains.")
+    parser.add_argument("--payload-sizes", nargs="+", type=int, default=[10, 10000], help="Sizes of the string payload in characters.")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum time of each run in seconds.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs per benchmark; the median is reported.")
+    parser.add_argument("--quick", action="store_true", help="Small grid for a quick check: chain lengths 1 and 10, payload size 10.")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=None, help="Compare the results to this JSON file written with --output.")
+    parser.add_argument("--threshold", type=float, default=1.75, help="Ratio to the baseline above which a result is a regression.")
+    parser.add_argument("--noise-floor", type=float, default=5.0, help="Slowdown in microseconds below which a result is not a regression, whatever the ratio.")
+    parser.add_argument("--write-dir", default="/dev/shm" if os.path.isdir("/dev/shm") else None, help="Directory to write intermediate versions in. Defaults to /dev/shm where available, so disk syncs do not dominate the write_versions results.")
+    parser.add_argument("--keep-logs", action="store_true", help="Keep the default log handler (redirect stderr to discard the output).")
+    args = parser.parse_args()
+
+    if not args.keep_logs:
+        logger.remove()
+    if args.quick:
+        args.chain_lengths, args.payload_sizes = [1, 10], [10]
+
+    results = run_suite(load_mixins(args.formats), args.chain_lengths, args.payload_sizes, args.min_time, args.repeat, args.write_dir)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": { "python": platform.python_version(), "platform": platform.platform(), "unit": "us/op" },
+                "results": results
+                }, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.noise_floor)
+        if regressions:
+            print(f"\n{len(regressions)} regressions above {args.threshold:.2f}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,16 @@ setup(
         "pytest",
         "setuptools"
     ],
+    extras_require={
+        "msgpack": ["msgpack"],
+        "cbor": ["cbor2"],
+        "columnar": ["pandas"]
+    },
+    entry_points={
+        "console_scripts": [
+            "upandup=upandup.cli:main"
+        ]
+    },
     python_requires='>=3.11',
     license='MIT'
 )
\ No newline at end of file
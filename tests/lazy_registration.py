@@ -0,0 +1,18 @@
+# Registration module imported on the first use of the labels declared in test_lazy.py
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+
+@dataclass
+class Lazy1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Lazy2(DataClassDictMixin):
+    x: int
+    y: int
+
+upup.register_updates("Lazy", Lazy1, Lazy2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x))
+
+def register_manifest():
+    upup.register_chain("LazyManifest", [Lazy1, Lazy2], [lambda d: { **d, "y": 0 }], dict_steps=[0])
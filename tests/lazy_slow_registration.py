@@ -0,0 +1,24 @@
+# Registration module imported on the first use of the label declared in test_lazy.py, registering its chain slowly
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+import time
+
+@dataclass
+class Slow1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Slow2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Slow3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+upup.register_updates("LazySlow", Slow1, Slow2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+time.sleep(0.2)
+upup.register_updates("LazySlow", Slow2, Slow3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
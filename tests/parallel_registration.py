@@ -0,0 +1,15 @@
+# Registration module imported by the worker processes in test_parallel.py
+import upandup as upup
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+
+@dataclass
+class Parallel1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Parallel2(DataClassJSONMixin):
+    x: int
+    y: int
+
+upup.register_updates("Parallel", Parallel1, Parallel2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x))
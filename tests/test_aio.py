@@ -0,0 +1,63 @@
+import pytest
+
+import upandup as upup
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+
+@dataclass
+class Async1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Async2(DataClassJSONMixin):
+    x: int
+    y: int
+
+update_threads = set()
+
+def update_1_to_2(cls_start, cls_end, obj_start):
+    update_threads.add(threading.get_ident())
+    return cls_end(x=obj_start.x, y=0)
+
+upup.register_updates("Async", Async1, Async2, fn_update=update_1_to_2)
+
+def test_aload():
+    async def main():
+        return await upup.aload("Async", '{"x": 1}')
+    update_threads.clear()
+    assert asyncio.run(main()) == Async2(x=1, y=0)
+    assert threading.get_ident() not in update_threads
+
+def test_aload_many():
+    data = [ Async1(x=i).to_json() for i in range(20) ]
+    async def main():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            aload_fn = upup.make_aload_fn("Async", executor=executor)
+            obj = await aload_fn(data[0])
+            objs = await upup.aload_many("Async", data, executor=executor, max_concurrency=3)
+        return obj, objs
+    obj, objs = asyncio.run(main())
+    assert obj == Async2(x=0, y=0)
+    assert objs == [ Async2(x=i, y=0) for i in range(20) ]
+
+def test_aload_files(tmp_path):
+    fnames = []
+    for i in range(3):
+        fname = str(tmp_path / f"data_{i}.json")
+        with open(fname, "w") as f:
+            f.write(Async1(x=i).to_json())
+        fnames.append(fname)
+
+    options = upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path / "versions"))
+    async def main():
+        obj = await upup.aload_file("Async", fnames[0], options=options)
+        objs = await upup.aload_files("Async", fnames, max_concurrency=2)
+        return obj, objs
+    obj, objs = asyncio.run(main())
+    assert obj == Async2(x=0, y=0)
+    assert os.path.exists(tmp_path / "versions" / "Async2.json")
+    assert objs == [ Async2(x=i, y=0) for i in range(3) ]
@@ -0,0 +1,97 @@
+import pytest
+
+import upandup as upup
+from upandup import serializer
+from upandup.serializer import Serializer
+from upandup.cbor import DataClassCBORMixin
+from mashumaro.mixins.msgpack import DataClassMessagePackMixin
+from dataclasses import dataclass, field
+from typing import Dict
+import json
+import os
+import pathlib
+
+@dataclass
+class BinaryMsgpack1(DataClassMessagePackMixin):
+    x: int
+
+@dataclass
+class BinaryMsgpack2(DataClassMessagePackMixin):
+    x: int
+    y: int
+
+@dataclass
+class BinaryCbor1(DataClassCBORMixin):
+    x: int
+
+@dataclass
+class BinaryCbor2(DataClassCBORMixin):
+    x: int
+    y: int
+
+@dataclass
+class BinaryCborWide(DataClassCBORMixin):
+    fields: Dict[str,int] = field(default_factory=dict)
+
+update = lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x)
+upup.register_updates("BinaryMsgpack", BinaryMsgpack1, BinaryMsgpack2, fn_update=update)
+upup.register_updates("BinaryCbor", BinaryCbor1, BinaryCbor2, fn_update=update)
+
+CASES = [
+    ("BinaryMsgpack", BinaryMsgpack1(x=1), BinaryMsgpack2(x=1, y=2)),
+    ("BinaryCbor", BinaryCbor1(x=1), BinaryCbor2(x=1, y=2))
+    ]
+
+def test_check_serializer():
+    assert serializer.check_serializer(BinaryMsgpack1) == Serializer.MSGPACK
+    assert serializer.check_serializer(BinaryCbor1) == Serializer.CBOR
+
+@pytest.mark.parametrize("label,obj,expected", CASES)
+def test_load(label, obj, expected):
+    data = upup.serialize(obj)
+    assert type(data) == bytes
+    assert upup.load(label, data) == expected
+    assert upup.load(label, memoryview(data)) == expected
+
+@pytest.mark.parametrize("label,obj,expected", CASES)
+def test_tag(label, obj, expected):
+    data = upup.serialize(obj, label=label)
+    assert serializer.read_tag(data) == f"{label}:{type(obj).__name__}"
+    assert upup.load(label, data) == expected
+    assert upup.deserialize(data, type(obj)) == obj
+
+@pytest.mark.parametrize("count", [0, 15, 16, 23, 24, 300])
+def test_tag_map_headers(count):
+    # Maps with more items have longer headers
+    obj = BinaryCborWide(fields={ f"f{i}": i for i in range(count) })
+    data = upup.serialize(obj, label="BinaryCborWide")
+    assert serializer.read_tag(data) == "BinaryCborWide:BinaryCborWide"
+    assert upup.deserialize(data, BinaryCborWide) == obj
+
+    # Untagged data has no tag
+    assert serializer.read_tag(upup.serialize(obj)) is None
+
+@pytest.mark.parametrize("label,obj,expected", CASES)
+def test_write_obj(tmp_path, label, obj, expected):
+    size = serializer.write_obj(obj, str(tmp_path), "version", label=label)
+    fname = tmp_path / f"version.{serializer.file_ext(serializer.check_serializer(type(obj)))}"
+    assert os.path.getsize(fname) == size
+    assert upup.load(label, pathlib.Path(fname)) == expected
+    with open(fname, "rb") as f:
+        assert upup.load(label, f) == expected
+
+def test_writer_jsonl(tmp_path):
+    fname = tmp_path / "versions.jsonl"
+    with upup.VersionWriter(upup.WriterMode.JSONL, fname=str(fname)) as writer:
+        options = upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path), writer=writer)
+        upup.load("BinaryCbor", BinaryCbor1(x=1).to_cbor(), options=options)
+
+    records = [ json.loads(line) for line in fname.read_text().splitlines() ]
+    assert [ r["name"] for r in records ] == [ "BinaryCbor1.cbor", "BinaryCbor2.cbor" ]
+    assert all("data_base64" in r for r in records)
+
+def test_migrate_tree(tmp_path):
+    from upandup.cli import migrate_tree
+    (tmp_path / "a.msgpack").write_bytes(BinaryMsgpack1(x=1).to_msgpack())
+    assert migrate_tree("BinaryMsgpack", str(tmp_path)) == (1, 0, 0)
+    assert upup.deserialize((tmp_path / "a.msgpack").read_bytes(), BinaryMsgpack2) == BinaryMsgpack2(x=1, y=2)
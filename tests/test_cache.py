@@ -0,0 +1,113 @@
+import pytest
+
+import upandup as upup
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+@dataclass
+class Cache1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Cache2(DataClassJSONMixin):
+    x: int
+    y: List[int]
+
+@dataclass
+class Cache3(DataClassJSONMixin):
+    x: int
+    y: List[int]
+    z: int
+
+no_updates = 0
+
+def update_1_to_2(cls_start, cls_end, obj_start):
+    global no_updates
+    no_updates += 1
+    return cls_end(x=obj_start.x, y=[0])
+
+def test_cache():
+    global no_updates
+    upup.register_updates("Cache", Cache1, Cache2, fn_update=update_1_to_2)
+    cache = upup.LoadCache(max_entries=2)
+    load_fn = upup.make_load_fn("Cache")
+    options = upup.LoadOptions(cache=cache)
+
+    no_updates = 0
+    obj1 = load_fn('{"x": 1}', options)
+    assert load_fn('{"x": 1}', options) is obj1
+    assert no_updates == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Eviction of the least recently used entry
+    load_fn('{"x": 2}', options)
+    load_fn('{"x": 1}', options)
+    load_fn('{"x": 3}', options)
+    assert cache.stats.evictions == 1
+    assert cache.stats.entries == 2
+    assert load_fn('{"x": 1}', options) is obj1
+    assert load_fn('{"x": 2}', options) is not obj1
+    assert (cache.hits, cache.misses) == (3, 4)
+
+    # Registering updates invalidates entries
+    upup.register_updates("Cache", Cache2, Cache3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
+    assert load_fn('{"x": 1}', options) == Cache3(x=1, y=[0], z=0)
+    assert cache.stats.invalidations == 1
+
+def test_cache_copy_on_return():
+    upup.register_updates("CacheCopy", Cache1, Cache2, fn_update=update_1_to_2)
+    options = upup.LoadOptions(cache=upup.LoadCache(copy_on_return=True, eviction=upup.Eviction.FIFO))
+    obj = upup.load("CacheCopy", '{"x": 1}', options)
+    obj.y.append(1)
+    assert upup.load("CacheCopy", '{"x": 1}', options) == Cache2(x=1, y=[0])
+
+def test_cache_max_bytes():
+    upup.register_updates("CacheBytes", Cache1, Cache2, fn_update=update_1_to_2)
+    cache = upup.LoadCache(max_entries=None, max_bytes=20)
+    options = upup.LoadOptions(cache=cache)
+    upup.load("CacheBytes", '{"x": 1}', options)
+    upup.load("CacheBytes", '{"x": 2}', options)
+    upup.load("CacheBytes", '{"x": 3}', options)
+    assert cache.stats.entries == 2
+    assert cache.stats.size_bytes == 16
+
+@dataclass
+class CacheItem1(DataClassJSONMixin):
+    name: str
+
+@dataclass
+class CacheItem2(DataClassJSONMixin):
+    name: str
+    qty: int
+
+@dataclass
+class CacheItem3(DataClassJSONMixin):
+    name: str
+    qty: int
+    tag: str
+
+@dataclass
+class CacheDoc1(DataClassJSONMixin):
+    item: Dict[str,Any]
+
+@dataclass
+class CacheDoc2(DataClassJSONMixin):
+    item: Dict[str,Any]
+    title: str
+
+def test_cache_nested():
+    upup.register_updates("CacheItem", CacheItem1, CacheItem2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(name=obj_start.name, qty=1))
+    upup.register_updates("CacheDoc", CacheDoc1, CacheDoc2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(item=obj_start.item, title=""))
+    upup.register_nested("CacheDoc", "item", "CacheItem")
+    cache = upup.LoadCache()
+    options = upup.LoadOptions(cache=cache)
+    data = '{"item": {"name": "a"}}'
+    assert upup.load("CacheDoc", data, options) == CacheDoc2(item={ "name": "a", "qty": 1 }, title="")
+    assert upup.load("CacheDoc", data, options) == CacheDoc2(item={ "name": "a", "qty": 1 }, title="")
+    assert cache.hits == 1
+
+    # Registering updates for a nested label invalidates entries
+    upup.register_updates("CacheItem", CacheItem2, CacheItem3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(name=obj_start.name, qty=obj_start.qty, tag=""))
+    assert upup.load("CacheDoc", data, options) == CacheDoc2(item={ "name": "a", "qty": 1, "tag": "" }, title="")
+    assert cache.stats.invalidations == 1
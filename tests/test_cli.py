@@ -0,0 +1,58 @@
+import pytest
+
+import upandup as upup
+from upandup.cli import main, CHECKPOINT_FNAME
+from parallel_registration import Parallel1, Parallel2
+import os
+
+def write_tree(root, n: int):
+    for i in range(n):
+        os.makedirs(root / f"dir_{i % 3}", exist_ok=True)
+        with open(root / f"dir_{i % 3}" / f"data_{i}.json", "w") as f:
+            f.write(Parallel1(x=i).to_json())
+
+def read_tree(root, n: int):
+    objs = []
+    for i in range(n):
+        with open(root / f"dir_{i % 3}" / f"data_{i}.json", "r") as f:
+            objs.append(Parallel2.from_json(f.read()))
+    return objs
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_migrate_in_place(tmp_path, workers):
+    write_tree(tmp_path, 10)
+    assert main(["migrate", str(tmp_path), "-m", "parallel_registration", "-l", "Parallel", "-w", workers, "--chunk-size", "3"]) == 0
+    assert read_tree(tmp_path, 10) == [ Parallel2(x=i, y=2*i) for i in range(10) ]
+    assert os.path.exists(tmp_path / CHECKPOINT_FNAME)
+
+def test_migrate_mirror(tmp_path):
+    write_tree(tmp_path / "src", 5)
+    assert main(["migrate", str(tmp_path / "src"), "-m", "parallel_registration", "-l", "Parallel", "-o", str(tmp_path / "dst"), "--tag"]) == 0
+    assert read_tree(tmp_path / "dst", 5) == [ Parallel2(x=i, y=2*i) for i in range(5) ]
+
+    # Sources are unchanged, and the outputs are tagged
+    with open(tmp_path / "src" / "dir_0" / "data_0.json", "r") as f:
+        assert Parallel1.from_json(f.read()) == Parallel1(x=0)
+    with open(tmp_path / "dst" / "dir_0" / "data_0.json", "r") as f:
+        assert upup.serializer.read_tag(f.read()) == "Parallel:Parallel2"
+
+def test_migrate_resume(tmp_path):
+    write_tree(tmp_path, 6)
+    with open(tmp_path / "dir_0" / "data_3.json", "w") as f:
+        f.write("not json")
+
+    # Files completed before the interruption are skipped
+    with open(tmp_path / CHECKPOINT_FNAME, "w") as f:
+        f.write(os.path.join("dir_0", "data_0.json") + "\n")
+    assert main(["migrate", str(tmp_path), "-m", "parallel_registration", "-l", "Parallel"]) == 1
+    with open(tmp_path / "dir_0" / "data_0.json", "r") as f:
+        assert Parallel1.from_json(f.read()) == Parallel1(x=0)
+    with open(tmp_path / "dir_1" / "data_1.json", "r") as f:
+        assert Parallel2.from_json(f.read()) == Parallel2(x=1, y=2)
+
+    # Failed files are retried on the next run
+    with open(tmp_path / "dir_0" / "data_3.json", "w") as f:
+        f.write(Parallel1(x=3).to_json())
+    assert main(["migrate", str(tmp_path), "-m", "parallel_registration", "-l", "Parallel"]) == 0
+    with open(tmp_path / "dir_0" / "data_3.json", "r") as f:
+        assert Parallel2.from_json(f.read()) == Parallel2(x=3, y=6)
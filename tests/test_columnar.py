@@ -0,0 +1,106 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+from typing import Optional
+
+pd = pytest.importorskip("pandas")
+
+@dataclass
+class Columnar1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Columnar2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Columnar3(DataClassDictMixin):
+    x: int
+    total: int
+
+upup.register_updates("Columnar", Columnar1, Columnar2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+upup.register_updates("Columnar", Columnar2, Columnar3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, total=obj_start.x + obj_start.y))
+
+# Same steps, with column updates for the first step only
+upup.register_updates("ColumnarMixed", Columnar1, Columnar2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+upup.register_updates("ColumnarMixed", Columnar2, Columnar3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, total=obj_start.x + obj_start.y))
+upup.register_column_updates("Columnar", Columnar1, Columnar2, lambda df: df.assign(y=0))
+upup.register_column_updates("Columnar", Columnar2, Columnar3, lambda df: df.assign(total=df["x"] + df["y"]).drop(columns=["y"]))
+upup.register_column_updates("ColumnarMixed", Columnar1, Columnar2, lambda df: df.assign(y=0))
+
+EXPECTED = [ Columnar3(x=1, total=1), Columnar3(x=2, total=5), Columnar3(x=4, total=4) ]
+
+def records(df):
+    return [ Columnar3.from_dict(d) for d in df[["x", "total"]].to_dict("records") ]
+
+@pytest.mark.parametrize("label", [ "Columnar", "ColumnarMixed" ])
+def test_version_column(label):
+    df = pd.DataFrame({ "x": [ 1, 2, 4 ], "y": [ None, 3, None ], "total": [ None, None, 4 ], "version": [ "Columnar1", "Columnar2", "Columnar3" ] }, index=[ "a", "b", "c" ])
+    result = upup.load_table(label, df, version_column="version")
+    assert list(result.columns) == [ "x", "total", "version" ]
+    assert list(result.index) == [ "a", "b", "c" ]
+    assert list(result["version"]) == [ "Columnar3" ] * 3
+    assert result["x"].dtype == "int64" and result["total"].dtype == "int64"
+    assert records(result) == EXPECTED
+
+def test_detect_versions():
+    # Rows are detected from the columns with values
+    df = pd.DataFrame({ "x": [ 1, 2, 4 ], "y": [ None, 3, None ], "total": [ None, None, 4 ] })
+    assert records(upup.load_table("Columnar", df)) == EXPECTED
+
+    with pytest.raises(AssertionError):
+        upup.load_table("Columnar", pd.DataFrame({ "z": [ 1 ] }))
+
+def test_matches_objects():
+    df = pd.DataFrame({ "x": range(100), "version": [ "Columnar1" ] * 100 })
+    objs = upup.load_many("Columnar", [ { "x": x } for x in range(100) ])
+    assert records(upup.load_table("Columnar", df, version_column="version")) == objs
+
+def test_arrow():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({ "x": [ 1, 2 ], "version": [ "Columnar1", "Columnar1" ] })
+    result = upup.load_table("Columnar", table, version_column="version")
+    assert isinstance(result, pa.Table)
+    assert result.to_pydict() == { "x": [ 1, 2 ], "total": [ 1, 2 ], "version": [ "Columnar3", "Columnar3" ] }
+
+def test_numpy():
+    np = pytest.importorskip("numpy")
+    arr = np.array([ (1, 2), (3, 4) ], dtype=[ ("x", "i8"), ("y", "i8") ])
+    result = upup.load_table("Columnar", arr)
+    assert result.dtype.names == ("x", "total")
+    assert result["total"].tolist() == [ 3, 7 ]
+
+def test_empty():
+    df = pd.DataFrame({ "x": [] })
+    assert upup.load_table("Columnar", df) is df
+
+@dataclass
+class ColumnarNote1(DataClassDictMixin):
+    x: int
+    note: Optional[str] = None
+
+@dataclass
+class ColumnarNote2(DataClassDictMixin):
+    x: int
+    z: int
+    flag: Optional[bool] = None
+
+upup.register_updates("ColumnarNote", ColumnarNote1, ColumnarNote2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, z=len(obj_start.note or "")))
+
+def test_missing_values():
+    # Missing values are missing keys, not "nan"
+    df = pd.DataFrame({ "x": [ 1, 2 ], "note": [ "ab", None ], "version": [ "ColumnarNote1" ] * 2 })
+    result = upup.load_table("ColumnarNote", df, version_column="version")
+    assert result["z"].tolist() == [ 2, 0 ]
+    assert result["z"].dtype == "int64"
+
+    # Rows of several versions are cast back to the field types
+    df = pd.DataFrame({ "x": [ 1, 2, 3 ], "note": [ "abc", None, None ], "z": [ None, None, 7 ], "flag": [ None, None, True ] })
+    result = upup.load_table("ColumnarNote", df)
+    assert list(result.columns) == [ "x", "z", "flag" ]
+    assert result["x"].tolist() == [ 1, 2, 3 ] and result["x"].dtype == "int64"
+    assert result["z"].tolist() == [ 3, 0, 7 ] and result["z"].dtype == "int64"
+    assert result["flag"].tolist() == [ pd.NA, pd.NA, True ] and result["flag"].dtype == "boolean"
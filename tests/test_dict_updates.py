@@ -0,0 +1,81 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+from collections import Counter
+import os
+
+instantiated = Counter()
+
+class Counted(DataClassJSONMixin):
+    def __post_init__(self):
+        instantiated[type(self).__name__] += 1
+
+@dataclass
+class DictV1(Counted):
+    x: int
+
+@dataclass
+class DictV2(Counted):
+    x: int
+    y: int
+
+@dataclass
+class DictV3(Counted):
+    x: int
+    y: int
+    z: int
+
+@dataclass
+class DictV4(Counted):
+    x: int
+    y: int
+    z: int
+    w: int
+
+@dataclass
+class DictV5(Counted):
+    xy: int
+    z: int
+    w: int
+
+def add_key(key: str):
+    def fn_update_dict(d: dict) -> dict:
+        return { **d, key: 0 }
+    return fn_update_dict
+
+upup.register_dict_updates("Dict", DictV1, DictV2, add_key("y"))
+upup.register_dict_updates("Dict", DictV2, DictV3, add_key("z"))
+upup.register_dict_updates("Dict", DictV3, DictV4, add_key("w"))
+upup.register_updates("Dict", DictV4, DictV5, fn_update=lambda cls_start, cls_end, obj_start: cls_end(xy=obj_start.x + obj_start.y, z=obj_start.z, w=obj_start.w))
+
+def test_dict_updates_fused():
+    instantiated.clear()
+    obj = upup.load("Dict", '{"x": 1}')
+    assert instantiated == Counter({"DictV1": 1, "DictV4": 1, "DictV5": 1})
+    assert obj == DictV5(xy=1, z=0, w=0)
+
+def test_dict_updates_tagged():
+    data = upup.serialize(DictV1(x=1), label="Dict")
+    instantiated.clear()
+    obj = upup.load("Dict", data)
+    assert instantiated == Counter({"DictV4": 1, "DictV5": 1})
+    assert obj == DictV5(xy=1, z=0, w=0)
+
+def test_dict_updates_from_middle():
+    obj = upup.load("Dict", '{"x": 1, "y": 2, "z": 3}')
+    assert obj == DictV5(xy=3, z=3, w=0)
+
+def test_dict_updates_many():
+    data = [ '{"x": 1}', '{"x": 1, "y": 2}', '{"xy": 1, "z": 2, "w": 3}' ]
+    assert upup.load_many("Dict", data) == [ upup.load("Dict", d) for d in data ]
+
+def test_dict_updates_write_versions(tmp_path):
+    options = upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path))
+    obj = upup.load("Dict", upup.serialize(DictV1(x=1), label="Dict"), options=options)
+    assert obj == DictV5(xy=1, z=0, w=0)
+    assert sorted(os.listdir(tmp_path)) == [ f"DictV{i}.json" for i in range(1,6) ]
+    with open(tmp_path / "DictV3.json") as f:
+        assert DictV3.from_json(f.read()) == DictV3(x=1, y=0, z=0)
@@ -0,0 +1,97 @@
+import pytest
+
+import upandup as upup
+from upandup import serializer
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from mashumaro.mixins.yaml import DataClassYAMLMixin
+from mashumaro.mixins.toml import DataClassTOMLMixin
+from dataclasses import dataclass
+import pathlib
+
+@dataclass
+class InputJson1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class InputJson2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class InputYaml1(DataClassYAMLMixin):
+    x: int
+
+@dataclass
+class InputYaml2(DataClassYAMLMixin):
+    x: int
+    y: int
+
+@dataclass
+class InputToml1(DataClassTOMLMixin):
+    x: int
+
+@dataclass
+class InputToml2(DataClassTOMLMixin):
+    x: int
+    y: int
+
+@dataclass
+class InputDict1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class InputDict2(DataClassDictMixin):
+    x: int
+    y: int
+
+update = lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x)
+upup.register_updates("InputJson", InputJson1, InputJson2, fn_update=update)
+upup.register_updates("InputYaml", InputYaml1, InputYaml2, fn_update=update)
+upup.register_updates("InputToml", InputToml1, InputToml2, fn_update=update)
+upup.register_updates("InputDict", InputDict1, InputDict2, fn_update=update)
+
+CASES = [
+    ("InputJson", InputJson1(x=1).to_json(), InputJson2(x=1, y=2)),
+    ("InputYaml", InputYaml1(x=1).to_yaml(), InputYaml2(x=1, y=2)),
+    ("InputToml", InputToml1(x=1).to_toml(), InputToml2(x=1, y=2)),
+    ("InputDict", '{"x": 1}', InputDict2(x=1, y=2))
+    ]
+
+@pytest.mark.parametrize("label,data,expected", CASES)
+def test_load_binary(label, data, expected):
+    b = data.encode("utf-8")
+    assert upup.load(label, b) == expected
+    assert upup.load(label, bytearray(b)) == expected
+    assert upup.load(label, memoryview(b)) == expected
+
+@pytest.mark.parametrize("label,data,expected", CASES)
+@pytest.mark.parametrize("mmap_min_size", [1 << 20, 0])
+def test_load_file(tmp_path, monkeypatch, label, data, expected, mmap_min_size):
+    monkeypatch.setattr(serializer, "MMAP_MIN_SIZE", mmap_min_size)
+    fname = tmp_path / "data"
+    fname.write_text(data)
+    assert upup.load(label, fname) == expected
+    with open(fname, "rb") as f:
+        assert upup.load(label, f) == expected
+    assert upup.load_many(label, [ fname, fname ]) == [ expected, expected ]
+
+def test_load_binary_tagged():
+    data = upup.serialize(InputJson1(x=1), label="InputJson").encode("utf-8") # type: ignore
+    assert upup.load("InputJson", memoryview(data)) == InputJson2(x=1, y=2)
+    assert upup.deserialize(data, InputJson1) == InputJson1(x=1)
+
+def test_load_binary_cache(tmp_path):
+    cache = upup.LoadCache()
+    fname = tmp_path / "data.json"
+    fname.write_text(InputJson1(x=1).to_json())
+    options = upup.LoadOptions(cache=cache)
+    assert upup.load("InputJson", fname, options=options) == upup.load("InputJson", pathlib.Path(fname), options=options)
+    assert cache.hits == 1
+
+def test_load_text_file_object(tmp_path):
+    fname = tmp_path / "data.json"
+    fname.write_text(InputJson1(x=1).to_json())
+    with open(fname, "r") as f:
+        with pytest.raises(AssertionError):
+            upup.load("InputJson", f)
@@ -0,0 +1,81 @@
+import pytest
+
+import upandup as upup
+from upandup.lazy import lazy_registrations
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+@dataclass
+class Chain1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Chain2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Chain3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+def test_declare_lazy():
+    upup.declare_lazy("Lazy", "lazy_registration")
+    assert "lazy_registration" not in sys.modules
+
+    # Registered on the first load
+    assert upup.load("Lazy", {"x": 1}) == sys.modules["lazy_registration"].Lazy2(x=1, y=2)
+    assert "Lazy" not in lazy_registrations
+
+def test_declare_lazy_threads():
+    upup.declare_lazy("LazySlow", "lazy_slow_registration")
+
+    # Threads loading while the module registers the chain wait for the whole chain
+    with ThreadPoolExecutor(8) as executor:
+        objs = list(executor.map(lambda _: upup.load("LazySlow", {"x": 1}), range(8)))
+    Slow3 = sys.modules["lazy_slow_registration"].Slow3
+    assert objs == [ Slow3(x=1, y=0, z=0) ] * 8
+
+def test_declare_lazy_imported():
+    # Modules imported before the label is declared register nothing
+    assert "lazy_registration" in sys.modules
+    upup.declare_lazy("LazyImported", "lazy_registration")
+    with pytest.raises(AssertionError, match="registered no updates"):
+        upup.load("LazyImported", {"x": 1})
+
+def test_declare_manifest(tmp_path):
+    fname = str(tmp_path / "manifest.json")
+    with open(fname, "w") as f:
+        json.dump({"LazyManifest": "lazy_registration:register_manifest"}, f)
+    assert upup.declare_manifest(fname) == 1
+
+    obj = upup.load("LazyManifest", {"x": 1})
+    assert type(obj).__name__ == "Lazy2" and obj.y == 0
+
+    with pytest.raises(AssertionError):
+        upup.load("LazyUndeclared", {"x": 1})
+
+def test_register_chain():
+    upup.register_chain("Chain", [Chain1, Chain2, Chain3], [
+        lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0),
+        lambda d: { **d, "z": 1 }
+        ], dict_steps=[1])
+    assert upup.updater.get_updater("Chain").cls_list == [Chain1, Chain2, Chain3]
+    assert upup.load("Chain", {"x": 1}) == Chain3(x=1, y=0, z=1)
+
+def test_register_chain_validation():
+    # Loops are detected before anything is registered
+    with pytest.raises(AssertionError):
+        upup.register_chain("ChainLoop", [Chain1, Chain2, Chain1], [lambda cls_start, cls_end, obj_start: obj_start] * 2)
+    assert upup.updater.get_updater("ChainLoop").no_update_steps == 0
+
+    # Chains continue from the most recent end class
+    upup.register_chain("ChainExtend", [Chain1, Chain2], [lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0)])
+    with pytest.raises(AssertionError):
+        upup.register_chain("ChainExtend", [Chain1, Chain3], [lambda cls_start, cls_end, obj_start: obj_start])
+    upup.register_chain("ChainExtend", [Chain2, Chain3], [lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0)])
+    assert upup.load("ChainExtend", {"x": 1}) == Chain3(x=1, y=0, z=0)
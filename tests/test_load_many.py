@@ -0,0 +1,74 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+
+@dataclass
+class Many1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Many2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class Many3(DataClassJSONMixin):
+    x: int
+    y: int
+    z: int
+
+def test_load_many():
+    upup.register_updates("Many", Many1, Many2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=-1))
+    upup.register_updates("Many", Many2, Many3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=-2))
+
+    data = [
+        '{"x": 0}',
+        '{"x": 1, "y": 1, "z": 1}',
+        '{"x": 2, "y": 2}',
+        '{"x": 3}',
+        upup.serialize(Many2(x=4, y=4), label="Many")
+        ]
+    objs = upup.load_many("Many", data)
+    assert objs == [ upup.load("Many", d) for d in data ]
+    assert objs == [
+        Many3(x=0, y=-1, z=-2),
+        Many3(x=1, y=1, z=1),
+        Many3(x=2, y=2, z=-2),
+        Many3(x=3, y=-1, z=-2),
+        Many3(x=4, y=4, z=-2)
+        ]
+
+@dataclass
+class ManyDict1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class ManyDict2(DataClassDictMixin):
+    x: int
+    y: int
+
+def test_load_many_dicts():
+    upup.register_updates("ManyDict", ManyDict1, ManyDict2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=-1))
+
+    # Dictionaries are deserialized together, tagged or not, mixed with other data
+    data = [
+        { "x": 0 },
+        upup.serialize(ManyDict1(x=1), label="ManyDict"),
+        { "x": 2, "y": 2 },
+        b'{"x": 3}',
+        { "__upandup__": "ManyDict:ManyDictUnknown", "x": 4, "y": 4 },
+        upup.serialize(ManyDict2(x=5, y=5), label="ManyDict")
+        ]
+    objs = upup.load_many("ManyDict", data)
+    assert objs == [ upup.load("ManyDict", d) for d in data ]
+    assert objs == [ ManyDict2(x=0, y=-1), ManyDict2(x=1, y=-1), ManyDict2(x=2, y=2), ManyDict2(x=3, y=-1), ManyDict2(x=4, y=4), ManyDict2(x=5, y=5) ]
+
+    with pytest.raises(AssertionError):
+        upup.load_many("ManyDict", [ { "x": 0 }, { "y": "a" } ])
+
+def test_load_many_empty():
+    upup.register_updates("ManyEmpty", Many1, Many2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=-1))
+    assert upup.load_many("ManyEmpty", []) == []
@@ -0,0 +1,76 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass, make_dataclass
+
+@dataclass
+class Metrics1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Metrics2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Metrics3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+upup.register_updates("Metrics", Metrics1, Metrics2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+upup.register_dict_updates("Metrics", Metrics2, Metrics3, lambda d: { **d, "z": 0 })
+
+def test_metrics():
+    events = []
+    upup.enable_metrics(callbacks=[events.append])
+    try:
+        upup.load("Metrics", {"x": 1})
+        upup.load_many("Metrics", [ {"x": 1}, {"x": 2, "y": 3}, {"x": 4, "y": 5, "z": 6} ])
+        metrics = upup.metrics_snapshot()["Metrics"]
+    finally:
+        upup.disable_metrics()
+
+    assert metrics.loads.count == 4
+    assert metrics.deserializations.count == 4
+    assert metrics.loads.total_s >= metrics.loads.max_s >= metrics.loads.p50_s > 0
+    assert metrics.steps["Metrics1->Metrics2"].count == 2
+    assert metrics.steps["Metrics2->Metrics3"].count == 3
+    assert metrics.writes.count == 0
+    assert sum(1 for e in events if e.kind == "load") == 2
+
+    # Nothing is recorded once disabled
+    upup.load("Metrics", {"x": 1})
+    assert upup.metrics_snapshot() == {}
+
+def test_metrics_failed_trials_and_writes(tmp_path):
+    recorder = upup.enable_metrics()
+    try:
+        # Untagged data matching no signature falls back to trial deserialization
+        with pytest.raises(AssertionError):
+            upup.load("Metrics", {"w": 1})
+        upup.load("Metrics", {"x": 1}, options=upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path)))
+        metrics = recorder.snapshot()["Metrics"]
+    finally:
+        upup.disable_metrics()
+
+    assert metrics.failed_trials == 3
+    assert metrics.writes.count == 3
+    assert metrics.bytes_written == len('{"x": 1}') + len('{"x": 1, "y": 0}') + len('{"x": 1, "y": 0, "z": 0}')
+
+def test_metrics_same_name():
+    # Steps between classes sharing a name are told apart by their version names
+    Config1 = make_dataclass("Config", [ ("x", int) ], bases=(DataClassDictMixin,))
+    Config2 = make_dataclass("Config", [ ("x", int), ("y", int) ], bases=(DataClassDictMixin,))
+    Config1.__module__, Config2.__module__ = "metricsv1", "metricsv2"
+    upup.register_dict_updates("MetricsSameName", Config1, Config2, lambda d: { **d, "y": 0 })
+
+    upup.enable_metrics()
+    try:
+        upup.load("MetricsSameName", {"x": 1})
+        metrics = upup.metrics_snapshot()["MetricsSameName"]
+    finally:
+        upup.disable_metrics()
+
+    assert list(metrics.steps) == [ "metricsv1.Config->metricsv2.Config" ]
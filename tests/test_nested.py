@@ -0,0 +1,95 @@
+import pytest
+
+import upandup as upup
+from upandup.updater import get_updater
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass, field
+from typing import List, Optional
+from pathlib import Path
+import importlib
+import json
+
+load_module = importlib.import_module("upandup.load")
+
+@dataclass
+class NestedItem1(DataClassJSONMixin):
+    name: str
+
+@dataclass
+class NestedItem2(DataClassJSONMixin):
+    name: str
+    qty: int
+
+@dataclass
+class NestedDoc1(DataClassJSONMixin):
+    title: str
+    items: List[NestedItem2]
+
+@dataclass
+class NestedDoc2(DataClassJSONMixin):
+    title: str
+    items: List[NestedItem2]
+    main: Optional[NestedItem2] = None
+
+@dataclass
+class NestedNode2(DataClassJSONMixin):
+    weight: float
+    children: List["NestedNode2"] = field(default_factory=list)
+
+@dataclass
+class NestedNode1(DataClassJSONMixin):
+    value: int
+    children: List["NestedNode2"] = field(default_factory=list)
+
+item_updates = []
+def update_item(cls_start, cls_end, obj_start):
+    item_updates.append(obj_start.name)
+    return cls_end(name=obj_start.name, qty=1)
+
+upup.register_updates("NestedItem", NestedItem1, NestedItem2, fn_update=update_item)
+upup.register_updates("NestedDoc", NestedDoc1, NestedDoc2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(title=obj_start.title, items=obj_start.items))
+upup.register_nested("NestedDoc", "items", "NestedItem")
+upup.register_nested("NestedDoc", "main", "NestedItem")
+upup.register_updates("NestedNode", NestedNode1, NestedNode2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(weight=float(obj_start.value), children=obj_start.children))
+upup.register_nested("NestedNode", "children", "NestedNode")
+
+def test_nested():
+    item_updates.clear()
+    data = json.dumps({ "title": "t", "items": [ { "name": "a" }, { "name": "b", "qty": 5 }, { "name": "a" } ], "main": { "name": "m" } })
+    doc = upup.load("NestedDoc", data)
+    assert doc == NestedDoc2(title="t", items=[ NestedItem2(name="a", qty=1), NestedItem2(name="b", qty=5), NestedItem2(name="a", qty=1) ], main=NestedItem2(name="m", qty=1))
+
+    # Identical children are updated once, and children at the latest version are not updated
+    assert sorted(item_updates) == [ "a", "m" ]
+
+def test_nested_latest():
+    # Data whose nested data is at the latest version is not copied
+    payload = { "title": "t", "items": [ { "name": "b", "qty": 5 } ], "main": None }
+    parse_once = load_module._parse(get_updater("NestedDoc").plan, payload)
+    assert parse_once.data is payload and not parse_once.transformed
+    assert upup.load("NestedDoc", json.dumps(payload)) == NestedDoc2(title="t", items=[ NestedItem2(name="b", qty=5) ])
+
+def test_nested_recursive():
+    data = { "value": 1, "children": [ { "value": 2, "children": [ { "value": 3 } ] }, { "weight": 4.5, "children": [ { "value": 6 } ] } ] }
+    node = upup.load("NestedNode", json.dumps(data))
+    assert node == NestedNode2(weight=1.0, children=[
+        NestedNode2(weight=2.0, children=[ NestedNode2(weight=3.0) ]),
+        NestedNode2(weight=4.5, children=[ NestedNode2(weight=6.0) ])
+        ])
+
+def test_nested_load_many():
+    item_updates.clear()
+    data = [ json.dumps({ "title": str(i), "items": [ { "name": "shared" }, { "name": f"own{i}" } ] }) for i in range(3) ]
+    docs = upup.load_many("NestedDoc", data)
+    assert [ doc.items for doc in docs ] == [ [ NestedItem2(name="shared", qty=1), NestedItem2(name=f"own{i}", qty=1) ] for i in range(3) ]
+
+    # Identical nested data is migrated once for all records
+    assert sorted(item_updates) == [ "own0", "own1", "own2", "shared" ]
+
+def test_nested_write_back(tmp_path: Path):
+    # Data at the latest version is written back if its nested data was migrated
+    fname = tmp_path / "doc.json"
+    fname.write_text(json.dumps({ "title": "t", "items": [ { "name": "a" } ], "main": None }))
+    doc = upup.load("NestedDoc", fname, upup.LoadOptions(write_back=True))
+    assert doc == NestedDoc2(title="t", items=[ NestedItem2(name="a", qty=1) ])
+    assert json.loads(fname.read_text())["items"] == [ { "name": "a", "qty": 1 } ]
@@ -0,0 +1,125 @@
+import pytest
+
+import upandup as upup
+from upandup.serializer import qualified_name
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass, make_dataclass
+import json
+
+@dataclass
+class Order1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Order2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class Order3(DataClassJSONMixin):
+    x: int
+    y: int
+    z: int
+
+@dataclass
+class OrderAmbiguous1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class OrderAmbiguous2(DataClassJSONMixin):
+    x: int
+    y: int = 5
+
+upup.register_updates("Order", Order1, Order2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+upup.register_updates("Order", Order2, Order3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
+upup.register_updates("OrderAmbiguous", OrderAmbiguous1, OrderAmbiguous2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=1))
+
+def load_counting_trials(label, data):
+    trials = []
+    upup.enable_metrics(callbacks=[ lambda event: trials.append(event.name) if event.kind == "failed_trial" else None ])
+    try:
+        return upup.load(label, data), trials
+    finally:
+        upup.disable_metrics()
+
+def test_adaptive_order():
+    # Old records with a key no class has are tried most recent first
+    data = json.dumps({ "x": 1, "legacy": 0 })
+    assert load_counting_trials("Order", data) == (Order3(x=1, y=0, z=0), [ "Order3", "Order2" ])
+
+    upup.enable_adaptive_order("Order")
+    try:
+        for _ in range(3):
+            upup.load("Order", data)
+        assert list(upup.order_profile("Order")) == [ qualified_name(Order1) ]
+
+        # The most frequent class is tried first, and the more recent classes are excluded by their signatures
+        assert load_counting_trials("Order", data) == (Order3(x=1, y=0, z=0), [])
+
+        # Results are unchanged for other records
+        assert upup.load("Order", json.dumps({ "x": 1, "y": 2, "legacy": 0 })) == Order3(x=1, y=2, z=0)
+        assert upup.load("Order", Order3(x=1, y=2, z=3).to_json()) == Order3(x=1, y=2, z=3)
+    finally:
+        upup.updater.get_updater("Order").disable_adaptive_order()
+    assert upup.order_profile("Order") == {}
+
+def test_same_results_when_ambiguous():
+    # Data both classes can deserialize is deserialized with the most recent, even if the other is more frequent
+    upup.enable_adaptive_order("OrderAmbiguous", profile={ qualified_name(OrderAmbiguous1): 1.0 })
+    try:
+        assert upup.load("OrderAmbiguous", json.dumps({ "x": 1 })) == OrderAmbiguous2(x=1, y=5)
+        assert upup.load("OrderAmbiguous", json.dumps({ "x": 1, "y": 2 })) == OrderAmbiguous2(x=1, y=2)
+    finally:
+        upup.updater.get_updater("OrderAmbiguous").disable_adaptive_order()
+
+def test_profile_seed_and_decay():
+    order = upup.CandidateOrder(profile={ qualified_name(Order2): 3.0, qualified_name(Order1): 1.0 })
+    assert order.profile() == { qualified_name(Order2): 0.75, qualified_name(Order1): 0.25 }
+    assert order.order((Order3, Order2, Order1)) == (Order2, Order1, Order3)
+
+    # Recent records weigh more with decay
+    order = upup.CandidateOrder(decay=0.5, reorder_every=1)
+    for _ in range(10):
+        order.record(Order1)
+    order.record(Order2)
+    order.record(Order2)
+    assert list(order.profile()) == [ qualified_name(Order2), qualified_name(Order1) ]
+
+    # Plain counts without decay
+    order = upup.CandidateOrder(reorder_every=1)
+    for cls in [ Order1 ] * 10 + [ Order2 ] * 2:
+        order.record(cls)
+    assert list(order.profile()) == [ qualified_name(Order1), qualified_name(Order2) ]
+
+def test_order_same_name():
+    # Classes of different modules with the same name are counted apart
+    Config1 = make_dataclass("Config", [ ("x", int) ], bases=(DataClassJSONMixin,))
+    Config2 = make_dataclass("Config", [ ("x", int), ("y", int) ], bases=(DataClassJSONMixin,))
+    Config1.__module__, Config2.__module__ = "orderv1", "orderv2"
+    order = upup.CandidateOrder(reorder_every=1)
+    for cls in [ Config1 ] * 3 + [ Config2 ]:
+        order.record(cls)
+    assert order.profile() == { "orderv1.Config": 0.75, "orderv2.Config": 0.25 }
+    assert order.order((Config2, Config1)) == (Config1, Config2)
+
+def test_plan_keeps_order():
+    @dataclass
+    class OrderKeep1(DataClassJSONMixin):
+        x: int
+
+    @dataclass
+    class OrderKeep2(DataClassJSONMixin):
+        x: int
+        y: int
+
+    @dataclass
+    class OrderKeep3(DataClassJSONMixin):
+        x: int
+        z: int
+
+    upup.register_updates("OrderKeep", OrderKeep1, OrderKeep2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    order = upup.enable_adaptive_order("OrderKeep")
+
+    # Frequencies are kept when more steps are registered
+    upup.register_updates("OrderKeep", OrderKeep2, OrderKeep3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, z=0))
+    assert upup.updater.get_updater("OrderKeep").plan.candidate_order is order
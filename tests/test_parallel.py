@@ -0,0 +1,27 @@
+import pytest
+
+import upandup as upup
+from parallel_registration import Parallel1, Parallel2
+import multiprocessing
+
+@pytest.mark.parametrize("start_method", ["fork", "spawn"])
+def test_load_parallel(start_method):
+    data = [ Parallel1(x=i).to_json() if i % 3 else Parallel2(x=i, y=0).to_json() for i in range(50) ]
+    objs = upup.load_parallel("Parallel", data, 
+        registration_module="parallel_registration", 
+        max_workers=2, 
+        chunk_size=7, 
+        mp_context=multiprocessing.get_context(start_method)
+        )
+    assert objs == upup.load_many("Parallel", data)
+
+def test_load_files_parallel(tmp_path):
+    fnames = []
+    for i in range(5):
+        fname = str(tmp_path / f"data_{i}.json")
+        with open(fname, "w") as f:
+            f.write(Parallel1(x=i).to_json())
+        fnames.append(fname)
+
+    objs = upup.load_files_parallel("Parallel", fnames, registration_module="parallel_registration", max_workers=2, chunk_size=2)
+    assert objs == [ Parallel2(x=i, y=2*i) for i in range(5) ]
@@ -0,0 +1,60 @@
+import pytest
+
+import upandup as upup
+from mashumaro.mixins.yaml import DataClassYAMLMixin, default_decoder
+from mashumaro.mixins.toml import DataClassTOMLMixin
+from dataclasses import dataclass, field
+from typing import List
+
+no_decodes = 0
+
+def counting_decoder(data):
+    global no_decodes
+    no_decodes += 1
+    return default_decoder(data)
+
+class CountingYAMLMixin(DataClassYAMLMixin):
+    @classmethod
+    def from_yaml(cls, data, decoder=counting_decoder, **from_dict_kwargs):
+        return super().from_yaml(data, decoder=decoder, **from_dict_kwargs)
+
+@dataclass
+class ParseYaml1(CountingYAMLMixin):
+    x: int
+
+@dataclass
+class ParseYaml2(CountingYAMLMixin):
+    x: int
+    y: int
+
+@dataclass
+class ParseYaml3(CountingYAMLMixin):
+    x: int
+    y: int
+    z: int
+
+@dataclass
+class ParseToml1(DataClassTOMLMixin):
+    x: int
+
+@dataclass
+class ParseToml2(DataClassTOMLMixin):
+    x: int
+    y: List[int] = field(default_factory=list)
+
+def test_parse_once_yaml():
+    global no_decodes
+    upup.register_updates("ParseYaml", ParseYaml1, ParseYaml2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    upup.register_updates("ParseYaml", ParseYaml2, ParseYaml3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
+
+    no_decodes = 0
+    obj = upup.load("ParseYaml", "x: 3\n")
+    assert no_decodes == 1
+    assert obj == ParseYaml3(x=3, y=0, z=0)
+
+def test_parse_once_identical():
+    upup.register_updates("ParseToml", ParseToml1, ParseToml2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x))
+
+    data = "x = 1\ny = [1, 2]\n"
+    obj = upup.load("ParseToml", data)
+    assert obj == ParseToml2.from_toml(data)
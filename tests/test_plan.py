@@ -0,0 +1,49 @@
+import pytest
+
+import upandup as upup
+from upandup.updater import updaters
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+
+@dataclass
+class Plan1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Plan2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Plan3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+def test_plan():
+    upup.register_updates("Plan", Plan1, Plan2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=1))
+    load_fn = upup.make_load_fn("Plan")
+    plan = updaters["Plan"].plan
+    assert plan.cls_list == (Plan1, Plan2)
+    assert updaters["Plan"].plan is plan
+    
+    upup.register_updates("Plan", Plan2, Plan3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=2))
+    plan = updaters["Plan"].plan
+    assert plan.cls_list == (Plan1, Plan2, Plan3)
+    assert plan.latest == Plan3
+    assert dict(plan.step_index) == {Plan1: 0, Plan2: 1}
+    assert plan.chains[Plan1](Plan1(x=0), upup.LoadOptions()) == Plan3(x=0, y=1, z=2)
+    assert plan.chains[Plan2](Plan2(x=0, y=5), upup.LoadOptions()) == Plan3(x=0, y=5, z=2)
+
+    # Load functions made before registering more steps use the new plan
+    assert load_fn({"x": 0}) == Plan3(x=0, y=1, z=2)
+
+    # Loops are not allowed
+    with pytest.raises(AssertionError):
+        upup.register_updates("Plan", Plan3, Plan1, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x))
+    assert updaters["Plan"].plan is plan
+
+def test_load_fn_before_register():
+    load_fn = upup.make_load_fn("PlanLate")
+    upup.register_updates("PlanLate", Plan1, Plan2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=1))
+    assert load_fn({"x": 0}) == Plan2(x=0, y=1)
@@ -0,0 +1,165 @@
+import pytest
+
+import upandup as upup
+from upandup.serializer import Serializer, check_serializer, write_obj
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+from typing import Iterator, List
+import dataclasses
+import copy
+import pickle
+
+@dataclass
+class Proxy1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Proxy2(DataClassJSONMixin):
+    x: int
+    y: int
+
+no_updates = 0
+def update(cls_start, cls_end, obj_start):
+    global no_updates
+    no_updates += 1
+    return cls_end(x=obj_start.x, y=2*obj_start.x)
+
+upup.register_updates("Proxy", Proxy1, Proxy2, fn_update=update)
+
+LAZY = upup.LoadOptions(lazy=True)
+
+def test_lazy_load():
+    global no_updates
+    no_updates = 0
+    obj = upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY)
+    assert isinstance(obj, Proxy2)
+    assert not upup.is_materialized(obj)
+    assert no_updates == 0
+
+    # Loaded on first field access
+    assert obj.y == 2
+    assert upup.is_materialized(obj)
+    assert no_updates == 1
+    assert obj.x == 1
+    assert no_updates == 1
+    assert upup.materialize(obj) == Proxy2(x=1, y=2)
+    assert type(upup.materialize(obj)) == Proxy2
+
+def test_lazy_interface():
+    obj = upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY)
+    assert obj == Proxy2(x=1, y=2)
+    assert Proxy2(x=1, y=2) == obj
+    assert repr(obj) == repr(Proxy2(x=1, y=2))
+    assert obj.to_dict() == { "x": 1, "y": 2 } # type: ignore
+
+    # Fields are set on the loaded object
+    obj.y = 5 # type: ignore
+    assert upup.materialize(obj) == Proxy2(x=1, y=5)
+
+def test_lazy_dataclass():
+    global no_updates
+    no_updates = 0
+    obj = upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY)
+    assert dataclasses.is_dataclass(obj)
+    assert [ f.name for f in dataclasses.fields(obj) ] == [ "x", "y" ]
+    assert not upup.is_materialized(obj)
+    assert no_updates == 0
+
+    # Reading the fields loads the object
+    assert dataclasses.asdict(obj) == { "x": 1, "y": 2 }
+    assert upup.is_materialized(obj)
+    assert dataclasses.astuple(obj) == (1, 2)
+
+    # Replacing fields creates an object of the latest class
+    obj_new = dataclasses.replace(obj, y=5)
+    assert type(obj_new) == Proxy2
+    assert obj_new == Proxy2(x=1, y=5)
+    assert obj == Proxy2(x=1, y=2)
+
+    # The proxy class is not the latest class, the loaded object is
+    assert type(obj) != Proxy2 and isinstance(obj, upup.LazyProxy)
+    assert type(upup.materialize(obj)) == Proxy2
+
+def test_lazy_copy_pickle():
+    obj = upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY)
+    assert type(copy.deepcopy(obj)) == Proxy2
+    assert pickle.loads(pickle.dumps(obj)) == Proxy2(x=1, y=2)
+
+def test_lazy_load_many():
+    global no_updates
+    no_updates = 0
+    objs = upup.load_many("Proxy", [ Proxy1(x=i).to_json() for i in range(10) ], options=LAZY)
+    assert [ o.x for o in objs if o.x % 5 == 0 ] == [ 0, 5 ] # type: ignore
+    assert no_updates == 10
+    assert all(upup.is_materialized(o) for o in objs)
+
+    # Only the records inspected are loaded
+    objs = upup.load_many("Proxy", [ Proxy1(x=i).to_json() for i in range(10) ], options=LAZY)
+    assert objs[3].y == 6 # type: ignore
+    assert [ upup.is_materialized(o) for o in objs ] == [ i == 3 for i in range(10) ]
+
+def test_lazy_error():
+    # Errors are raised when the object is loaded, and loading can be retried
+    obj = upup.load("Proxy", '{"z": 1}', options=LAZY)
+    with pytest.raises(AssertionError):
+        obj.x # type: ignore
+    assert not upup.is_materialized(obj)
+
+def test_lazy_file(tmp_path):
+    fname = tmp_path / "data.json"
+    fname.write_text(Proxy1(x=1).to_json())
+    obj = upup.load("Proxy", fname, options=upup.LoadOptions(lazy=True, write_back=True))
+    assert fname.read_text() == Proxy1(x=1).to_json()
+    assert obj.y == 2 # type: ignore
+    assert Proxy2.from_json(fname.read_text()) == Proxy2(x=1, y=2)
+
+def test_lazy_serialize_store_write(tmp_path):
+    obj = upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY)
+    assert check_serializer(type(obj)) == Serializer.JSON
+    assert upup.serialize(obj, label="Proxy") == '{"__upandup__": "Proxy:Proxy2", "x": 1, "y": 2}'
+
+    # Proxies are stored and written at the latest version
+    with upup.VersionedStore() as store:
+        store.put("Proxy", "a", upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY))
+        assert store.histogram("Proxy") == { "Proxy2": 1 }
+        assert store.get("Proxy", "a") == Proxy2(x=1, y=2)
+
+    assert write_obj(upup.load("Proxy", Proxy1(x=1).to_json(), options=LAZY), str(tmp_path), "obj") > 0
+    assert Proxy2.from_json((tmp_path / "obj.json").read_text()) == Proxy2(x=1, y=2)
+    with upup.VersionWriter() as writer:
+        writer.write(upup.load("Proxy", Proxy1(x=3).to_json(), options=LAZY), str(tmp_path), "queued")
+    assert Proxy2.from_json((tmp_path / "queued.json").read_text()) == Proxy2(x=3, y=6)
+
+@dataclass
+class ProxyBag1(DataClassJSONMixin):
+    items: List[int]
+
+@dataclass
+class ProxyBag2(DataClassJSONMixin):
+    items: List[int]
+    name: str
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.items)
+
+    def __getitem__(self, i: int) -> int:
+        return self.items[i]
+
+    def __contains__(self, item: int) -> bool:
+        return item in self.items
+
+upup.register_updates("ProxyBag", ProxyBag1, ProxyBag2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(items=obj_start.items, name=""))
+
+def test_lazy_container():
+    obj = upup.load("ProxyBag", ProxyBag1(items=[ 1, 2, 3 ]).to_json(), options=LAZY)
+    assert len(obj) == 3 # type: ignore
+    assert list(obj) == [ 1, 2, 3 ] # type: ignore
+    assert obj[1] == 2 # type: ignore
+    assert 3 in obj and 4 not in obj # type: ignore
+
+    # Truth follows the loaded object
+    assert bool(upup.load("ProxyBag", ProxyBag1(items=[]).to_json(), options=LAZY)) is False
+    assert bool(upup.load("ProxyBag", ProxyBag1(items=[ 1 ]).to_json(), options=LAZY)) is True
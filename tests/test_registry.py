@@ -0,0 +1,100 @@
+import pytest
+
+import upandup as upup
+import upandup.updater
+from upandup.updater import updaters, Updater, UpdaterRegistry
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass, make_dataclass
+import threading
+
+@dataclass
+class Registry1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Registry2(DataClassDictMixin):
+    x: int
+    y: int
+
+upup.register_updates("Registry", Registry1, Registry2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x))
+
+def test_snapshot():
+    snapshot = updaters.snapshot()
+    assert "Registry" in snapshot
+    with pytest.raises(TypeError):
+        snapshot["RegistryNew"] = snapshot["Registry"] # type: ignore
+
+    # Registering a label publishes a new snapshot, and leaves the old one unchanged
+    upup.register_updates("RegistryNew", Registry1, Registry2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    assert "RegistryNew" not in snapshot
+    assert "RegistryNew" in updaters.snapshot()
+    assert updaters["RegistryNew"] is updaters.snapshot()["RegistryNew"]
+
+    # Snapshots are only copied after registrations
+    assert updaters.snapshot() is updaters.snapshot()
+
+def test_register_many_labels(monkeypatch):
+    # Registering a label compiles only its own plan, and does not copy the registry
+    compiled = []
+    compile_plan = upandup.updater.compile_plan
+    monkeypatch.setattr(upandup.updater, "compile_plan", lambda label, *args, **kwargs: compiled.append(label) or compile_plan(label, *args, **kwargs))
+    registry = UpdaterRegistry()
+    for i in range(1000):
+        updater = Updater(f"RegistryMany{i}")
+        updater.register_updates(Registry1, Registry2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+        registry._publish(updater)
+    # The constructor compiles the empty plan, and the registration the plan with the update
+    assert compiled == [ f"RegistryMany{i}" for i in range(1000) for _ in range(2) ]
+    assert registry._snapshot[0] == 0
+
+    # The registry is copied once, when a snapshot is taken
+    snapshot = registry.snapshot()
+    assert len(snapshot) == 1000
+    assert registry.snapshot() is snapshot
+
+def test_update_with_plan():
+    plan = updaters["Registry"].plan
+    assert updaters["Registry"].update(Registry1(x=1), plan=plan) == Registry2(x=1, y=2)
+
+def test_register_while_loading():
+    # Loads in other threads see complete plans while steps and labels are registered
+    classes = [ Registry2 ] + [ make_dataclass(f"RegistryConcurrent{i}", [ ("x", int), ("y", int) ] + [ (f"f{j}", int, 0) for j in range(i+1) ], bases=(DataClassDictMixin,)) for i in range(50) ]
+    upup.register_updates("RegistryConcurrent", Registry1, Registry2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=2*obj_start.x))
+    stop = threading.Event()
+    errors = []
+    def run_loads():
+        while not stop.is_set():
+            try:
+                obj = upup.load("RegistryConcurrent", { "x": 1 })
+                assert obj.x == 1 and obj.y == 2 # type: ignore
+            except BaseException as e:
+                errors.append(e)
+                return
+
+    threads = [ threading.Thread(target=run_loads) for _ in range(4) ]
+    for thread in threads:
+        thread.start()
+    try:
+        for i, (cls_start, cls_end) in enumerate(zip(classes[:-1], classes[1:])):
+            upup.register_updates("RegistryConcurrent", cls_start, cls_end, fn_update=lambda cls_start, cls_end, obj_start: cls_end(**obj_start.__dict__))
+            upup.register_updates(f"RegistryConcurrentOther{i}", Registry1, Registry2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert type(upup.load("RegistryConcurrent", { "x": 1 })) == classes[-1]
+
+def test_register_concurrently():
+    # Steps registered from several threads are all published
+    def register(i: int):
+        cls = make_dataclass(f"RegistryThread{i}", [ ("x", int) ], bases=(DataClassDictMixin,))
+        upup.register_updates(f"RegistryThread{i}", Registry1, cls, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x))
+
+    threads = [ threading.Thread(target=register, args=(i,)) for i in range(20) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(f"RegistryThread{i}" in updaters for i in range(20))
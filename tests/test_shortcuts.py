@@ -0,0 +1,88 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+
+@dataclass
+class Short1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Short2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Short3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+@dataclass
+class Short4(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+    w: int
+
+calls = []
+
+def step(fields):
+    def fn_update(cls_start, cls_end, obj_start):
+        calls.append(f"{cls_start.__name__}->{cls_end.__name__}")
+        return cls_end(**obj_start.to_dict(), **fields)
+    return fn_update
+
+def register(label: str):
+    upup.register_chain(label, [Short1, Short2, Short3, Short4], [step({"y": 1}), step({"z": 2}), step({"w": 3})])
+
+def test_shortcut():
+    register("Short")
+    upup.register_shortcut("Short", Short1, Short4, step({"y": 1, "z": 2, "w": 3}))
+    assert upup.updater.get_updater("Short").plan.paths[Short1][0].cls_end == Short4
+
+    calls.clear()
+    assert upup.load("Short", {"x": 0}) == Short4(x=0, y=1, z=2, w=3)
+    assert calls == ["Short1->Short4"]
+
+    calls.clear()
+    assert upup.load_many("Short", [ {"x": 0}, {"x": 1, "y": 1} ]) == [ Short4(x=0, y=1, z=2, w=3), Short4(x=1, y=1, z=2, w=3) ]
+    assert calls == ["Short1->Short4", "Short2->Short3", "Short3->Short4"]
+
+    assert upup.verify_shortcuts("Short", [ Short1(x=0), Short2(x=0, y=1) ]) == []
+
+def test_shortcut_costs():
+    register("ShortCosts")
+    upup.register_dict_shortcut("ShortCosts", Short2, Short4, lambda d: { **d, "z": 2, "w": 3 }, cost=5.0)
+    updater = upup.updater.get_updater("ShortCosts")
+
+    # The shortcut is more expensive than the two steps it skips
+    assert len(updater.plan.paths[Short2]) == 2
+    updater.set_costs({ (Short2, Short3): 10.0 })
+    assert len(updater.plan.paths[Short2]) == 1
+    assert upup.load("ShortCosts", {"x": 0, "y": 1}) == Short4(x=0, y=1, z=2, w=3)
+
+    # Measured latencies replace the hints
+    upup.enable_metrics()
+    try:
+        upup.load("ShortCosts", {"x": 0})
+        upup.load("ShortCosts", {"x": 0, "y": 1})
+        updater.use_measured_costs(upup.metrics_snapshot()["ShortCosts"])
+    finally:
+        upup.disable_metrics()
+    assert all(info.cost is not None and info.cost < 1.0 for info in updater.plan.paths[Short1])
+
+def test_verify_shortcuts():
+    register("ShortWrong")
+    upup.register_shortcut("ShortWrong", Short1, Short3, step({"y": 1, "z": 0}))
+    mismatches = upup.verify_shortcuts("ShortWrong", [ Short1(x=0), Short3(x=0, y=0, z=0) ])
+    assert len(mismatches) == 2
+    assert "Short1 -> Short3" in mismatches[1]
+
+def test_shortcut_validation():
+    register("ShortInvalid")
+    with pytest.raises(AssertionError):
+        upup.register_shortcut("ShortInvalid", Short1, Short2, step({"y": 1}))
+    with pytest.raises(AssertionError):
+        upup.register_shortcut("ShortInvalid", Short3, Short1, step({}))
@@ -0,0 +1,97 @@
+import pytest
+
+import upandup as upup
+import upandup.serializer
+from upandup.signature import signature_for_cls
+from upandup.updater import updaters
+from mashumaro import DataClassDictMixin, field_options
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+@dataclass
+class Sig1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Sig2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Sig3(DataClassDictMixin):
+    y: int
+    z: List[int] = field(default_factory=list)
+
+@dataclass
+class SigAlias(DataClassDictMixin):
+    x: int = field(metadata=field_options(alias="X"))
+    d: Dict[str,int] = field(default_factory=dict)
+
+@dataclass
+class SigAlt(DataClassDictMixin):
+    x: int
+    y: int = 3
+
+def test_signature():
+    sig = signature_for_cls(Sig3)
+    assert sig.required_keys == {"y"}
+    assert sig.keys == {"y", "z"}
+    assert sig.matches({"y": 1})
+    assert not sig.matches({"y": 1, "x": 1})
+
+    sig = signature_for_cls(SigAlias)
+    assert sig.keys == {"X", "d"}
+    assert sig.mapping_keys == {"d"}
+    assert sig.matches({"X": 1, "d": {}})
+    assert not sig.matches({"X": 1, "d": 1})
+
+def test_signature_dispatch(monkeypatch):
+    upup.register_updates("Sig", Sig1, Sig2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    upup.register_updates("Sig", Sig2, Sig3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(y=obj_start.x + obj_start.y))
+    assert updaters["Sig"].plan.ambiguities == ()
+
+    # Count deserialization attempts
+    attempts = []
+    deserialize_obj = upandup.serializer.deserialize_obj
+    def counting_deserialize_obj(data, cls, serializer):
+        attempts.append(cls)
+        return deserialize_obj(data, cls, serializer)
+    monkeypatch.setattr(upandup.serializer, "deserialize_obj", counting_deserialize_obj)
+
+    assert upup.load("Sig", {"x": 1}) == Sig3(y=1)
+    assert attempts == [Sig1]
+
+    attempts.clear()
+    assert upup.load("Sig", {"x": 1, "y": 2}) == Sig3(y=3)
+    assert attempts == [Sig2]
+
+    # No signature matches, so all classes are tried
+    attempts.clear()
+    assert upup.load("Sig", {"y": 1, "w": 2}) == Sig3(y=1)
+    assert attempts == [Sig3]
+
+def test_signature_ambiguous():
+    upup.register_updates("SigAmbiguous", Sig1, SigAlt, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x))
+    assert updaters["SigAmbiguous"].plan.ambiguities == ((Sig1, SigAlt),)
+
+    # Ambiguous data is resolved by trying the most recent class first
+    assert upup.load("SigAmbiguous", {"x": 1}) == SigAlt(x=1, y=3)
+
+@dataclass
+class SigKind1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class SigKind2(DataClassDictMixin):
+    x: str
+
+def test_signature_kinds():
+    sig = signature_for_cls(SigKind2)
+    assert sig.matches({"x": "a"})
+    assert not sig.matches({"x": 5})
+
+    # Data with the same keys is dispatched by the kinds of its values
+    upup.register_updates("SigKind", SigKind1, SigKind2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=f"id-{obj_start.x}"))
+    assert updaters["SigKind"].plan.ambiguities == ()
+    assert upup.load("SigKind", {"x": 5}) == SigKind2(x="id-5")
+    assert upup.load("SigKind", {"x": "a"}) == SigKind2(x="a")
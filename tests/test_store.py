@@ -0,0 +1,167 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass, make_dataclass
+from typing import List
+import json
+import sqlite3
+
+@dataclass
+class Store1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class Store2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class Store3(DataClassJSONMixin):
+    x: int
+    y: int
+    z: int
+
+@dataclass
+class StoreDict1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class StoreDict2(DataClassDictMixin):
+    x: int
+    y: int
+
+no_updates = 0
+def update_1_2(cls_start, cls_end, obj_start):
+    global no_updates
+    no_updates += 1
+    return cls_end(x=obj_start.x, y=2*obj_start.x)
+
+upup.register_updates("Store", Store1, Store2, fn_update=update_1_2)
+upup.register_updates("Store", Store2, Store3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
+upup.register_updates("StoreDict", StoreDict1, StoreDict2, fn_update=update_1_2)
+
+@dataclass
+class StoreItem1(DataClassJSONMixin):
+    name: str
+
+@dataclass
+class StoreItem2(DataClassJSONMixin):
+    name: str
+    qty: int
+
+@dataclass
+class StoreDoc1(DataClassJSONMixin):
+    title: str
+    items: List[StoreItem2]
+
+@dataclass
+class StoreDoc2(DataClassJSONMixin):
+    title: str
+    items: List[StoreItem2]
+    note: str
+
+upup.register_updates("StoreItem", StoreItem1, StoreItem2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(name=obj_start.name, qty=1))
+upup.register_updates("StoreDoc", StoreDoc1, StoreDoc2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(title=obj_start.title, items=obj_start.items, note=""))
+upup.register_nested("StoreDoc", "items", "StoreItem")
+
+@pytest.fixture
+def store():
+    with upup.VersionedStore() as store:
+        store.put_many("Store", [ ("a", Store1(x=1)), ("b", Store1(x=2)), ("c", Store2(x=3, y=0)), ("d", Store3(x=4, y=0, z=1)) ])
+        yield store
+
+def test_histogram(store):
+    assert store.histogram("Store") == { "Store1": 2, "Store2": 1, "Store3": 1 }
+    assert store.histogram("StoreOther") == {}
+
+def test_keys(store):
+    assert store.keys("Store") == [ "a", "b", "c", "d" ]
+    assert store.keys("Store", version=Store1) == [ "a", "b" ]
+    assert store.keys("Store", version="Store2") == [ "c" ]
+    assert store.keys("Store", below=Store3) == [ "a", "b", "c" ]
+    with pytest.raises(AssertionError):
+        store.keys("Store", version="StoreUnknown")
+
+def test_get(store):
+    global no_updates
+    no_updates = 0
+    assert store.get("Store", "a") == Store3(x=1, y=2, z=0)
+    assert no_updates == 1
+    assert store.histogram("Store") == { "Store1": 1, "Store2": 1, "Store3": 2 }
+
+    # Migrated objects need no updates when read again
+    assert store.get("Store", "a") == Store3(x=1, y=2, z=0)
+    assert no_updates == 1
+
+    # Without migration, the row is left at its version
+    assert store.get("Store", "b", migrate=False) == Store3(x=2, y=4, z=0)
+    assert store.keys("Store", version=Store1) == [ "b" ]
+    assert store.get("Store", "missing") is None
+
+def test_upgrade(store):
+    assert store.upgrade("Store", below=Store2, batch_size=1) == 2
+    assert store.histogram("Store") == { "Store2": 1, "Store3": 3 }
+    assert store.upgrade("Store") == 1
+    assert store.histogram("Store") == { "Store3": 4 }
+    assert store.upgrade("Store") == 0
+    assert [ store.get("Store", key) for key in "abcd" ] == [ Store3(x=1, y=2, z=0), Store3(x=2, y=4, z=0), Store3(x=3, y=0, z=0), Store3(x=4, y=0, z=1) ]
+
+def test_changed_rows_not_migrated(store):
+    # A row replaced after it was read is not overwritten by its migration
+    store.put("Store", "a", Store1(x=10))
+    store._write_migrated("Store", upup.updater.get_updater("Store").plan, [ ("a", Store1(x=1).to_json().encode("utf-8"), Store3(x=1, y=2, z=0)) ])
+    assert store.get("Store", "a", migrate=False) == Store3(x=10, y=20, z=0)
+
+def test_delete(store):
+    assert store.delete("Store", "a")
+    assert not store.delete("Store", "a")
+    assert store.keys("Store") == [ "b", "c", "d" ]
+
+def test_dict_classes(tmp_path):
+    fname = str(tmp_path / "store.db")
+    with upup.VersionedStore(fname) as store:
+        store.put("StoreDict", "a", StoreDict1(x=1))
+    with upup.VersionedStore(fname) as store:
+        assert store.histogram("StoreDict") == { "StoreDict1": 1 }
+        assert store.get("StoreDict", "a") == StoreDict2(x=1, y=2)
+
+    # Rows are plain SQLite rows
+    conn = sqlite3.connect(fname)
+    assert conn.execute("SELECT label, key, version, version_index FROM upandup_objects").fetchall() == [ ("StoreDict", "a", "StoreDict2", 1) ]
+    conn.close()
+
+def put_raw(store, label, key, version, version_index, payload):
+    with store._conn:
+        store._conn.execute("INSERT INTO upandup_objects (label, key, version, version_index, payload) VALUES (?, ?, ?, ?, ?)", (label, key, version, version_index, json.dumps(payload).encode("utf-8")))
+
+def test_nested(store):
+    put_raw(store, "StoreDoc", "a", "StoreDoc1", 0, { "title": "a", "items": [ { "name": "x" } ] })
+    put_raw(store, "StoreDoc", "b", "StoreDoc2", 1, { "title": "b", "items": [ { "name": "y" } ], "note": "" })
+    put_raw(store, "StoreDoc", "c", "StoreDoc2", 1, { "title": "c", "items": [ { "name": "z", "qty": 2 } ], "note": "" })
+    assert store.get("StoreDoc", "a") == StoreDoc2(title="a", items=[ StoreItem2(name="x", qty=1) ], note="")
+    assert store.get("StoreDoc", "b", migrate=False) == StoreDoc2(title="b", items=[ StoreItem2(name="y", qty=1) ], note="")
+
+    # Rows at the latest version are migrated if their nested data is older
+    assert store.upgrade("StoreDoc", batch_size=1) == 1
+    assert store.upgrade("StoreDoc") == 0
+    payloads = dict(store._conn.execute("SELECT key, payload FROM upandup_objects WHERE label = ?", ("StoreDoc",)).fetchall())
+    assert [ json.loads(payloads[key])["items"] for key in "abc" ] == [ [ { "name": "x", "qty": 1 } ], [ { "name": "y", "qty": 1 } ], [ { "name": "z", "qty": 2 } ] ]
+
+def test_same_name_registered_later(store):
+    # Rows stored before a class with the same name is registered keep resolving to their class
+    Config1 = make_dataclass("Config", [ ("x", int) ], bases=(DataClassJSONMixin,))
+    Config2 = make_dataclass("Config", [ ("x", int), ("y", int) ], bases=(DataClassJSONMixin,))
+    Config1.__module__, Config2.__module__ = "storev1", "storev2"
+    Settings = make_dataclass("Settings", [ ("x", int) ], bases=(DataClassJSONMixin,))
+    upup.register_updates("StoreSameName", Config1, Settings, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x))
+    store.put_many("StoreSameName", [ ("a", Config1(x=1)), ("b", Config1(x=2)) ])
+    assert store.histogram("StoreSameName") == { "Config": 2 }
+
+    upup.register_updates("StoreSameName", Settings, Config2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    assert store.keys("StoreSameName", version="Config") == [ "a", "b" ]
+    assert store.get("StoreSameName", "a") == Config2(x=1, y=0)
+    assert store.upgrade("StoreSameName") == 1
+    assert store.histogram("StoreSameName") == { "storev2.Config": 2 }
+    assert store.get("StoreSameName", "b") == Config2(x=2, y=0)
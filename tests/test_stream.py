@@ -0,0 +1,72 @@
+import pytest
+
+import upandup as upup
+from upandup.serializer import Serializer
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.yaml import DataClassYAMLMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from dataclasses import dataclass
+import io
+
+@dataclass
+class StreamJson1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class StreamJson2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class StreamYaml1(DataClassYAMLMixin):
+    x: int
+
+@dataclass
+class StreamYaml2(DataClassYAMLMixin):
+    x: int
+    y: int
+
+@dataclass
+class StreamDict1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class StreamDict2(DataClassDictMixin):
+    x: int
+    y: int
+
+update_1_to_2 = lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0)
+upup.register_updates("StreamJson", StreamJson1, StreamJson2, fn_update=update_1_to_2)
+upup.register_updates("StreamYaml", StreamYaml1, StreamYaml2, fn_update=update_1_to_2)
+upup.register_updates("StreamDict", StreamDict1, StreamDict2, fn_update=update_1_to_2)
+
+def test_stream_jsonl(tmp_path):
+    fname = tmp_path / "data.jsonl"
+    fname.write_text('{"x": 1}\n\n{"x": 2, "y": 3}\n{"z": 1}\n{"x": 4}\n')
+
+    errors = []
+    objs = list(upup.load_stream("StreamJson", fname, on_error=errors.append))
+    assert objs == [ StreamJson2(x=1, y=0), StreamJson2(x=2, y=3), StreamJson2(x=4, y=0) ]
+    assert [ (e.index, e.line_no) for e in errors ] == [ (2, 4) ]
+
+    with pytest.raises(upup.StreamError):
+        list(upup.load_stream("StreamJson", fname, raise_on_error=True))
+
+def test_stream_yaml():
+    data = "x: 1\n---\nx: 2\ny: 3\n--- # comment\n---\nz: 1\n...\n--- {x: 4}\n"
+    objs = []
+    errors = []
+    for obj in upup.load_stream("StreamYaml", io.StringIO(data), on_error=errors.append):
+        objs.append(obj)
+    assert objs == [ StreamYaml2(x=1, y=0), StreamYaml2(x=2, y=3), StreamYaml2(x=4, y=0) ]
+    assert [ (e.index, e.line_no) for e in errors ] == [ (2, 6) ]
+
+@pytest.mark.parametrize("serializer", [Serializer.JSON, Serializer.YAML])
+def test_stream_dict(serializer):
+    data = '{"x": 1}\n' if serializer == Serializer.JSON else "x: 1\n"
+    objs = list(upup.load_stream("StreamDict", io.StringIO(data), serializer=serializer))
+    assert objs == [ StreamDict2(x=1, y=0) ]
+
+def test_stream_dict_default():
+    objs = list(upup.load_stream("StreamDict", io.StringIO('{"x": 1}\n')))
+    assert objs == [ StreamDict2(x=1, y=0) ]
@@ -0,0 +1,105 @@
+import pytest
+
+import upandup as upup
+from upandup.serializer import TAG_KEY, read_tag
+from mashumaro import DataClassDictMixin
+from mashumaro.mixins.yaml import DataClassYAMLMixin
+from mashumaro.mixins.json import DataClassJSONMixin
+from mashumaro.mixins.toml import DataClassTOMLMixin
+from dataclasses import dataclass, make_dataclass
+import os
+import glob
+
+@dataclass
+class TagDict1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class TagDict2(DataClassDictMixin):
+    x: int
+    y: int = 3
+
+@dataclass
+class TagYaml(DataClassYAMLMixin):
+    x: int
+
+@dataclass
+class TagJson(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class TagToml(DataClassTOMLMixin):
+    x: int
+
+@dataclass
+class TagEmptyJson(DataClassJSONMixin):
+    pass
+
+def clean_up():
+    fnames = sorted(glob.glob("./TMPTAG*"))
+    for fname in fnames:
+        if os.path.exists(fname):
+            os.remove(fname)
+
+@pytest.mark.parametrize("cls", [TagDict1, TagYaml, TagJson, TagToml])
+def test_tag_round_trip(cls):
+    data = cls(x=1)
+    d = upup.serialize(data, label="TagRoundTrip")
+    assert read_tag(d) == f"TagRoundTrip:{cls.__name__}"
+    assert upup.serialize(data) != d
+    assert upup.deserialize(d, cls) == data
+
+def test_tag_empty_json():
+    d = upup.serialize(TagEmptyJson(), label="TagEmpty")
+    assert d == '{"%s": "TagEmpty:TagEmptyJson"}' % TAG_KEY
+    assert upup.deserialize(d, TagEmptyJson) == TagEmptyJson()
+
+def test_tag_dispatch():
+    update_1_to_2 = lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0)
+    upup.register_updates("TagDispatch", TagDict1, TagDict2, fn_update=update_1_to_2)
+
+    # Untagged data is loaded as the newest class that works
+    obj = upup.load("TagDispatch", {"x": 1})
+    assert obj == TagDict2(x=1, y=3)
+
+    # Tagged data is loaded as the tagged class, and updated
+    obj = upup.load("TagDispatch", upup.serialize(TagDict1(x=1), label="TagDispatch"))
+    assert obj == TagDict2(x=1, y=0)
+
+    # Wrong label
+    with pytest.raises(AssertionError):
+        upup.load("TagDispatch", upup.serialize(TagDict1(x=1), label="TagOther"))
+
+def test_tag_versions():
+    clean_up()
+    try:
+        update_1_to_2 = lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0)
+        upup.register_updates("TagVersions", TagDict1, TagDict2, fn_update=update_1_to_2)
+
+        options = upup.LoadOptions(write_versions=True, write_version_prefix="TMPTAG", tag_versions=True)
+        upup.load("TagVersions", upup.serialize(TagDict1(x=1), label="TagVersions"), options=options)
+        with open("TMPTAG_TagDict2.json") as f:
+            assert read_tag(f.read()) == "TagVersions:TagDict2"
+    finally:
+        clean_up()
+
+def make_config(module: str, **fields) -> type:
+    cls = make_dataclass("Config", [ ("x", int) ] + [ (name, int, default) for name, default in fields.items() ], bases=(DataClassDictMixin,))
+    cls.__module__ = module
+    return cls
+
+def test_tag_same_name():
+    # Classes of different modules may share a name, and are tagged with their module and qualified name
+    Config1, Config2 = make_config("tagv1"), make_config("tagv2", y=3)
+    upup.register_updates("TagSameName", Config1, Config2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+    plan = upup.updater.get_updater("TagSameName").plan
+    assert dict(plan.version_names) == { Config1: "tagv1.Config", Config2: "tagv2.Config" }
+
+    d = upup.serialize(Config1(x=1), label="TagSameName")
+    assert d[TAG_KEY] == "TagSameName:tagv1.Config" # type: ignore
+    assert upup.load("TagSameName", d) == Config2(x=1, y=0)
+    assert upup.load("TagSameName", {"x": 1}) == Config2(x=1, y=3)
+
+    # Classes that cannot be told apart by name are rejected
+    with pytest.raises(AssertionError, match="same module and qualified name"):
+        upup.register_updates("TagSameName", Config2, make_config("tagv2", y=3, z=4), fn_update=lambda cls_start, cls_end, obj_start: obj_start)
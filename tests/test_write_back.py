@@ -0,0 +1,120 @@
+import pytest
+
+import upandup as upup
+import importlib
+from mashumaro.mixins.json import DataClassJSONMixin
+from mashumaro.mixins.yaml import DataClassYAMLMixin
+from dataclasses import dataclass
+import os
+import threading
+
+@dataclass
+class WriteBack1(DataClassJSONMixin):
+    x: int
+
+@dataclass
+class WriteBack2(DataClassJSONMixin):
+    x: int
+    y: int
+
+@dataclass
+class WriteBackYaml(DataClassYAMLMixin):
+    x: int
+    y: int
+
+no_updates = 0
+def update(cls_start, cls_end, obj_start):
+    global no_updates
+    no_updates += 1
+    return cls_end(x=obj_start.x, y=2*obj_start.x)
+
+upup.register_updates("WriteBack", WriteBack1, WriteBack2, fn_update=update)
+upup.register_updates("WriteBackYaml", WriteBack1, WriteBackYaml, fn_update=update)
+
+def test_write_back(tmp_path):
+    global no_updates
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    options = upup.LoadOptions(write_back=True)
+    no_updates = 0
+    assert upup.load("WriteBack", fname, options=options) == WriteBack2(x=1, y=2)
+    assert no_updates == 1
+    assert WriteBack2.from_json(fname.read_text()) == WriteBack2(x=1, y=2)
+
+    # Later loads need no updates, and leave the file unchanged
+    mtime = os.stat(fname).st_mtime_ns
+    assert upup.load("WriteBack", fname, options=options) == WriteBack2(x=1, y=2)
+    assert no_updates == 1
+    assert os.stat(fname).st_mtime_ns == mtime
+    assert os.listdir(tmp_path) == [ "data.json" ]
+
+def test_write_back_format(tmp_path):
+    # The file is written in the format of the latest class, and tagged if requested
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    upup.load("WriteBackYaml", fname, options=upup.LoadOptions(write_back=True, tag_versions=True))
+    assert upup.serializer.read_tag(fname.read_text()) == "WriteBackYaml:WriteBackYaml"
+    assert upup.load("WriteBackYaml", fname) == WriteBackYaml(x=1, y=2)
+
+def test_write_back_off(tmp_path):
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    upup.load("WriteBack", fname)
+    with open(fname, "rb") as f:
+        upup.load("WriteBack", f, options=upup.LoadOptions(write_back=True))
+    assert fname.read_text() == WriteBack1(x=1).to_json()
+
+def test_write_back_locked(tmp_path):
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    fname_lock = tmp_path / ".data.json.upandup-lock"
+    fname_lock.touch()
+    assert upup.load("WriteBack", fname, options=upup.LoadOptions(write_back=True)) == WriteBack2(x=1, y=2)
+    assert fname.read_text() == WriteBack1(x=1).to_json()
+
+    # Locks left behind are replaced after a timeout
+    os.utime(fname_lock, (0, 0))
+    upup.load("WriteBack", fname, options=upup.LoadOptions(write_back=True))
+    assert WriteBack2.from_json(fname.read_text()) == WriteBack2(x=1, y=2)
+    assert not fname_lock.exists()
+
+def test_write_back_changed(tmp_path, monkeypatch):
+    # Files changed since they were read are not replaced
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    load = importlib.import_module("upandup.load")
+    deserialize = load._deserialize
+    def deserialize_and_change(plan, data):
+        obj = deserialize(plan, data)
+        fname.write_text(WriteBack1(x=10).to_json())
+        return obj
+    monkeypatch.setattr(load, "_deserialize", deserialize_and_change)
+    assert upup.load("WriteBack", fname, options=upup.LoadOptions(write_back=True)) == WriteBack2(x=1, y=2)
+    assert fname.read_text() == WriteBack1(x=10).to_json()
+
+def test_write_back_concurrent(tmp_path):
+    # Each file is written back at most once
+    fname = tmp_path / "data.json"
+    fname.write_text(WriteBack1(x=1).to_json())
+    writes = []
+    upup.enable_metrics(callbacks=[ lambda event: writes.append(event) if event.kind == "write" else None ])
+    try:
+        options = upup.LoadOptions(write_back=True)
+        threads = [ threading.Thread(target=upup.load, args=("WriteBack", fname, options)) for _ in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        upup.disable_metrics()
+    assert len(writes) == 1
+    assert WriteBack2.from_json(fname.read_text()) == WriteBack2(x=1, y=2)
+
+def test_write_back_many(tmp_path):
+    fnames = [ tmp_path / f"data{i}.json" for i in range(3) ]
+    fnames[0].write_text(WriteBack1(x=1).to_json())
+    fnames[1].write_text(WriteBack2(x=2, y=0).to_json())
+    fnames[2].write_text(WriteBack1(x=3).to_json())
+    objs = upup.load_many("WriteBack", fnames, options=upup.LoadOptions(write_back=True))
+    assert objs == [ WriteBack2(x=1, y=2), WriteBack2(x=2, y=0), WriteBack2(x=3, y=6) ]
+    assert [ WriteBack2.from_json(f.read_text()) for f in fnames ] == objs
@@ -0,0 +1,71 @@
+import pytest
+
+import upandup as upup
+from mashumaro import DataClassDictMixin
+from dataclasses import dataclass
+import gzip
+import json
+import os
+import zipfile
+
+@dataclass
+class Writer1(DataClassDictMixin):
+    x: int
+
+@dataclass
+class Writer2(DataClassDictMixin):
+    x: int
+    y: int
+
+@dataclass
+class Writer3(DataClassDictMixin):
+    x: int
+    y: int
+    z: int
+
+upup.register_updates("Writer", Writer1, Writer2, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=0))
+upup.register_updates("Writer", Writer2, Writer3, fn_update=lambda cls_start, cls_end, obj_start: cls_end(x=obj_start.x, y=obj_start.y, z=0))
+
+def test_writer_files(tmp_path):
+    with upup.VersionWriter() as writer:
+        options = upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path), writer=writer)
+        assert upup.load("Writer", {"x": 1}, options=options) == Writer3(x=1, y=0, z=0)
+        writer.flush()
+        assert sorted(os.listdir(tmp_path)) == ["Writer1.json", "Writer2.json", "Writer3.json"]
+    assert writer.no_written == 3
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_writer_jsonl(tmp_path, compress):
+    fname = str(tmp_path / ("versions.jsonl.gz" if compress else "versions.jsonl"))
+    with upup.VersionWriter(upup.WriterMode.JSONL, fname=fname, max_queue=2, compress=compress) as writer:
+        options = upup.LoadOptions(write_versions=True, tag_versions=True, writer=writer)
+        for i in range(5):
+            upup.load("Writer", {"x": i}, options=options)
+
+    with (gzip.open(fname, "rt") if compress else open(fname, "r")) as f:
+        records = [ json.loads(line) for line in f ]
+    assert len(records) == 15
+    assert records[1]["name"] == "Writer2.json"
+    assert json.loads(records[1]["data"]) == {"__upandup__": "Writer:Writer2", "x": 0, "y": 0}
+
+def test_writer_archive(tmp_path):
+    fname = str(tmp_path / "versions.zip")
+    with upup.VersionWriter(upup.WriterMode.ARCHIVE, fname=fname) as writer:
+        options = upup.LoadOptions(write_versions=True, writer=writer)
+        for i in range(2):
+            upup.load("Writer", {"x": i}, options=options)
+
+    with zipfile.ZipFile(fname) as z:
+        names = z.namelist()
+        assert names == ["00000000_Writer1.json", "00000001_Writer2.json", "00000002_Writer3.json", "00000003_Writer1.json", "00000004_Writer2.json", "00000005_Writer3.json"]
+        assert json.loads(z.read(names[4])) == {"x": 1, "y": 0}
+
+def test_writer_error(tmp_path):
+    # The directory cannot be created, since a file has its name
+    (tmp_path / "file").write_text("")
+    # The error is raised by the next write or flush after it happens
+    writer = upup.VersionWriter()
+    with pytest.raises(OSError):
+        upup.load("Writer", {"x": 1}, options=upup.LoadOptions(write_versions=True, write_versions_dir=str(tmp_path / "file"), writer=writer))
+        writer.flush()
+    writer.close()
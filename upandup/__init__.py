@@ -1,3 +1,14 @@
 from .serializer import serialize, deserialize
-from .load import load, make_load_fn, LoadOptions
-from .updater import register_updates
\ No newline at end of file
+from .load import load, load_many, make_load_fn, LoadOptions
+from .updater import register_updates, register_dict_updates, register_chain, register_shortcut, register_dict_shortcut, verify_shortcuts, register_column_updates, register_nested, enable_adaptive_order, order_profile
+from .ordering import CandidateOrder
+from .lazy import declare_lazy, declare_entry_points, declare_manifest
+from .cache import LoadCache, Eviction, CacheStats
+from .stream import load_stream, StreamError
+from .metrics import enable_metrics, disable_metrics, metrics_snapshot, MetricsRecorder, MetricEvent, LabelMetrics, LatencyStats
+from .writer import VersionWriter, WriterMode
+from .store import VersionedStore
+from .proxy import LazyProxy, materialize, is_materialized
+from .columnar import load_table
+from .parallel import load_parallel, iter_load_parallel, load_files_parallel
+from .aio import aload, make_aload_fn, aload_file, aload_many, aload_files
@@ -0,0 +1,4 @@
+from upandup.cli import main
+import sys
+
+sys.exit(main())
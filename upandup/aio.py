@@ -0,0 +1,111 @@
+from upandup.load import LoadOptions, load, make_load_fn
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from concurrent.futures import Executor
+import asyncio
+import functools
+import pathlib
+
+
+async def aload(label: str, data: Any, options: LoadOptions = LoadOptions(), executor: Optional[Executor] = None) -> object:
+    """Load data from a serialized format without blocking the event loop, automatically updating to the latest version if necessary.
+
+    Parsing, updating and writing intermediate versions run on the executor.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (Any): Serialized data.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        executor (Optional[Executor], optional): Executor to run the load on. Defaults to None, for the event loop's default executor.
+
+    Returns:
+        object: Object loaded from the serialized data.
+    """    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(load, label, data, options))
+
+
+def make_aload_fn(label: str, executor: Optional[Executor] = None) -> Callable[[Any, LoadOptions], Awaitable[object]]:
+    """Make an async function loading data for a label. See `aload`.
+
+    Args:
+        label (str): Unique label for the schema.
+        executor (Optional[Executor], optional): Executor to run the loads on. Defaults to None, for the event loop's default executor.
+
+    Returns:
+        Callable[[Any, LoadOptions], Awaitable[object]]: Async load function. Args: data, options. Returns: object loaded from the serialized data.
+    """    
+    load_fn = make_load_fn(label)
+    async def aload_fn(data: Any, options: LoadOptions = LoadOptions()) -> object:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(load_fn, data, options))
+    return aload_fn
+
+
+async def aload_file(label: str, fname: str, options: LoadOptions = LoadOptions(), executor: Optional[Executor] = None) -> object:
+    """Load a file without blocking the event loop, automatically updating to the latest version if necessary.
+
+    Args:
+        label (str): Unique label for the schema.
+        fname (str): File name.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        executor (Optional[Executor], optional): Executor to read the file and run the load on. Defaults to None, for the event loop's default executor.
+
+    Returns:
+        object: Object loaded from the file.
+    """    
+    return await aload(label, pathlib.Path(fname), options, executor=executor)
+
+
+async def aload_many(
+    label: str,
+    data: Iterable[Any],
+    options: LoadOptions = LoadOptions(),
+    executor: Optional[Executor] = None,
+    max_concurrency: int = 8
+    ) -> List[object]:
+    """Load many records concurrently without blocking the event loop. See `aload`.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (Iterable[Any]): Serialized records.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        executor (Optional[Executor], optional): Executor to run the loads on. Defaults to None, for the event loop's default executor.
+        max_concurrency (int, optional): Maximum number of loads running at a time. Defaults to 8.
+
+    Returns:
+        List[object]: Objects loaded from the records, in the same order.
+    """    
+    assert max_concurrency > 0, f"Maximum concurrency must be positive, not: {max_concurrency}"
+    semaphore = asyncio.Semaphore(max_concurrency)
+    aload_fn = make_aload_fn(label, executor=executor)
+    async def aload_bounded(d: Any) -> object:
+        async with semaphore:
+            return await aload_fn(d, options)
+    return list(await asyncio.gather(*[ aload_bounded(d) for d in data ]))
+
+
+async def aload_files(
+    label: str,
+    fnames: Iterable[str],
+    options: LoadOptions = LoadOptions(),
+    executor: Optional[Executor] = None,
+    max_concurrency: int = 8
+    ) -> List[object]:
+    """Load many files concurrently without blocking the event loop. See `aload_file`.
+
+    Args:
+        label (str): Unique label for the schema.
+        fnames (Iterable[str]): File names.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        executor (Optional[Executor], optional): Executor to read the files and run the loads on. Defaults to None, for the event loop's default executor.
+        max_concurrency (int, optional): Maximum number of files being loaded at a time. Defaults to 8.
+
+    Returns:
+        List[object]: Objects loaded from the files, in the same order.
+    """    
+    assert max_concurrency > 0, f"Maximum concurrency must be positive, not: {max_concurrency}"
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async def aload_file_bounded(fname: str) -> object:
+        async with semaphore:
+            return await aload_file(label, fname, options, executor=executor)
+    return list(await asyncio.gather(*[ aload_file_bounded(fname) for fname in fnames ]))
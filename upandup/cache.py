@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from collections import OrderedDict
+from enum import Enum
+import copy
+import hashlib
+import json
+import mmap
+import threading
+
+
+class Eviction(Enum):
+    """Eviction policies for the load cache.
+    """    
+    LRU = "lru"
+    "Evict the least recently used entry."
+
+    FIFO = "fifo"
+    "Evict the oldest entry."
+
+
+@dataclass
+class CacheStats:
+    """Statistics of a load cache.
+    """    
+
+    hits: int = 0
+    "Number of loads returned from the cache."
+
+    misses: int = 0
+    "Number of loads not found in the cache."
+
+    evictions: int = 0
+    "Number of entries evicted to stay within the bounds."
+
+    invalidations: int = 0
+    "Number of entries dropped because updates were registered for their label since they were cached."
+
+    entries: int = 0
+    "Number of entries in the cache."
+
+    size_bytes: int = 0
+    "Total size of the serialized data of the entries."
+
+
+def payload_digest(data: Any) -> Optional[Tuple[str,int]]:
+    """Digest of serialized data, used as the cache key.
+
+    Args:
+        data (Any): Serialized data.
+
+    Returns:
+        Optional[Tuple[str,int]]: Digest and size in bytes of the data, or None if the data cannot be hashed.
+    """    
+    if type(data) == str:
+        b = data.encode("utf-8")
+    elif isinstance(data, (bytes, bytearray, memoryview, mmap.mmap)):
+        # Hashed in place, without a copy
+        b = data
+    elif type(data) == dict:
+        try:
+            b = json.dumps(data, sort_keys=True).encode("utf-8")
+        except (TypeError, ValueError):
+            return None
+    else:
+        return None
+    return hashlib.blake2b(b, digest_size=16).hexdigest(), b.nbytes if isinstance(b, memoryview) else len(b)
+
+
+class LoadCache:
+    """Bounded cache of loaded objects, keyed by the label and a digest of the serialized data.
+
+    Entries remember the update plan they were loaded with, so they are invalidated when updates are registered for their label, or for the labels of their nested data.
+    """    
+
+    def __init__(self,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        eviction: Eviction = Eviction.LRU,
+        copy_on_return: bool = False
+        ):
+        """Constructor.
+
+        Args:
+            max_entries (Optional[int], optional): Maximum number of entries, or None for no limit. Defaults to 1024.
+            max_bytes (Optional[int], optional): Maximum total size of the serialized data of the entries, or None for no limit. Defaults to None.
+            eviction (Eviction, optional): Eviction policy. Defaults to Eviction.LRU.
+            copy_on_return (bool, optional): Return deep copies of cached objects, so that mutating them does not change the cache. Defaults to False.
+        """        
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.copy_on_return = copy_on_return
+        self._entries: OrderedDict[Tuple[str,str],Tuple[object,object,int]] = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+
+    @property
+    def stats(self) -> CacheStats:
+        """Snapshot of the statistics of the cache.
+
+        Returns:
+            CacheStats: Statistics.
+        """        
+        with self._lock:
+            return copy.copy(self._stats)
+
+
+    @property
+    def hits(self) -> int:
+        """Number of loads returned from the cache.
+
+        Returns:
+            int: Number of hits.
+        """        
+        return self._stats.hits
+
+
+    @property
+    def misses(self) -> int:
+        """Number of loads not found in the cache.
+
+        Returns:
+            int: Number of misses.
+        """        
+        return self._stats.misses
+
+
+    def clear(self):
+        """Remove all entries. The hit and miss counters are kept.
+        """        
+        with self._lock:
+            self._entries.clear()
+            self._stats.entries = 0
+            self._stats.size_bytes = 0
+
+
+    def _out(self, obj: object) -> object:
+        """Object to return to the caller.
+
+        Args:
+            obj (object): Cached object.
+
+        Returns:
+            object: The object, or a copy of it if copy_on_return is set.
+        """        
+        return copy.deepcopy(obj) if self.copy_on_return else obj
+
+
+    def get(self, key: Tuple[str,str], plan: object) -> Optional[object]:
+        """Look up an entry.
+
+        Args:
+            key (Tuple[str,str]): Label and digest of the serialized data.
+            plan (object): Current update plan for the label, or a tuple of plans, e.g. with the plans of its nested labels. Entries cached with other plans are invalidated.
+
+        Returns:
+            Optional[object]: Cached object, or None on a miss.
+        """        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not _same_plan(entry[1], plan):
+                self._remove(key)
+                self._stats.invalidations += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            if self.eviction == Eviction.LRU:
+                self._entries.move_to_end(key)
+        return self._out(entry[0])
+
+
+    def put(self, key: Tuple[str,str], plan: object, obj: object, size_bytes: int) -> object:
+        """Add an entry, evicting entries as needed to stay within the bounds.
+
+        Args:
+            key (Tuple[str,str]): Label and digest of the serialized data.
+            plan (object): Update plan the object was loaded with, or a tuple of plans.
+            obj (object): Loaded object.
+            size_bytes (int): Size of the serialized data.
+
+        Returns:
+            object: Object to return to the caller.
+        """        
+        if self.max_bytes is not None and size_bytes > self.max_bytes:
+            return obj
+        cached = copy.deepcopy(obj) if self.copy_on_return else obj
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (cached, plan, size_bytes)
+            self._stats.entries += 1
+            self._stats.size_bytes += size_bytes
+            while (self.max_entries is not None and self._stats.entries > self.max_entries) or (self.max_bytes is not None and self._stats.size_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats.evictions += 1
+        return obj
+
+
+    def _remove(self, key: Tuple[str,str]):
+        """Remove an entry. The lock must be held.
+
+        Args:
+            key (Tuple[str,str]): Key of the entry.
+        """        
+        _, _, size_bytes = self._entries.pop(key)
+        self._stats.entries -= 1
+        self._stats.size_bytes -= size_bytes
+
+
+def _same_plan(plan1: object, plan2: object) -> bool:
+    """Whether two update plans, or tuples of plans, are the same. Plans are compared by identity, since a new plan is compiled whenever updates are registered.
+
+    Args:
+        plan1 (object): Update plan, or tuple of plans.
+        plan2 (object): Update plan, or tuple of plans.
+
+    Returns:
+        bool: True if the plans are the same.
+    """    
+    if plan1 is plan2:
+        return True
+    return type(plan1) == tuple and type(plan2) == tuple and len(plan1) == len(plan2) and all(p1 is p2 for p1, p2 in zip(plan1, plan2))
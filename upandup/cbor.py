@@ -0,0 +1,59 @@
+from mashumaro import DataClassDictMixin
+from typing import Any, Callable
+
+
+def default_encoder(data: Any) -> bytes:
+    """Encode a Python structure to CBOR with `cbor2`, which is imported on first use.
+
+    Args:
+        data (Any): Python structure.
+
+    Returns:
+        bytes: CBOR data.
+    """    
+    import cbor2
+    return cbor2.dumps(data)
+
+
+def default_decoder(data: Any) -> Any:
+    """Decode CBOR data to a Python structure with `cbor2`, which is imported on first use.
+
+    Args:
+        data (Any): CBOR data.
+
+    Returns:
+        Any: Python structure.
+    """    
+    import cbor2
+    return cbor2.loads(data)
+
+
+class DataClassCBORMixin(DataClassDictMixin):
+    """Mixin adding CBOR serialization to dataclasses, in the style of the `mashumaro` mixins. Requires `cbor2`.
+    """    
+    __slots__ = ()
+
+    def to_cbor(self, encoder: Callable[[Any], bytes] = default_encoder, **to_dict_kwargs: Any) -> bytes:
+        """Serialize to CBOR.
+
+        Args:
+            encoder (Callable[[Any], bytes], optional): Encoder from a Python structure to CBOR. Defaults to default_encoder.
+
+        Returns:
+            bytes: CBOR data.
+        """        
+        return encoder(self.to_dict(**to_dict_kwargs))
+
+
+    @classmethod
+    def from_cbor(cls, data: Any, decoder: Callable[[Any], Any] = default_decoder, **from_dict_kwargs: Any):
+        """Deserialize from CBOR.
+
+        Args:
+            data (Any): CBOR data.
+            decoder (Callable[[Any], Any], optional): Decoder from CBOR to a Python structure. Defaults to default_decoder.
+
+        Returns:
+            Deserialized object.
+        """        
+        return cls.from_dict(decoder(data), **from_dict_kwargs)
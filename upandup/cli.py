@@ -0,0 +1,218 @@
+from upandup.load import LoadOptions, load
+from upandup.serializer import Serializer, check_serializer, file_ext, serializer_for_ext, parse_str, serialize_to_bytes, write_atomic, BINARY_SERIALIZERS
+from upandup.updater import get_updater
+from upandup.parallel import chunks, init_worker, map_ordered
+from typing import Any, Deque, Iterator, List, Optional, Set, Tuple
+from loguru import logger
+from collections import deque
+import argparse
+import os
+import pathlib
+import sys
+
+
+CHECKPOINT_FNAME = ".upandup_checkpoint"
+"Default file name of the checkpoint manifest, in the output directory."
+
+
+def _migrate_file(label: str, fname_src: str, fname_dst_wo_ext: str, options: LoadOptions) -> str:
+    """Migrate one file to the latest version.
+
+    Args:
+        label (str): Unique label for the schema.
+        fname_src (str): File to migrate.
+        fname_dst_wo_ext (str): File to write the latest version to, without the extension. The extension is that of the latest version's format.
+        options (LoadOptions): Options. If `tag_versions` is set, the written file is tagged.
+
+    Returns:
+        str: File name written.
+    """    
+    plan = get_updater(label).plan
+    assert plan.latest is not None, f"No updates registered for label: {label}"
+    data: Any = pathlib.Path(fname_src)
+    if check_serializer(plan.latest) == Serializer.DICT:
+        # Classes deserialized from dictionaries need the file parsed first
+        serializer = serializer_for_ext(os.path.splitext(fname_src)[1])
+        assert serializer is not None, f"Unknown file extension: {fname_src}"
+        with open(fname_src, "rb") as f:
+            data_bytes = f.read()
+        data = parse_str(data_bytes if serializer in BINARY_SERIALIZERS else data_bytes.decode("utf-8"), serializer)
+
+    obj = load(label, data, options)
+    fname_dst = f"{fname_dst_wo_ext}.{file_ext(check_serializer(type(obj)))}"
+    write_atomic(fname_dst, serialize_to_bytes(obj, label=label if options.tag_versions else None))
+    if fname_dst_wo_ext == os.path.splitext(fname_src)[0] and fname_dst != fname_src:
+        # Migrated in place to a different format
+        os.remove(fname_src)
+    return fname_dst
+
+
+def _migrate_chunk(label: str, items: List[Tuple[str,str]], options: LoadOptions) -> List[Optional[str]]:
+    """Migrate a chunk of files, possibly in a worker process.
+
+    Args:
+        label (str): Unique label for the schema.
+        items (List[Tuple[str,str]]): File to migrate and file to write to without the extension, for each file.
+        options (LoadOptions): Options.
+
+    Returns:
+        List[Optional[str]]: Error message for each file, or None if it was migrated.
+    """    
+    errors = []
+    for fname_src, fname_dst_wo_ext in items:
+        try:
+            _migrate_file(label, fname_src, fname_dst_wo_ext, options)
+            errors.append(None)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    return errors
+
+
+def find_files(root: str, exclude_dir: Optional[str] = None) -> Iterator[str]:
+    """Walk a directory tree for files in the known serializer formats, in a deterministic order.
+
+    Args:
+        root (str): Root directory.
+        exclude_dir (Optional[str], optional): Directory not to descend into, e.g. the output directory. Defaults to None.
+
+    Yields:
+        Iterator[str]: Paths of the files relative to the root.
+    """    
+    exclude_dir = os.path.abspath(exclude_dir) if exclude_dir is not None else None
+    for dir_name, dir_names, fnames in os.walk(root):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith(".") and os.path.abspath(os.path.join(dir_name, d)) != exclude_dir)
+        for fname in sorted(fnames):
+            if fname.startswith(".") or serializer_for_ext(os.path.splitext(fname)[1]) is None:
+                continue
+            yield os.path.relpath(os.path.join(dir_name, fname), root)
+
+
+def read_checkpoint(fname: str) -> Set[str]:
+    """Read the files completed by previous runs from a checkpoint manifest.
+
+    Args:
+        fname (str): Checkpoint manifest.
+
+    Returns:
+        Set[str]: Paths of the completed files relative to the root. Empty if the manifest does not exist.
+    """    
+    if not os.path.exists(fname):
+        return set()
+    with open(fname, "r") as f:
+        return set(line.rstrip("\n") for line in f if line.strip())
+
+
+def migrate_tree(
+    label: str,
+    root: str,
+    out_dir: Optional[str] = None,
+    registration_module: Optional[str] = None,
+    options: LoadOptions = LoadOptions(),
+    max_workers: int = 1,
+    chunk_size: int = 64,
+    checkpoint: Optional[str] = None
+    ) -> Tuple[int,int,int]:
+    """Migrate a directory tree of files in the known serializer formats to the latest version. Files are written atomically, either in place or to the same relative path in a mirror directory.
+
+    Args:
+        label (str): Unique label for the schema.
+        root (str): Root directory.
+        out_dir (Optional[str], optional): Mirror directory to write to. Defaults to None, to migrate in place.
+        registration_module (Optional[str], optional): Name of the module that registers the updates, imported by the worker processes. Defaults to None.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        max_workers (int, optional): Number of worker processes, or 1 to migrate in this process. Defaults to 1.
+        chunk_size (int, optional): Number of files sent to a worker at a time. Defaults to 64.
+        checkpoint (Optional[str], optional): Checkpoint manifest. Completed files are appended to it, and files listed in it are skipped, so that an interrupted run resumes where it stopped. Defaults to None, for no checkpoint.
+
+    Returns:
+        Tuple[int,int,int]: Number of files migrated, skipped and failed.
+    """    
+    assert max_workers > 0, f"Number of workers must be positive, not: {max_workers}"
+    assert chunk_size > 0, f"Chunk size must be positive, not: {chunk_size}"
+    done = read_checkpoint(checkpoint) if checkpoint is not None else set()
+
+    no_skipped = 0
+    rel_paths: Deque[str] = deque()
+    def items() -> Iterator[Tuple[str,str]]:
+        nonlocal no_skipped
+        for rel_path in find_files(root, exclude_dir=out_dir):
+            if rel_path in done:
+                no_skipped += 1
+                continue
+            rel_paths.append(rel_path)
+            yield os.path.join(root, rel_path), os.path.splitext(os.path.join(out_dir or root, rel_path))[0]
+
+    if max_workers == 1:
+        errors = (error for chunk in chunks(items(), chunk_size) for error in _migrate_chunk(label, chunk, options))
+    else:
+        errors = map_ordered(_migrate_chunk, label, items(), options, registration_module, max_workers, chunk_size, None) # type: ignore
+
+    no_migrated, no_failed = 0, 0
+    f_checkpoint = open(checkpoint, "a") if checkpoint is not None else None
+    try:
+        for error in errors:
+            rel_path = rel_paths.popleft()
+            if error is None:
+                no_migrated += 1
+                if f_checkpoint is not None:
+                    f_checkpoint.write(rel_path + "\n")
+                    if no_migrated % chunk_size == 0:
+                        f_checkpoint.flush()
+            else:
+                no_failed += 1
+                logger.error(f"Failed to migrate {rel_path}: {error}")
+    finally:
+        if f_checkpoint is not None:
+            f_checkpoint.close()
+
+    return no_migrated, no_skipped, no_failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point.
+
+    Args:
+        argv (Optional[List[str]], optional): Arguments. Defaults to None, for sys.argv.
+
+    Returns:
+        int: Exit code: 0 if all files were migrated, 1 otherwise.
+    """    
+    parser = argparse.ArgumentParser(prog="upandup", description="Schema versioning for Python dataclasses.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("migrate", help="Migrate a directory tree of JSON, YAML and TOML files to the latest version.")
+    p.add_argument("root", help="Root directory of the files to migrate.")
+    p.add_argument("-m", "--module", required=True, help="Module that registers the updates, e.g. mypackage.register_updates.")
+    p.add_argument("-l", "--label", required=True, help="Label of the schema.")
+    p.add_argument("-o", "--out-dir", default=None, help="Mirror directory to write the migrated files to. Defaults to migrating in place.")
+    p.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes. Defaults to 1.")
+    p.add_argument("--chunk-size", type=int, default=64, help="Number of files sent to a worker at a time. Defaults to 64.")
+    p.add_argument("--checkpoint", default=None, help=f"Checkpoint manifest of completed files, used to resume interrupted runs. Defaults to {CHECKPOINT_FNAME} in the output directory.")
+    p.add_argument("--no-checkpoint", action="store_true", help="Do not keep a checkpoint manifest.")
+    p.add_argument("--tag", action="store_true", help="Tag the migrated files with the label and version.")
+
+    args = parser.parse_args(argv)
+
+    # Modules in the working directory can be registration modules, as with `python -m`
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    init_worker(args.module)
+
+    checkpoint = None
+    if not args.no_checkpoint:
+        checkpoint = args.checkpoint or os.path.join(args.out_dir or args.root, CHECKPOINT_FNAME)
+        if args.out_dir is not None:
+            os.makedirs(args.out_dir, exist_ok=True)
+
+    no_migrated, no_skipped, no_failed = migrate_tree(
+        label=args.label,
+        root=args.root,
+        out_dir=args.out_dir,
+        registration_module=args.module,
+        options=LoadOptions(tag_versions=args.tag),
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint=checkpoint
+        )
+    logger.info(f"Migrated {no_migrated} files, skipped {no_skipped} already migrated, {no_failed} failed")
+    return 0 if no_failed == 0 else 1
@@ -0,0 +1,226 @@
+from upandup.updater import UpdateInfo, UpdatePlan, get_updater, step_name
+from upandup.metrics import MetricEvent
+from upandup import metrics
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+from types import NoneType, UnionType
+import dataclasses
+import time
+
+
+def load_table(label: str, table: Any, version_column: Optional[str] = None) -> Any:
+    """Load a table of serialized records, one column per key, updating each row to the latest version with vectorized operations. Requires `pandas`.
+
+    Rows are grouped by version, and each group is updated through the update steps at once: steps with a function registered with `register_column_updates` update whole columns, and other steps update the rows of the group one by one. Missing values stand for keys missing from the records: they are left out of the records passed to the update functions, so fields take their defaults. The columns of the result are cast back to the types of the fields of the latest class.
+
+    Args:
+        label (str): Unique label for the schema.
+        table (Any): Table: a pandas DataFrame, a pyarrow Table, or a NumPy structured array.
+        version_column (Optional[str], optional): Column holding the version name of each row, i.e. its class name (see `UpdatePlan.version_names`). It is set to the latest class in the result. Defaults to None, to detect the version of each row from the columns it has values in, using the signatures of the classes.
+
+    Returns:
+        Any: Table of the same type, with the rows updated to the latest version in the same order.
+    """    
+    import pandas as pd
+    df, restore = _to_frame(table)
+    plan = get_updater(label).plan
+    assert plan.latest is not None, f"No updates registered for label: {label}"
+
+    if len(df) == 0:
+        return table
+
+    index = df.index
+    df = df.reset_index(drop=True)
+    parts = []
+    for cls, rows in _rows_by_version(plan, df, version_column).items():
+        part = df.loc[rows]
+        part = part[_columns_for_cls(plan, cls, part, version_column)]
+        idx = plan.step_index.get(cls)
+        for info in plan.updates[idx:] if idx is not None else ():
+            part = _update_columns(info, part)
+        parts.append(part)
+
+    result = pd.concat(parts).sort_index() if len(parts) != 1 else parts[0]
+    if version_column is not None:
+        result[version_column] = plan.version_names[plan.latest]
+    result = _cast_columns(plan.latest, result[_ordered_columns(plan.latest, result.columns, version_column)])
+    result.index = index
+    return restore(result)
+
+
+def _to_frame(table: Any) -> Tuple[Any,Callable[[Any],Any]]:
+    """Convert a table to a pandas DataFrame.
+
+    Args:
+        table (Any): pandas DataFrame, pyarrow Table, or NumPy structured array.
+
+    Returns:
+        Tuple[Any,Callable[[Any],Any]]: DataFrame, and function converting a DataFrame back to the type of the table.
+    """    
+    import pandas as pd
+    if isinstance(table, pd.DataFrame):
+        return table, lambda df: df
+    elif type(table).__module__.startswith("pyarrow"):
+        import pyarrow as pa
+        return table.to_pandas(), lambda df: pa.Table.from_pandas(df, preserve_index=False)
+    elif getattr(getattr(table, "dtype", None), "names", None):
+        return pd.DataFrame(table), lambda df: df.to_records(index=False)
+    raise ValueError(f"Unknown table type: {type(table)}")
+
+
+def _rows_by_version(plan: UpdatePlan, df: Any, version_column: Optional[str]) -> Dict[type,Any]:
+    """Rows of a table grouped by the class of their version.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        df (Any): DataFrame with a range index.
+        version_column (Optional[str]): Column holding the class name of each row, if any.
+
+    Returns:
+        Dict[type,Any]: Positions of the rows of each class.
+    """    
+    import numpy as np
+    if version_column is not None:
+        groups = {}
+        for cls_name, rows in df.groupby(version_column, sort=False).indices.items():
+            cls = plan.cls_by_name.get(cls_name)
+            assert cls is not None, f"Class {cls_name} is not registered for label: {plan.label}"
+            groups[cls] = rows
+        assert sum(len(rows) for rows in groups.values()) == len(df), f"Version column: {version_column} has missing values"
+        return groups
+
+    # Rows with the same columns with values have the same version
+    columns = list(df.columns)
+    patterns, inverse = np.unique(df.notna().to_numpy(), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    groups_rows: Dict[type,List[Any]] = {}
+    for i, pattern in enumerate(patterns):
+        keys = frozenset(c for c, has_value in zip(columns, pattern) if has_value)
+        cls = _cls_for_keys(plan, keys)
+        groups_rows.setdefault(cls, []).append(np.nonzero(inverse == i)[0])
+    return { cls: np.sort(np.concatenate(rows)) for cls, rows in groups_rows.items() }
+
+
+def _cls_for_keys(plan: UpdatePlan, keys: frozenset) -> type:
+    """Most recent class whose signature matches a set of keys.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        keys (frozenset): Keys with values.
+
+    Returns:
+        type: Class.
+    """    
+    for cls in plan.cls_newest_first:
+        sig = plan.signatures[cls]
+        if sig is not None and sig.required_keys <= keys <= sig.keys:
+            return cls
+    raise AssertionError(f"Could not detect the version of rows with columns: {sorted(keys)} for label: {plan.label} - pass a version column")
+
+
+def _columns_for_cls(plan: UpdatePlan, cls: type, df: Any, version_column: Optional[str]) -> List[str]:
+    """Columns of the rows of a class holding its keys, i.e. with values in any of the rows.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        cls (type): Class.
+        df (Any): DataFrame of the rows of the class.
+        version_column (Optional[str]): Column holding the class name of each row, if any.
+
+    Returns:
+        List[str]: Columns. All columns with values except the version column if the keys of the class are not known.
+    """    
+    sig = plan.signatures[cls]
+    has_values = df.notna().any()
+    return [ c for c in df.columns if c != version_column and (sig is None or c in sig.keys) and has_values[c] ]
+
+
+def _update_columns(info: UpdateInfo, df: Any) -> Any:
+    """Apply an update step to a DataFrame of serialized records of its start class.
+
+    Args:
+        info (UpdateInfo): Update step.
+        df (Any): DataFrame.
+
+    Returns:
+        Any: DataFrame of serialized records of the end class, with the same index.
+    """    
+    import pandas as pd
+    recorder = metrics.recorder
+    t_start = time.perf_counter() if recorder is not None else 0.0
+    if info.fn_update_columns is not None:
+        df_end = info.fn_update_columns(df)
+        assert len(df_end) == len(df), f"Column updates of {step_name(info.label, info.cls_start, info.cls_end)} changed the number of rows: {len(df)} -> {len(df_end)}"
+        df_end.index = df.index
+    else:
+        records = [ { k: v for k, v in d.items() if not _is_null(v) } for d in df.to_dict("records") ]
+        if info.fn_update_dict is not None:
+            records = [ info.fn_update_dict(d) for d in records ]
+        else:
+            records = [ info.fn_update(info.cls_start, info.cls_end, info.cls_start.from_dict(d)).to_dict() for d in records ] # type: ignore
+        df_end = pd.DataFrame.from_records(records, index=df.index, columns=list(records[0]) if len(records) else None)
+    if recorder is not None and len(df) > 0:
+        recorder.record(MetricEvent("step", info.label, time.perf_counter() - t_start, name=step_name(info.label, info.cls_start, info.cls_end), count=len(df)))
+    return df_end
+
+
+def _is_null(value: Any) -> bool:
+    """Whether a value of a table is missing, e.g. None or NaN.
+
+    Args:
+        value (Any): Value.
+
+    Returns:
+        bool: True for missing scalar values. False for lists and other containers.
+    """    
+    import pandas as pd
+    return pd.api.types.is_scalar(value) and bool(pd.isna(value))
+
+
+def _cast_columns(cls: type, df: Any) -> Any:
+    """Cast the columns of a table back to the types of the fields of a class. Missing values make pandas store integer and boolean columns as floats or objects: these are cast to `int64` and `bool`, or to the nullable `Int64` and `boolean` if values are missing. Missing values of other non-float columns are set to None.
+
+    Args:
+        cls (type): Latest class.
+        df (Any): DataFrame.
+
+    Returns:
+        Any: DataFrame with the columns cast.
+    """    
+    if not dataclasses.is_dataclass(cls):
+        return df
+    hints = get_type_hints(cls)
+    df = df.copy()
+    for f in dataclasses.fields(cls):
+        if f.name not in df.columns:
+            continue
+        tp = hints[f.name]
+        origin = get_origin(tp) or tp
+        if origin is Union or origin is UnionType:
+            args = [ arg for arg in get_args(tp) if arg is not NoneType ]
+            tp = args[0] if len(args) == 1 else tp
+        col = df[f.name]
+        has_nulls = bool(col.isna().any())
+        if tp is bool:
+            df[f.name] = col.astype("boolean" if has_nulls else bool)
+        elif tp is int:
+            df[f.name] = col.astype("Int64" if has_nulls else "int64")
+        elif has_nulls and tp is not float:
+            df[f.name] = col.astype(object).where(col.notna(), None)
+    return df
+
+
+def _ordered_columns(cls: type, columns: Any, version_column: Optional[str]) -> List[str]:
+    """Columns in the order of the fields of a class, followed by the other columns and the version column.
+
+    Args:
+        cls (type): Latest class.
+        columns (Any): Columns of the table.
+        version_column (Optional[str]): Column holding the class name of each row, if any.
+
+    Returns:
+        List[str]: Ordered columns.
+    """    
+    names = [ f.name for f in dataclasses.fields(cls) ] if dataclasses.is_dataclass(cls) else []
+    first = [ c for c in names if c in columns ]
+    rest = [ c for c in columns if c not in first and c != version_column ]
+    return first + rest + ([ version_column ] if version_column is not None else [])
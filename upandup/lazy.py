@@ -0,0 +1,107 @@
+from typing import Callable, Dict, Optional, Set
+from loguru import logger
+import importlib
+import importlib.metadata
+import json
+import os
+import threading
+
+
+ENTRY_POINT_GROUP = "upandup.schemas"
+"Entry point group declaring lazily registered labels. The name of each entry point is the label, and the value is the target that registers it."
+
+lazy_registrations: Dict[str,str] = {}
+"Targets registering the labels declared lazily and not yet loaded, by label."
+
+resolving: Set[str] = set()
+"Labels whose targets are being imported. Their updates are registered privately, and published once the import finishes."
+
+_lock = threading.RLock()
+
+
+def declare_lazy(label: str, target: str):
+    """Declare a label whose updates are registered on its first use, e.g. the first `load`, instead of at startup.
+
+    Args:
+        label (str): Unique label for the schema.
+        target (str): Module that registers the updates when imported, e.g. "mypackage.register_updates", or a function to call after importing its module, e.g. "mypackage.schemas:register".
+    """    
+    with _lock:
+        lazy_registrations[label] = target
+
+
+def declare_entry_points(group: str = ENTRY_POINT_GROUP) -> int:
+    """Declare the labels of the installed entry points of a group. See `declare_lazy`.
+
+    A package declares its labels in its metadata, e.g. in pyproject.toml:
+
+        [project.entry-points."upandup.schemas"]
+        DataSchema = "mypackage.register_updates"
+
+    Args:
+        group (str, optional): Entry point group. Defaults to ENTRY_POINT_GROUP.
+
+    Returns:
+        int: Number of labels declared.
+    """    
+    eps = importlib.metadata.entry_points(group=group)
+    for ep in eps:
+        declare_lazy(ep.name, ep.value)
+    return len(eps)
+
+
+def declare_manifest(fname: str) -> int:
+    """Declare the labels in a manifest file. See `declare_lazy`.
+
+    The manifest is a JSON or TOML file mapping labels to targets, e.g. {"DataSchema": "mypackage.register_updates"}.
+
+    Args:
+        fname (str): Manifest file, with extension .json or .toml.
+
+    Returns:
+        int: Number of labels declared.
+    """    
+    ext = os.path.splitext(fname)[1].lower()
+    if ext == ".toml":
+        import tomllib
+        with open(fname, "rb") as f:
+            manifest = tomllib.load(f)
+    else:
+        assert ext == ".json", f"Manifest must be a .json or .toml file, not: {fname}"
+        with open(fname, "r") as f:
+            manifest = json.load(f)
+
+    for label, target in manifest.items():
+        assert type(target) == str, f"Target for label: {label} must be a string, not: {target}"
+        declare_lazy(label, target)
+    return len(manifest)
+
+
+def resolve_lazy(label: str, publish: Callable[[str], bool]) -> bool:
+    """Register the updates of a lazily declared label, by importing its target. Threads resolving the same label wait until the first one finishes, so none sees a partly registered chain.
+
+    Args:
+        label (str): Unique label for the schema.
+        publish (Callable[[str], bool]): Function publishing the updates registered privately while importing the target. Args: label. Returns: whether the label has a registered updater.
+
+    Returns:
+        bool: True if the label was declared lazily and its target was imported, False if it was not declared, was resolved by another thread, or is being resolved by this thread.
+    """    
+    with _lock:
+        target: Optional[str] = lazy_registrations.get(label)
+        if target is None or label in resolving:
+            return False
+
+        logger.debug("Registering lazily declared label: {} from {}", label, target)
+        module_name, _, fn_name = target.partition(":")
+        resolving.add(label)
+        try:
+            module = importlib.import_module(module_name)
+            if fn_name:
+                getattr(module, fn_name)()
+            registered = publish(label)
+        finally:
+            resolving.discard(label)
+        assert registered, f"Target: {target} registered no updates for lazily declared label: {label} - was the module imported before the label was declared?"
+        del lazy_registrations[label]
+        return True
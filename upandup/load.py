@@ -1,9 +1,19 @@
-from upandup.serializer import deserialize
-from upandup.updater import Updater, updaters
-from typing import Callable, List, Optional, Any, Dict
+from upandup.serializer import Serializer, ParseOnce, TAG_KEY, check_serializer, deserialize_obj, read_tag, parse_tag, strip_tag, is_input_source, open_input, serialize_to_bytes, write_atomic
+from upandup.cache import LoadCache, payload_digest
+from upandup.updater import Updater, UpdatePlan, updaters, get_updater
+from upandup.lazy import lazy_registrations
+from upandup.metrics import MetricEvent, MetricsRecorder
+from upandup.proxy import LazyProxy, proxy_class
+from upandup.ordering import CandidateOrder
+from upandup import metrics
+from typing import Callable, List, Optional, Any, Dict, Iterable, Tuple
 from loguru import logger
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from mashumaro import DataClassDictMixin
+import os
+import json
+import functools
+import time
 
 
 @dataclass
@@ -20,6 +30,61 @@ class LoadOptions(DataClassDictMixin):
     write_version_prefix: str = ""
     """Prefix for the intermediate versions of the data."""
 
+    tag_versions: bool = False
+    """Embed the schema label and version tag in the intermediate versions of the data."""
+
+    cache: Any = None
+    """Optional `LoadCache` of loaded objects. Not used if write_versions is True, since cached loads do not write versions."""
+
+    writer: Any = None
+    """Optional `VersionWriter` that queues the intermediate versions and writes them on a background thread, instead of writing them synchronously."""
+
+    lazy: bool = False
+    """Return lazy proxies with the interface of the latest class, which load the data when first used, e.g. when a field is read. See `LazyProxy`. The data must stay unchanged until then, and file objects open."""
+
+    write_back: bool = False
+    """For data loaded from paths, write the latest version back to the file if the data was older, so later loads need no updates. The file is replaced atomically, in the format of the latest class, and tagged if tag_versions is True. The cache is not used for these loads."""
+
+
+def _updater_options(options: LoadOptions) -> Updater.Options:
+    """Convert load options to updater options.
+
+    Args:
+        options (LoadOptions): Options.
+
+    Returns:
+        Updater.Options: Updater options.
+    """    
+    # The updater only needs the options for writing versions
+    if not options.write_versions:
+        return _DEFAULT_UPDATER_OPTIONS
+    return Updater.Options.from_dict(options.to_dict())
+
+_DEFAULT_UPDATER_OPTIONS = Updater.Options()
+
+
+def _update_to_latest(updater: Updater, obj: object, options: LoadOptions, plan: Optional[UpdatePlan] = None) -> object:
+    """Update an object to the latest version with a given updater.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        obj (object): Object to update.
+        options (LoadOptions): Options.
+        plan (Optional[UpdatePlan], optional): Plan to update with. Defaults to None, for the current plan.
+
+    Returns:
+        object: Object updated to the latest version.
+    """    
+    plan = plan or updater.plan
+
+    # Check if last class is the most recent
+    if type(obj) != plan.latest:
+
+        # Update
+        obj = updater.update(obj, options=_updater_options(options), plan=plan)
+    
+    return obj
+
 
 def update_to_latest(label: str, obj: object, options: LoadOptions = LoadOptions()) -> object:
     """Update an object to the latest version.
@@ -32,60 +97,781 @@ def update_to_latest(label: str, obj: object, options: LoadOptions = LoadOptions
     Returns:
         object: Object updated to the latest version.
     """    
+    return _update_to_latest(get_updater(label), obj, options)
+
+
+def _tagged_cls(plan: UpdatePlan, data: Any) -> Optional[type]:
+    """Class of the version that data is tagged with, if any.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        data (Any): Serialized data.
+
+    Returns:
+        Optional[type]: Tagged class, or None if the data is not tagged or the tagged class is not registered.
+    """    
+    tag = read_tag(data)
+    if tag is None:
+        return None
+    tag_label, tag_cls_name = parse_tag(tag)
+    assert tag_label == plan.label, f"Data is tagged with label: {tag_label}, not: {plan.label}"
+    cls = plan.cls_by_name.get(tag_cls_name)
+    if cls is None:
+        clash = [ plan.version_names[c] for c in plan.cls_list if c.__name__ == tag_cls_name ]
+        if len(clash) > 1:
+            logger.warning(f"Tagged class {tag_cls_name} is ambiguous for label: {plan.label}, between: {clash} - trying all classes")
+        else:
+            logger.warning(f"Tagged class {tag_cls_name} is not registered for label: {plan.label} - trying all classes")
+    return cls
+
+
+def _candidates(plan: UpdatePlan, parse_once: ParseOnce) -> Tuple[type, ...]:
+    """Classes to try to deserialize data with, in order. Classes whose signature matches the keys of the data come first, most recent first, followed by the other classes, most recent first. If the keys of the data are not known, all classes are tried most recent first.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        parse_once (ParseOnce): Data to deserialize.
+
+    Returns:
+        Tuple[type, ...]: Classes to try, in order.
+    """    
+    try:
+        payload = parse_once.as_dict(plan.cls_newest_first[0])
+    except Exception:
+        payload = None
+    if payload is None:
+        return plan.cls_newest_first
+    return _payload_candidates(plan, payload)
+
+
+def _payload_candidates(plan: UpdatePlan, payload: dict) -> Tuple[type, ...]:
+    """Classes to try to deserialize a serialized dictionary with, in order. See `_candidates`.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        payload (dict): Serialized dictionary, without the tag.
+
+    Returns:
+        Tuple[type, ...]: Classes to try, in order.
+    """    
+
+    # Candidates depend only on the keys, and on the types of the values if some signature checks their kinds
+    memo = plan.candidates_by_keys
+    keys = frozenset(payload) if not plan.signatures_check_values else frozenset(zip(payload, map(type, payload.values())))
+    if (candidates := memo.get(keys)) is not None:
+        return candidates
+
+    signatures = plan.signatures
+    matching = tuple( cls for cls in plan.cls_newest_first if (sig := signatures[cls]) is None or sig.matches(payload) )
+    candidates = matching + tuple( cls for cls in plan.cls_newest_first if cls not in matching )
+    if len(memo) < _MAX_CANDIDATES_MEMO:
+        memo[keys] = candidates
+    return candidates
+
+_MAX_CANDIDATES_MEMO = 1024
+
+
+def _deserialize_parsed(plan: UpdatePlan, parse_once: ParseOnce, tagged_cls: Optional[type]) -> object:
+    """Deserialize data with the class of the version it was written with.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        parse_once (ParseOnce): Data to deserialize.
+        tagged_cls (Optional[type]): Class the data is tagged with, if any.
+
+    Returns:
+        object: Deserialized object.
+    """    
+
+    recorder = metrics.recorder
+    if recorder is None:
+        return _try_deserialize(plan, parse_once, tagged_cls, None)
+
+    t_start = time.perf_counter()
+    obj = _try_deserialize(plan, parse_once, tagged_cls, recorder)
+    recorder.record(MetricEvent("deserialize", plan.label, time.perf_counter() - t_start))
+    return obj
+
+
+def _try_deserialize(plan: UpdatePlan, parse_once: ParseOnce, tagged_cls: Optional[type], recorder: Optional[MetricsRecorder]) -> object:
+    """Deserialize data with the class of the version it was written with, trying the candidate classes in order.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        parse_once (ParseOnce): Data to deserialize.
+        tagged_cls (Optional[type]): Class the data is tagged with, if any.
+        recorder (Optional[MetricsRecorder]): Recorder of failed trials, if metrics are enabled.
+
+    Returns:
+        object: Deserialized object.
+    """    
+
+    # Dispatch directly to the tagged version, if any
+    if tagged_cls is not None:
+        return parse_once.deserialize(tagged_cls)
 
-    # Convert to options
-    options_updater = Updater.Options.from_dict(options.to_dict())
+    # Try to deserialize, using classes matching the signature of the data first, and then most recent class first
+    candidates = _candidates(plan, parse_once)
+    if plan.candidate_order is not None and len(candidates) > 1:
+        return _try_deserialize_adaptive(plan, parse_once, candidates, plan.candidate_order, recorder)
+    for cls in candidates:
+        try:
+            return parse_once.deserialize(cls)
+        except Exception:
+            if recorder is not None:
+                recorder.record(MetricEvent("failed_trial", plan.label, name=plan.version_names[cls]))
+            continue
     
-    # Try to load classes in reverse order
-    assert label in updaters, f"No updates registered for label: {label}"
-    updater = updaters[label]
+    # If no class worked, raise error
+    raise AssertionError(f"Could not deserialize data <{parse_once.data}> with any class in {list(plan.cls_list)}")
 
-    # Check if last class is the most recent
-    if type(obj) != updater.cls_list[-1]:
 
-        # Update
-        obj = updater.update(obj, options=options_updater)
+def _try_deserialize_adaptive(plan: UpdatePlan, parse_once: ParseOnce, candidates: Tuple[type, ...], order: CandidateOrder, recorder: Optional[MetricsRecorder]) -> object:
+    """Deserialize data trying the most frequent classes first, with the same result as trying the candidates in order.
+
+    When a class succeeds, the candidates before it could also deserialize the data, and the first of them that does is used instead. Candidates whose signature excludes the data are skipped without trying them, so in the common case only the most frequent class is tried.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        parse_once (ParseOnce): Data to deserialize.
+        candidates (Tuple[type, ...]): Classes to try, in the default order.
+        order (CandidateOrder): Observed frequencies of the classes.
+        recorder (Optional[MetricsRecorder]): Recorder of failed trials, if metrics are enabled.
+
+    Returns:
+        object: Deserialized object.
+    """    
+    try:
+        payload = parse_once.as_dict(plan.cls_newest_first[0])
+    except Exception:
+        payload = None
+
+    failed = set()
+    def try_cls(cls: type) -> Any:
+        try:
+            return parse_once.deserialize(cls)
+        except Exception:
+            failed.add(cls)
+            if recorder is not None:
+                recorder.record(MetricEvent("failed_trial", plan.label, name=plan.version_names[cls]))
+            return _FAILED
+
+    for cls in order.order(candidates):
+        if cls in failed:
+            continue
+        obj = try_cls(cls)
+        if obj is _FAILED:
+            continue
+
+        # Candidates before the class take precedence, unless they cannot deserialize the data
+        for cls_before in candidates[:candidates.index(cls)]:
+            sig = plan.signatures[cls_before]
+            if cls_before in failed or (payload is not None and sig is not None and sig.excludes(payload)):
+                continue
+            obj_before = try_cls(cls_before)
+            if obj_before is not _FAILED:
+                cls, obj = cls_before, obj_before
+                break
+        order.record(cls)
+        return obj
+
+    # If no class worked, raise error
+    raise AssertionError(f"Could not deserialize data <{parse_once.data}> with any class in {list(plan.cls_list)}")
+
+_FAILED = object()
+
+
+def _deserialize(plan: UpdatePlan, data: Any, nested_memo: Optional[Dict[Tuple[str,str],Optional[dict]]] = None) -> Tuple[object,bool]:
+    """Deserialize data with the class of the version it was written with, migrating its nested data first.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        data (Any): Serialized data, or a path or binary file object to read it from.
+        nested_memo (Optional[Dict[Tuple[str,str],Optional[dict]]], optional): Memo of migrated nested data, shared between records. Defaults to None.
+
+    Returns:
+        Tuple[object,bool]: Deserialized object, and whether nested data was migrated.
+    """    
+
+    # Parse string data only once for all classes tried
+    if is_input_source(data):
+        with open_input(data) as data_in:
+            parse_once = _parse(plan, data_in, nested_memo)
+            return _deserialize_parsed(plan, parse_once, _tagged_cls(plan, data_in)), parse_once.transformed
+    parse_once = _parse(plan, data, nested_memo)
+    return _deserialize_parsed(plan, parse_once, _tagged_cls(plan, data)), parse_once.transformed
+
+
+def _parse(plan: UpdatePlan, data: Any, nested_memo: Optional[Dict[Tuple[str,str],Optional[dict]]] = None) -> ParseOnce:
+    """Data to deserialize, whose nested data is migrated when it is parsed, if the schema has nested keys.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        data (Any): Serialized data.
+        nested_memo (Optional[Dict[Tuple[str,str],Optional[dict]]], optional): Memo of migrated nested data, shared between records. Defaults to None.
+
+    Returns:
+        ParseOnce: Data to deserialize.
+    """    
+    if len(plan.nested) == 0:
+        return ParseOnce(data)
+    memo = nested_memo if nested_memo is not None else {}
+    return ParseOnce(data, transform=lambda payload: _migrate_nested(plan, [ payload ], memo)[0])
+
+
+def _migrate_nested(plan: UpdatePlan, payloads: List[dict], memo: Dict[Tuple[str,str],Optional[dict]]) -> List[dict]:
+    """Migrate the nested data of serialized dictionaries to the latest versions of their labels. See `Updater.register_nested`.
+
+    The nested data of all dictionaries is migrated together for each key, depth first, so each level of the tree is one pass: identical nested data is migrated once, nested data at the latest version is not deserialized, and the nested data of each class is updated at once.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema of the dictionaries.
+        payloads (List[dict]): Serialized dictionaries.
+        memo (Dict[Tuple[str,str],Optional[dict]]): Migrated nested data by label and canonical JSON, or None for data at the latest version, shared between calls.
+
+    Returns:
+        List[dict]: Dictionaries with their nested data migrated, in the same order. Dictionaries whose nested data was all at the latest version are returned as is, and others are copied.
+    """    
+    for key, label in plan.nested:
+
+        # Nested dictionaries, and their positions: index of the payload, and index in the list if any
+        children: List[dict] = []
+        positions: List[Tuple[int,Optional[int]]] = []
+        for i, payload in enumerate(payloads):
+            value = payload.get(key)
+            if type(value) == dict:
+                children.append(value)
+                positions.append((i, None))
+            elif type(value) == list or type(value) == tuple:
+                for j, child in enumerate(value):
+                    if type(child) == dict:
+                        children.append(child)
+                        positions.append((i, j))
+        if len(children) == 0:
+            continue
+
+        # Copy only the payloads and lists with migrated children
+        updated: Dict[int,Any] = {}
+        for (i, j), child, child_new in zip(positions, children, _migrate_children(get_updater(label), children, memo)):
+            if child_new is child:
+                continue
+            if j is None:
+                updated[i] = child_new
+            else:
+                if i not in updated:
+                    updated[i] = list(payloads[i][key])
+                updated[i][j] = child_new
+        if len(updated):
+            payloads = [ { **payload, key: updated[i] } if i in updated else payload for i, payload in enumerate(payloads) ]
+    return payloads
+
+
+def _migrate_children(updater: Updater, children: List[dict], memo: Dict[Tuple[str,str],Optional[dict]]) -> List[dict]:
+    """Migrate nested serialized dictionaries of one label to the latest version, after their own nested data.
+
+    Args:
+        updater (Updater): Updater for the label of the children.
+        children (List[dict]): Serialized dictionaries.
+        memo (Dict[Tuple[str,str],Optional[dict]]): Migrated nested data by label and canonical JSON, or None for data at the latest version.
+
+    Returns:
+        List[dict]: Migrated dictionaries, in the same order. Dictionaries at the latest version, with all their nested data at the latest version, are returned as is.
+    """    
+    plan = updater.plan
+    assert len(plan.updates) > 0, f"No updates registered for nested label: {updater.label}"
+
+    # Identical children are migrated once. Children that are not JSON serializable are not memoized
+    keys = [ _nested_memo_key(plan.label, child) for child in children ]
+    todo: Dict[Any,dict] = {}
+    for key, child in zip(keys, children):
+        if key is None:
+            todo[id(child)] = child
+        elif key not in memo:
+            todo.setdefault(key, child)
+
+    done: Dict[Any,Optional[dict]] = {}
+    if len(todo):
+        todo_keys = list(todo)
+        todo_children = list(todo.values())
+        if len(plan.nested):
+            todo_children = _migrate_nested(plan, todo_children, memo)
+
+        # Deserialize only children older than the latest version, and update each class at once
+        groups: Dict[type,List[Tuple[Any,object]]] = {}
+        for todo_key, child_start, child in zip(todo_keys, todo.values(), todo_children):
+            if _is_latest_dict(plan, child):
+                done[todo_key] = child if child is not child_start else None
+                continue
+            obj = _deserialize_dict(plan, child)
+            if type(obj) == plan.latest:
+                done[todo_key] = child if child is not child_start else None
+            else:
+                groups.setdefault(type(obj), []).append((todo_key, obj))
+        for group in groups.values():
+            objs = updater.update_many([ obj for _, obj in group ], plan=plan)
+            for (todo_key, _), obj in zip(group, objs):
+                done[todo_key] = obj.to_dict() # type: ignore
+        for todo_key, child in done.items():
+            if type(todo_key) == tuple:
+                memo[todo_key] = child
+
+    migrated = [ done[id(child)] if key is None else memo[key] for key, child in zip(keys, children) ]
+    return [ child if child_new is None else child_new for child, child_new in zip(children, migrated) ]
+
+
+def _nested_memo_key(label: str, payload: dict) -> Optional[Tuple[str,str]]:
+    """Key of nested data in the memo of migrated nested data.
+
+    Args:
+        label (str): Label of the nested data.
+        payload (dict): Serialized dictionary.
+
+    Returns:
+        Optional[Tuple[str,str]]: Label and canonical JSON of the data, or None if it is not JSON serializable.
+    """    
+    try:
+        return label, json.dumps(payload, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_latest_dict(plan: UpdatePlan, payload: dict) -> bool:
+    """Whether a serialized dictionary is known to be at the latest version without deserializing it: it is tagged with the latest class, or only the signature of the latest class matches it.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        payload (dict): Serialized dictionary.
+
+    Returns:
+        bool: True if the dictionary is at the latest version. False if it is older, or its version is not known.
+    """    
+    tagged_cls = _tagged_cls(plan, payload)
+    if tagged_cls is not None:
+        return tagged_cls == plan.latest
+
+    # Classes whose signature matches come first
+    candidates = _candidates(plan, ParseOnce(payload))
+    sig = plan.signatures[plan.latest] # type: ignore
+    if candidates[0] != plan.latest or sig is None or not sig.matches(payload):
+        return False
+    if len(candidates) == 1:
+        return True
+    sig_next = plan.signatures[candidates[1]]
+    return sig_next is not None and not sig_next.matches(payload)
+
+
+def _deserialize_dict(plan: UpdatePlan, payload: dict) -> object:
+    """Deserialize a nested serialized dictionary with the class of the version it was written with. Nested data is always a dictionary, so it is deserialized with `from_dict`, whatever the format of the class.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        payload (dict): Serialized dictionary.
+
+    Returns:
+        object: Deserialized object.
+    """    
+    tagged_cls = _tagged_cls(plan, payload)
+    payload = strip_tag(payload) # type: ignore
+    candidates = (tagged_cls,) if tagged_cls is not None else _candidates(plan, ParseOnce(payload))
+    recorder = metrics.recorder
+    for cls in candidates:
+        try:
+            return cls.from_dict(payload) # type: ignore
+        except Exception:
+            if recorder is not None:
+                recorder.record(MetricEvent("failed_trial", plan.label, name=plan.version_names[cls]))
+            continue
+    raise AssertionError(f"Could not deserialize nested data <{payload}> with any class in {list(plan.cls_list)}")
+
+
+def _load(updater: Updater, data: Any, options: LoadOptions) -> object:
+    """Load data with a given updater, reading paths and file objects, and recording metrics if enabled.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Any): Serialized data, or a path or binary file object to read it from.
+        options (LoadOptions): Options.
+
+    Returns:
+        object: Object loaded from the serialized data.
+    """    
+    if options.lazy:
+        return _load_lazy(updater, data, options)
+    if type(data) != dict and type(data) != str and is_input_source(data):
+        if options.write_back and isinstance(data, os.PathLike):
+            return _load_write_back(updater, data, options)
+        with open_input(data) as data_in:
+            return _load_data(updater, data_in, options)
+    return _load_data(updater, data, options)
+
+
+def _load_lazy(updater: Updater, data: Any, options: LoadOptions) -> LazyProxy:
+    """Lazy proxy loading data with a given updater when first used.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Any): Serialized data, or a path or binary file object to read it from.
+        options (LoadOptions): Options.
+
+    Returns:
+        LazyProxy: Proxy of the object.
+    """    
+    latest = updater.plan.latest
+    assert latest is not None, f"No updates registered for label: {updater.label}"
+    options_eager = replace(options, lazy=False)
+    return proxy_class(latest)(lambda: _load(updater, data, options_eager), latest)
+
+
+def _load_write_back(updater: Updater, fname: os.PathLike, options: LoadOptions) -> object:
+    """Load data from a file with a given updater, and write the latest version back to the file if the data was older. See `LoadOptions.write_back`.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        fname (os.PathLike): File to load.
+        options (LoadOptions): Options.
+
+    Returns:
+        object: Object loaded from the file.
+    """    
+    recorder = metrics.recorder
+    t_start = time.perf_counter() if recorder is not None else 0.0
+    plan = updater.plan
+    assert len(plan.updates) > 0, f"No updates registered for label: {updater.label}"
+    stat = os.stat(fname)
+    obj_start, nested_migrated = _deserialize(plan, fname)
+    obj = _update_to_latest(updater, obj_start, options, plan)
+    if recorder is not None:
+        recorder.record(MetricEvent("load", updater.label, time.perf_counter() - t_start))
+
+    if type(obj_start) != plan.latest or nested_migrated:
+        _write_back(updater.label, os.fspath(fname), stat, obj, options)
+    return obj
+
+
+WRITE_BACK_LOCK_TIMEOUT = 60.0
+"Age in seconds after which a write-back lock file is considered left behind by a crashed process, and is replaced."
+
+
+def _write_back(label: str, fname: str, stat: os.stat_result, obj: object, options: LoadOptions):
+    """Write the latest version of an object back to the file it was loaded from.
+
+    A lock file next to the file is created exclusively, so only one thread or process writes each file. The file is only replaced if it has not changed since it was read, so each file is migrated at most once. Failures are logged, and do not fail the load.
+
+    Args:
+        label (str): Unique label for the schema.
+        fname (str): File the object was loaded from.
+        stat (os.stat_result): Status of the file before it was read.
+        obj (object): Object updated to the latest version.
+        options (LoadOptions): Options.
+    """    
+    fname_lock = os.path.join(os.path.dirname(fname), f".{os.path.basename(fname)}.upandup-lock")
+    try:
+        try:
+            fd = os.open(fname_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - os.stat(fname_lock).st_mtime < WRITE_BACK_LOCK_TIMEOUT:
+                logger.debug("Skipping write-back of {} - locked by another writer", fname)
+                return
+            os.remove(fname_lock)
+            fd = os.open(fname_lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+    except OSError as e:
+        logger.warning(f"Failed to lock {fname} for write-back: {e}")
+        return
+
+    try:
+        stat_now = os.stat(fname)
+        if (stat_now.st_ino, stat_now.st_size, stat_now.st_mtime_ns) != (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+            logger.debug("Skipping write-back of {} - changed since it was read", fname)
+            return
+
+        recorder = metrics.recorder
+        t_start = time.perf_counter() if recorder is not None else 0.0
+        data = serialize_to_bytes(obj, label=label if options.tag_versions else None)
+        write_atomic(fname, data)
+        if recorder is not None:
+            recorder.record(MetricEvent("write", label, time.perf_counter() - t_start, size=len(data)))
+        logger.debug("Wrote back latest version of {} to {}", label, fname)
+    except Exception as e:
+        logger.warning(f"Failed to write back {fname}: {e}")
+    finally:
+        os.remove(fname_lock)
+
+
+def _load_data(updater: Updater, data: Any, options: LoadOptions) -> object:
+    """Load data with a given updater, recording metrics if enabled.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Any): Serialized data.
+        options (LoadOptions): Options.
+
+    Returns:
+        object: Object loaded from the serialized data.
+    """    
+    recorder = metrics.recorder
+    if recorder is None:
+        return _load_cached(updater, data, options)
     
+    t_start = time.perf_counter()
+    obj = _load_cached(updater, data, options)
+    recorder.record(MetricEvent("load", updater.label, time.perf_counter() - t_start))
     return obj
 
 
+def _load_cached(updater: Updater, data: Any, options: LoadOptions) -> object:
+    """Load data with a given updater, using the cache in the options if any.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Any): Serialized data.
+        options (LoadOptions): Options.
+
+    Returns:
+        object: Object loaded from the serialized data.
+    """    
+    cache: Optional[LoadCache] = options.cache
+    if cache is None or options.write_versions:
+        return _load_uncached(updater, data, options)
+    
+    digest = payload_digest(data)
+    if digest is None:
+        return _load_uncached(updater, data, options)
+
+    key, plan = (updater.label, digest[0]), _cache_plan(updater.plan)
+    obj = cache.get(key, plan)
+    if obj is not None:
+        return obj
+    return cache.put(key, plan, _load_uncached(updater, data, options), size_bytes=digest[1])
+
+
+def _cache_plan(plan: UpdatePlan) -> object:
+    """Plan cached objects are loaded with: the update plan, or if the schema has nested keys, the plans of all labels of its nested data too, so cached objects are invalidated when updates are registered for nested labels.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+
+    Returns:
+        object: Update plan, or tuple of plans. Nested labels not registered yet have no plan.
+    """    
+    if len(plan.nested) == 0:
+        return plan
+    plans: Dict[str,Optional[UpdatePlan]] = { plan.label: plan }
+    todo = [ plan ]
+    while len(todo):
+        for _, label in todo.pop().nested:
+            if label in plans:
+                continue
+            updater = updaters.get(label)
+            plans[label] = updater.plan if updater is not None else None
+            if updater is not None:
+                todo.append(updater.plan)
+    return tuple(plans.values())
+
+
+def _load_uncached(updater: Updater, data: Any, options: LoadOptions) -> object:
+    """Load data with a given updater.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Any): Serialized data.
+        options (LoadOptions): Options.
+
+    Returns:
+        object: Object loaded from the serialized data.
+    """    
+    plan = updater.plan
+    assert len(plan.updates) > 0, f"No updates registered for label: {updater.label}"
+    parse_once = _parse(plan, data)
+    tagged_cls = _tagged_cls(plan, data)
+
+    # Tagged data whose first update step is dict-level is updated from the parsed dictionary, without instantiating the tagged class
+    dict_chain = plan.dict_chains.get(tagged_cls) if tagged_cls is not None else None
+    if dict_chain is not None and not options.write_versions:
+        d = parse_once.as_dict(tagged_cls) # type: ignore
+        if d is not None:
+            return dict_chain(d, _DEFAULT_UPDATER_OPTIONS)
+
+    obj = _deserialize_parsed(plan, parse_once, tagged_cls)
+    
+    # Update to latest
+    return _update_to_latest(updater, obj, options, plan)
+
+
 def load(label: str, data: Any, options: LoadOptions = LoadOptions()) -> object:
     """Load data from a serialized format, automatically updating to the latest version if necessary.
 
     Args:
         label (str): Unique label for the schema.
-        data (Any): Serialized data.
+        data (Any): Serialized data: a dictionary, a string, or UTF-8 encoded binary data (bytes, bytearray, memoryview or mmap). Or a path (e.g. `pathlib.Path`, since strings are data) or binary file object to read it from; large files are memory-mapped.
         options (LoadOptions, optional): Options. Defaults to LoadOptions().
 
     Returns:
         object: Object loaded from the serialized data.
     """    
+    return _load(get_updater(label), data, options)
 
-    # Try to load classes in reverse order
-    assert label in updaters, f"No updates registered for label: {label}"
-    updater = updaters[label]
-    assert updater.no_update_steps > 0, f"No updates registered for label: {label}"
-    
-    # Classes to check to deserialize
-    cls_list = updater.cls_list
 
-    # Try to deserialize, using most recent class first
-    obj = None
-    while obj is None and len(cls_list) > 0:
-        cls = cls_list.pop()
-        try:
-            obj = deserialize(data, cls)
-        except Exception as e:
-            # logger.debug(f"Could not deserialize data [{data}] with class {cls}: {e}")
+def load_many(label: str, data: Iterable[Any], options: LoadOptions = LoadOptions()) -> List[object]:
+    """Load many records from a serialized format, automatically updating to the latest version if necessary.
+
+    Records are grouped by the class they were deserialized with, and each group is updated through the update steps at once.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (Iterable[Any]): Serialized records, or paths or binary file objects to read them from. See `load`.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+
+    Returns:
+        List[object]: Objects loaded from the serialized records, in the same order.
+    """    
+    recorder = metrics.recorder
+    if recorder is None:
+        return _load_many(get_updater(label), data, options)
+
+    t_start = time.perf_counter()
+    objs = _load_many(get_updater(label), data, options)
+    if len(objs) > 0:
+        recorder.record(MetricEvent("load", label, time.perf_counter() - t_start, count=len(objs)))
+    return objs
+
+
+def _load_many(updater: Updater, data: Iterable[Any], options: LoadOptions) -> List[object]:
+    """Load many records with a given updater. See `load_many`.
+
+    Args:
+        updater (Updater): Updater for the schema.
+        data (Iterable[Any]): Serialized records.
+        options (LoadOptions): Options.
+
+    Returns:
+        List[object]: Objects loaded from the serialized records, in the same order.
+    """    
+    if options.lazy:
+        return [ _load_lazy(updater, d, options) for d in data ]
+
+    plan = updater.plan
+    assert len(plan.updates) > 0, f"No updates registered for label: {updater.label}"
+    options_updater = _updater_options(options)
+
+    # Status of the files to write back, before they are read
+    stats: Dict[int,os.stat_result] = {}
+    if options.write_back:
+        data = list(data)
+        stats = { i: os.stat(d) for i, d in enumerate(data) if isinstance(d, os.PathLike) }
+
+    # Deserialize, migrating identical nested data once for all records. Dictionaries are deserialized together, unless each record needs its own steps
+    nested_memo: Dict[Tuple[str,str],Optional[dict]] = {}
+    batch_dicts = len(plan.nested) == 0 and plan.candidate_order is None and metrics.recorder is None
+    objs: List[Any] = []
+    dict_idxs: List[int] = []
+    dicts: List[dict] = []
+    for i, d in enumerate(data):
+        if batch_dicts and type(d) == dict:
+            objs.append(None)
+            dict_idxs.append(i)
+            dicts.append(d)
             continue
-    
-    # If no class worked, raise error
-    assert obj is not None, f"Could not deserialize data <{data}> with any class in {updater.cls_list}"
-    
-    # Update to latest
-    return update_to_latest(label, obj, options=options)
+        obj, nested_migrated = _deserialize(plan, d, nested_memo)
+        objs.append(obj)
+        if nested_migrated and type(obj) == plan.latest and i in stats:
+            _write_back(updater.label, os.fspath(d), stats[i], obj, options)
+    for i, obj in zip(dict_idxs, _deserialize_dicts(plan, dicts)):
+        objs[i] = obj
+
+    # Group by class
+    groups: Dict[type,List[int]] = {}
+    for i, obj in enumerate(objs):
+        groups.setdefault(type(obj), []).append(i)
+
+    # Update each group to latest
+    for cls, idxs in groups.items():
+        if cls == plan.latest:
+            continue
+        objs_updated = updater.update_many([ objs[i] for i in idxs ], options=options_updater, plan=plan)
+        for i, obj in zip(idxs, objs_updated):
+            objs[i] = obj
+            if i in stats:
+                _write_back(updater.label, os.fspath(data[i]), stats[i], obj, options) # type: ignore
+
+    return objs
+
+
+def _deserialize_dicts(plan: UpdatePlan, payloads: List[dict]) -> List[object]:
+    """Deserialize serialized dictionaries with the classes of the versions they were written with, as `_deserialize` does for each. Dictionaries are grouped by their tagged class, or by their candidate classes, so the classes and their deserializers are resolved once per group.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema, without nested keys or adaptive order.
+        payloads (List[dict]): Serialized dictionaries.
+
+    Returns:
+        List[object]: Deserialized objects, in the same order.
+    """    
+    tagged: Dict[type,List[int]] = {}
+    untagged: Dict[Tuple[type, ...],List[int]] = {}
+    tag_classes: Dict[str,Optional[type]] = {}
+    for i, payload in enumerate(payloads):
+        tag = payload.get(TAG_KEY)
+        tagged_cls = None
+        if type(tag) == str:
+            if tag not in tag_classes:
+                tag_classes[tag] = _tagged_cls(plan, payload)
+            tagged_cls = tag_classes[tag]
+        if tagged_cls is not None:
+            tagged.setdefault(tagged_cls, []).append(i)
+        else:
+            untagged.setdefault(_payload_candidates(plan, strip_tag(payload)), []).append(i) # type: ignore
+
+    # Tagged dictionaries are deserialized with their class only
+    objs: List[Any] = [ None ] * len(payloads)
+    for cls, idxs in tagged.items():
+        fn = _dict_deserializer(cls)
+        for i in idxs:
+            objs[i] = fn(strip_tag(payloads[i]))
+
+    for candidates, idxs in untagged.items():
+        fns = [ _dict_deserializer(cls) for cls in candidates ]
+        for i in idxs:
+            payload = strip_tag(payloads[i])
+            for fn in fns:
+                try:
+                    objs[i] = fn(payload)
+                    break
+                except Exception:
+                    continue
+            else:
+                raise AssertionError(f"Could not deserialize data <{payload}> with any class in {list(plan.cls_list)}")
+    return objs
+
+
+def _dict_deserializer(cls: type) -> Callable[[dict], object]:
+    """Function deserializing a dictionary with a class, as `ParseOnce.deserialize` does.
+
+    Args:
+        cls (type): Class to deserialize to.
+
+    Returns:
+        Callable[[dict], object]: Deserializer. Args: payload. Returns: deserialized object.
+    """    
+    serializer = check_serializer(cls)
+    if serializer == Serializer.DICT:
+        return cls.from_dict # type: ignore
+    return functools.partial(deserialize_obj, cls=cls, serializer=serializer)
+
 
 def make_load_fn(label: str) -> Callable[[Any, LoadOptions], object]:
+    """Make a function loading data for a label. The updater for the label is looked up once, and its compiled update plan is used directly.
+
+    Args:
+        label (str): Unique label for the schema.
+
+    Returns:
+        Callable[[Any, LoadOptions], object]: Load function. Args: data, options. Returns: object loaded from the serialized data.
+    """    
+    updater = updaters.get(label) if label not in lazy_registrations else None
     def load_fn(data: Any, options: LoadOptions = LoadOptions()) -> object:
-        return load(label, data, options=options)
-    return load_fn
\ No newline at end of file
+        nonlocal updater
+        if updater is None:
+            updater = get_updater(label)
+        return _load(updater, data, options)
+    return load_fn
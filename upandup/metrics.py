@@ -0,0 +1,270 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import random
+import threading
+
+
+@dataclass
+class LatencyStats:
+    """Latency statistics of an operation.
+    """    
+
+    count: int = 0
+    "Number of calls."
+
+    total_s: float = 0.0
+    "Cumulative latency in seconds."
+
+    p50_s: float = 0.0
+    "Median latency in seconds."
+
+    p90_s: float = 0.0
+    "90th percentile latency in seconds."
+
+    p99_s: float = 0.0
+    "99th percentile latency in seconds."
+
+    max_s: float = 0.0
+    "Maximum latency in seconds."
+
+
+@dataclass
+class LabelMetrics:
+    """Metrics of one schema label.
+    """    
+
+    loads: LatencyStats = field(default_factory=LatencyStats)
+    "Loads, including the cache lookup, deserialization and updates."
+
+    deserializations: LatencyStats = field(default_factory=LatencyStats)
+    "Deserializations, including all classes tried."
+
+    failed_trials: int = 0
+    "Number of classes tried that failed to deserialize the data."
+
+    steps: Dict[str,LatencyStats] = field(default_factory=dict)
+    "Update steps, by name of the form 'ClassStart->ClassEnd'. For batch updates, the latency of a call is the average per object."
+
+    writes: LatencyStats = field(default_factory=LatencyStats)
+    "Versions written or queued to a writer."
+
+    bytes_written: int = 0
+    "Size of the versions written, in bytes."
+
+
+@dataclass
+class MetricEvent:
+    """Event passed to metrics callbacks.
+    """    
+
+    kind: str
+    "Kind of event: 'load', 'deserialize', 'failed_trial', 'step' or 'write'."
+
+    label: str
+    "Schema label."
+
+    seconds: float = 0.0
+    "Latency in seconds."
+
+    name: Optional[str] = None
+    "Name of the update step for 'step' events, or of the class for 'failed_trial' events."
+
+    count: int = 1
+    "Number of objects."
+
+    size: int = 0
+    "Size of the data written, for 'write' events."
+
+
+class _Latencies:
+    """Latency samples of an operation. Count, total and maximum are exact; percentiles are computed from a bounded reservoir of samples.
+    """    
+
+    def __init__(self, max_samples: int):
+        """Constructor.
+
+        Args:
+            max_samples (int): Maximum number of samples kept.
+        """        
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.samples: List[float] = []
+        self.max_samples = max_samples
+
+
+    def add(self, seconds: float, count: int):
+        """Add the latency of calls.
+
+        Args:
+            seconds (float): Total latency of the calls in seconds.
+            count (int): Number of calls.
+        """        
+        per_call = seconds / count
+        self.count += count
+        self.total_s += seconds
+        self.max_s = max(self.max_s, per_call)
+        if len(self.samples) < self.max_samples:
+            self.samples.append(per_call)
+        else:
+            i = random.randrange(self.count)
+            if i < self.max_samples:
+                self.samples[i] = per_call
+
+
+    def stats(self) -> LatencyStats:
+        """Statistics of the samples.
+
+        Returns:
+            LatencyStats: Statistics.
+        """        
+        samples = sorted(self.samples)
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else 0.0
+        return LatencyStats(
+            count=self.count,
+            total_s=self.total_s,
+            p50_s=percentile(0.5),
+            p90_s=percentile(0.9),
+            p99_s=percentile(0.99),
+            max_s=self.max_s
+            )
+
+
+class _LabelRecord:
+    """Metrics being recorded for one schema label.
+    """    
+
+    def __init__(self, max_samples: int):
+        """Constructor.
+
+        Args:
+            max_samples (int): Maximum number of latency samples kept per operation.
+        """        
+        self.max_samples = max_samples
+        self.loads = _Latencies(max_samples)
+        self.deserializations = _Latencies(max_samples)
+        self.failed_trials = 0
+        self.steps: Dict[str,_Latencies] = {}
+        self.writes = _Latencies(max_samples)
+        self.bytes_written = 0
+
+
+class MetricsRecorder:
+    """Recorder of per-label and per-step metrics. Use `enable_metrics` to install one.
+    """    
+
+    def __init__(self, max_samples: int = 10000, callbacks: Optional[List[Callable[[MetricEvent],None]]] = None):
+        """Constructor.
+
+        Args:
+            max_samples (int, optional): Maximum number of latency samples kept per operation for the percentiles. Defaults to 10000.
+            callbacks (Optional[List[Callable[[MetricEvent],None]]], optional): Functions called with each event. Defaults to None.
+        """        
+        assert max_samples > 0, f"Maximum number of samples must be positive, not: {max_samples}"
+        self.max_samples = max_samples
+        self.callbacks: List[Callable[[MetricEvent],None]] = list(callbacks or [])
+        self._labels: Dict[str,_LabelRecord] = {}
+        self._lock = threading.Lock()
+
+
+    def _label(self, label: str) -> _LabelRecord:
+        """Record of a label. The lock must be held.
+
+        Args:
+            label (str): Schema label.
+
+        Returns:
+            _LabelRecord: Record.
+        """        
+        record = self._labels.get(label)
+        if record is None:
+            record = self._labels[label] = _LabelRecord(self.max_samples)
+        return record
+
+
+    def record(self, event: MetricEvent):
+        """Record an event, and pass it to the callbacks.
+
+        Args:
+            event (MetricEvent): Event.
+        """        
+        with self._lock:
+            record = self._label(event.label)
+            if event.kind == "load":
+                record.loads.add(event.seconds, event.count)
+            elif event.kind == "deserialize":
+                record.deserializations.add(event.seconds, event.count)
+            elif event.kind == "failed_trial":
+                record.failed_trials += event.count
+            elif event.kind == "step":
+                step = record.steps.get(event.name) # type: ignore
+                if step is None:
+                    step = record.steps[event.name] = _Latencies(self.max_samples) # type: ignore
+                step.add(event.seconds, event.count)
+            elif event.kind == "write":
+                record.writes.add(event.seconds, event.count)
+                record.bytes_written += event.size
+            else:
+                raise ValueError(f"Unknown metric event: {event.kind}")
+        for callback in self.callbacks:
+            callback(event)
+
+
+    def snapshot(self) -> Dict[str,LabelMetrics]:
+        """Snapshot of the metrics.
+
+        Returns:
+            Dict[str,LabelMetrics]: Metrics for each label.
+        """        
+        with self._lock:
+            return { label: LabelMetrics(
+                loads=record.loads.stats(),
+                deserializations=record.deserializations.stats(),
+                failed_trials=record.failed_trials,
+                steps={ name: step.stats() for name, step in record.steps.items() },
+                writes=record.writes.stats(),
+                bytes_written=record.bytes_written
+                ) for label, record in self._labels.items() }
+
+
+    def reset(self):
+        """Clear all metrics.
+        """        
+        with self._lock:
+            self._labels.clear()
+
+
+recorder: Optional[MetricsRecorder] = None
+"Installed metrics recorder, or None if metrics are disabled. Instrumented code checks this once per call, so disabled metrics cost close to nothing."
+
+
+def enable_metrics(max_samples: int = 10000, callbacks: Optional[List[Callable[[MetricEvent],None]]] = None) -> MetricsRecorder:
+    """Start recording metrics, replacing any installed recorder.
+
+    Args:
+        max_samples (int, optional): Maximum number of latency samples kept per operation for the percentiles. Defaults to 10000.
+        callbacks (Optional[List[Callable[[MetricEvent],None]]], optional): Functions called with each event. Defaults to None.
+
+    Returns:
+        MetricsRecorder: Installed recorder.
+    """    
+    global recorder
+    recorder = MetricsRecorder(max_samples=max_samples, callbacks=callbacks)
+    return recorder
+
+
+def disable_metrics():
+    """Stop recording metrics.
+    """    
+    global recorder
+    recorder = None
+
+
+def metrics_snapshot() -> Dict[str,LabelMetrics]:
+    """Snapshot of the metrics of the installed recorder.
+
+    Returns:
+        Dict[str,LabelMetrics]: Metrics for each label. Empty if metrics are disabled.
+    """    
+    return recorder.snapshot() if recorder is not None else {}
@@ -0,0 +1,98 @@
+from upandup.serializer import qualified_name
+from typing import Dict, Optional, Tuple
+import threading
+
+
+class CandidateOrder:
+    """Observed frequencies of the classes that loaded data is deserialized with, used to try the most frequent classes first. Enable it with `enable_adaptive_order`.
+
+    Classes are identified by their qualified names, see `qualified_name`, so classes of different modules with the same name are counted apart. Frequencies decay exponentially, so recent loads weigh more. Reordering never changes results: when the data could be deserialized with a class tried before the most frequent one in the default order, that class is used, as without reordering.
+    """    
+
+    def __init__(self, decay: float = 1.0, reorder_every: int = 256, profile: Optional[Dict[str,float]] = None):
+        """Constructor.
+
+        Args:
+            decay (float, optional): Factor the frequencies are multiplied by at each load, e.g. 0.999 to weigh roughly the last 1000 loads. Defaults to 1.0, for no decay.
+            reorder_every (int, optional): Number of loads between updates of the order. Defaults to 256.
+            profile (Optional[Dict[str,float]], optional): Frequencies to start from, by qualified class name, e.g. exported by `profile` in an earlier run. Defaults to None.
+        """        
+        assert 0.0 < decay <= 1.0, f"Decay must be in (0, 1], not: {decay}"
+        assert reorder_every > 0, f"Number of loads between reorders must be positive, not: {reorder_every}"
+        self.decay = decay
+        self.reorder_every = reorder_every
+        self._weights: Dict[str,float] = {}
+        self._increment = 1.0
+        self._no_recorded = 0
+        # Rank of each qualified class name, and memo of the orders of candidate tuples, replaced together
+        self._state: Tuple[Dict[str,int],Dict[Tuple[type, ...],Tuple[type, ...]]] = ({}, {})
+        self._lock = threading.Lock()
+        if profile is not None:
+            self.seed(profile)
+
+
+    def record(self, cls: type):
+        """Record that data was deserialized with a class.
+
+        Args:
+            cls (type): Class.
+        """        
+        with self._lock:
+            name = qualified_name(cls)
+            self._weights[name] = self._weights.get(name, 0.0) + self._increment
+
+            # Decay by growing the increment instead of shrinking all weights, rescaling before it overflows
+            if self.decay < 1.0:
+                self._increment /= self.decay
+                if self._increment > 1e100:
+                    self._weights = { k: w / self._increment for k, w in self._weights.items() }
+                    self._increment = 1.0
+
+            self._no_recorded += 1
+            if self._no_recorded % self.reorder_every == 0 or name not in self._state[0]:
+                self._reorder()
+
+
+    def seed(self, profile: Dict[str,float]):
+        """Replace the frequencies with a profile.
+
+        Args:
+            profile (Dict[str,float]): Frequencies by qualified class name. Only their ratios matter.
+        """        
+        with self._lock:
+            self._weights = { name: float(weight) * self._increment for name, weight in profile.items() }
+            self._reorder()
+
+
+    def profile(self) -> Dict[str,float]:
+        """Frequencies, to save and seed a later run with.
+
+        Returns:
+            Dict[str,float]: Relative frequency of each qualified class name, summing to 1, most frequent first.
+        """        
+        with self._lock:
+            total = sum(self._weights.values())
+            return { name: self._weights[name] / total for name in self._state[0] } if total > 0 else {}
+
+
+    def order(self, candidates: Tuple[type, ...]) -> Tuple[type, ...]:
+        """Classes to try, most frequent first. Classes not observed follow in the default order.
+
+        Args:
+            candidates (Tuple[type, ...]): Classes in the default order.
+
+        Returns:
+            Tuple[type, ...]: Classes, most frequent first.
+        """        
+        order, memo = self._state
+        ordered = memo.get(candidates)
+        if ordered is None:
+            rank = { cls: order.get(qualified_name(cls), len(order) + i) for i, cls in enumerate(candidates) }
+            ordered = memo[candidates] = tuple(sorted(candidates, key=rank.__getitem__))
+        return ordered
+
+
+    def _reorder(self):
+        """Update the order from the frequencies. The lock must be held.
+        """        
+        self._state = ({ name: i for i, name in enumerate(sorted(self._weights, key=self._weights.__getitem__, reverse=True)) }, {})
@@ -0,0 +1,187 @@
+from upandup.load import LoadOptions, load_many
+from typing import Callable, Iterable, Iterator, List, Optional, Any, TypeVar
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+import importlib
+import itertools
+import multiprocessing
+import os
+import pathlib
+
+
+T = TypeVar("T")
+
+
+def init_worker(registration_module: Optional[str]):
+    """Import the module that registers the updates, e.g. to initialize a worker process.
+
+    Args:
+        registration_module (Optional[str]): Name of the module to import, or None to use the updates already registered, e.g. inherited from the parent process.
+    """    
+    if registration_module is not None:
+        importlib.import_module(registration_module)
+
+
+def _load_chunk(label: str, data: List[Any], options: LoadOptions) -> List[object]:
+    """Load a chunk of records in a worker process.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (List[Any]): Serialized records.
+        options (LoadOptions): Options.
+
+    Returns:
+        List[object]: Objects loaded from the records.
+    """    
+    return load_many(label, data, options=options)
+
+
+def _load_files_chunk(label: str, fnames: List[str], options: LoadOptions) -> List[object]:
+    """Load a chunk of files in a worker process.
+
+    Args:
+        label (str): Unique label for the schema.
+        fnames (List[str]): File names.
+        options (LoadOptions): Options.
+
+    Returns:
+        List[object]: Objects loaded from the files.
+    """    
+    return load_many(label, [ pathlib.Path(fname) for fname in fnames ], options=options)
+
+
+def chunks(items: Iterable[T], chunk_size: int) -> Iterator[List[T]]:
+    """Split items into chunks.
+
+    Args:
+        items (Iterable[T]): Items.
+        chunk_size (int): Maximum number of items per chunk.
+
+    Yields:
+        Iterator[List[T]]: Chunks of items, in order.
+    """    
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def map_ordered(
+    fn: Callable[[str,List[Any],LoadOptions], List[object]],
+    label: str,
+    items: Iterable[Any],
+    options: LoadOptions,
+    registration_module: Optional[str],
+    max_workers: Optional[int],
+    chunk_size: int,
+    mp_context: Optional[multiprocessing.context.BaseContext]
+    ) -> Iterator[object]:
+    """Run a chunk function over items in a process pool, yielding results in order.
+
+    At most two chunks per worker are pending at a time, so the items are consumed lazily.
+
+    Args:
+        fn (Callable[[str,List[Any],LoadOptions], List[object]]): Function to run on each chunk. Args: label, chunk, options. Returns: results for the chunk.
+        label (str): Unique label for the schema.
+        items (Iterable[Any]): Items.
+        options (LoadOptions): Options.
+        registration_module (Optional[str]): Name of the module each worker imports to register the updates.
+        max_workers (Optional[int]): Number of worker processes.
+        chunk_size (int): Number of items sent to a worker at a time.
+        mp_context (Optional[multiprocessing.context.BaseContext]): Multiprocessing context for the workers.
+
+    Yields:
+        Iterator[object]: Results, in the same order as the items.
+    """    
+    assert chunk_size > 0, f"Chunk size must be positive, not: {chunk_size}"
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context, initializer=init_worker, initargs=(registration_module,)) as executor:
+        pending: deque[Future] = deque()
+        for chunk in chunks(items, chunk_size):
+            pending.append(executor.submit(fn, label, chunk, options))
+            if len(pending) >= 2 * max_workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_load_parallel(
+    label: str,
+    data: Iterable[Any],
+    registration_module: Optional[str] = None,
+    options: LoadOptions = LoadOptions(),
+    max_workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    mp_context: Optional[multiprocessing.context.BaseContext] = None
+    ) -> Iterator[object]:
+    """Load records in a pool of worker processes, automatically updating to the latest version if necessary.
+
+    Each worker imports `registration_module` to register the updates. If it is None, the workers must inherit the updates from this process, which requires the "fork" start method.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (Iterable[Any]): Serialized records.
+        registration_module (Optional[str], optional): Name of the module that registers the updates, e.g. "mypackage.register_updates". Defaults to None.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        max_workers (Optional[int], optional): Number of worker processes. Defaults to None, for the number of CPUs.
+        chunk_size (int, optional): Number of records sent to a worker at a time. Defaults to 1000.
+        mp_context (Optional[multiprocessing.context.BaseContext], optional): Multiprocessing context for the workers. Defaults to None.
+
+    Yields:
+        Iterator[object]: Objects loaded from the records, in the same order.
+    """    
+    yield from map_ordered(_load_chunk, label, data, options, registration_module, max_workers, chunk_size, mp_context)
+
+
+def load_parallel(
+    label: str,
+    data: Iterable[Any],
+    registration_module: Optional[str] = None,
+    options: LoadOptions = LoadOptions(),
+    max_workers: Optional[int] = None,
+    chunk_size: int = 1000,
+    mp_context: Optional[multiprocessing.context.BaseContext] = None
+    ) -> List[object]:
+    """Load records in a pool of worker processes, automatically updating to the latest version if necessary. See `iter_load_parallel`.
+
+    Args:
+        label (str): Unique label for the schema.
+        data (Iterable[Any]): Serialized records.
+        registration_module (Optional[str], optional): Name of the module that registers the updates, e.g. "mypackage.register_updates". Defaults to None.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        max_workers (Optional[int], optional): Number of worker processes. Defaults to None, for the number of CPUs.
+        chunk_size (int, optional): Number of records sent to a worker at a time. Defaults to 1000.
+        mp_context (Optional[multiprocessing.context.BaseContext], optional): Multiprocessing context for the workers. Defaults to None.
+
+    Returns:
+        List[object]: Objects loaded from the records, in the same order.
+    """    
+    return list(iter_load_parallel(label, data, registration_module, options, max_workers, chunk_size, mp_context))
+
+
+def load_files_parallel(
+    label: str,
+    fnames: Iterable[str],
+    registration_module: Optional[str] = None,
+    options: LoadOptions = LoadOptions(),
+    max_workers: Optional[int] = None,
+    chunk_size: int = 16,
+    mp_context: Optional[multiprocessing.context.BaseContext] = None
+    ) -> List[object]:
+    """Load files in a pool of worker processes, automatically updating to the latest version if necessary. The files are read by the workers. See `iter_load_parallel`.
+
+    Args:
+        label (str): Unique label for the schema.
+        fnames (Iterable[str]): File names.
+        registration_module (Optional[str], optional): Name of the module that registers the updates, e.g. "mypackage.register_updates". Defaults to None.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        max_workers (Optional[int], optional): Number of worker processes. Defaults to None, for the number of CPUs.
+        chunk_size (int, optional): Number of files sent to a worker at a time. Defaults to 16.
+        mp_context (Optional[multiprocessing.context.BaseContext], optional): Multiprocessing context for the workers. Defaults to None.
+
+    Returns:
+        List[object]: Objects loaded from the files, in the same order.
+    """    
+    return list(map_ordered(_load_files_chunk, label, fnames, options, registration_module, max_workers, chunk_size, mp_context))
@@ -0,0 +1,176 @@
+from typing import Any, Callable, Iterator, List
+from dataclasses import is_dataclass
+import functools
+import threading
+
+
+_PENDING = object()
+
+
+class LazyProxy:
+    """Proxy of an object that is loaded on first use. Returned by `load` and `load_many` if `LoadOptions.lazy` is set.
+
+    The proxy has the interface of the latest class: detecting the version of the data and updating it run when an attribute is first read or set, or when the proxy is compared, hashed, printed, copied, pickled, tested for truth, or used as a container (`len`, `iter`, indexing and `in`). `isinstance` checks against the latest class do not load the data. Proxies of dataclasses are instances of a subclass exposing the dataclass fields, see `proxy_class`, so `dataclasses.is_dataclass`, `fields`, `asdict` and `replace` accept them. `type` returns the proxy class: use `materialize` to load the object explicitly and get the object itself. `serialize`, `write_obj`, `VersionWriter.write` and `VersionedStore.put` load proxies, and `check_serializer` accepts proxy classes.
+    """    
+    __slots__ = ("_upandup_load", "_upandup_cls", "_upandup_obj", "_upandup_lock")
+
+    def __init__(self, load_fn: Callable[[], object], cls: type):
+        """Constructor.
+
+        Args:
+            load_fn (Callable[[], object]): Function loading the object.
+            cls (type): Class of the loaded object, i.e. the latest class.
+        """        
+        object.__setattr__(self, "_upandup_load", load_fn)
+        object.__setattr__(self, "_upandup_cls", cls)
+        object.__setattr__(self, "_upandup_obj", _PENDING)
+        object.__setattr__(self, "_upandup_lock", threading.Lock())
+
+
+    def _upandup_get(self) -> object:
+        """Loaded object, loading it on the first call. Other threads wait for the first load.
+
+        Returns:
+            object: Loaded object.
+        """        
+        obj = self._upandup_obj
+        if obj is _PENDING:
+            with self._upandup_lock:
+                obj = self._upandup_obj
+                if obj is _PENDING:
+                    obj = self._upandup_load()
+                    object.__setattr__(self, "_upandup_obj", obj)
+
+                    # Release the data
+                    object.__setattr__(self, "_upandup_load", None)
+        return obj
+
+
+    @property
+    def __class__(self):
+        obj = self._upandup_obj
+        return self._upandup_cls if obj is _PENDING else type(obj)
+
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._upandup_get(), name)
+
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._upandup_get(), name, value)
+
+
+    def __delattr__(self, name: str):
+        delattr(self._upandup_get(), name)
+
+
+    def __dir__(self) -> List[str]:
+        return dir(self._upandup_get())
+
+
+    def __repr__(self) -> str:
+        return repr(self._upandup_get())
+
+
+    def __str__(self) -> str:
+        return str(self._upandup_get())
+
+
+    def __eq__(self, other: Any) -> bool:
+        return self._upandup_get() == materialize(other)
+
+
+    def __ne__(self, other: Any) -> bool:
+        return self._upandup_get() != materialize(other)
+
+
+    def __lt__(self, other: Any) -> bool:
+        return self._upandup_get() < materialize(other) # type: ignore
+
+
+    def __le__(self, other: Any) -> bool:
+        return self._upandup_get() <= materialize(other) # type: ignore
+
+
+    def __gt__(self, other: Any) -> bool:
+        return self._upandup_get() > materialize(other) # type: ignore
+
+
+    def __ge__(self, other: Any) -> bool:
+        return self._upandup_get() >= materialize(other) # type: ignore
+
+
+    def __hash__(self) -> int:
+        return hash(self._upandup_get())
+
+
+    def __len__(self) -> int:
+        return len(self._upandup_get()) # type: ignore
+
+
+    def __iter__(self) -> Iterator:
+        return iter(self._upandup_get()) # type: ignore
+
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._upandup_get()[key] # type: ignore
+
+
+    def __contains__(self, item: Any) -> bool:
+        return item in self._upandup_get() # type: ignore
+
+
+    def __bool__(self) -> bool:
+        return bool(self._upandup_get())
+
+
+    def __reduce__(self):
+        # Copies and pickles are of the loaded object, not of the proxy
+        return _identity, (self._upandup_get(),)
+
+
+def _identity(obj: object) -> object:
+    return obj
+
+
+@functools.lru_cache(maxsize=None)
+def proxy_class(cls: type) -> type:
+    """Class of the lazy proxies of a class. For dataclasses, the proxy class exposes the dataclass fields and parameters of the class, so the functions of `dataclasses` treat proxies as instances of the class, and load them when they read a field. `replace` returns an instance of the class itself.
+
+    Args:
+        cls (type): Class of the loaded objects, i.e. the latest class.
+
+    Returns:
+        type: Subclass of `LazyProxy`, created once per class. Its `_upandup_proxied` attribute is the class.
+    """    
+    namespace: dict = { "__slots__": (), "_upandup_proxied": cls }
+    if is_dataclass(cls):
+        namespace["__dataclass_fields__"] = cls.__dataclass_fields__ # type: ignore
+        namespace["__dataclass_params__"] = cls.__dataclass_params__ # type: ignore
+    return type(f"LazyProxy_{cls.__name__}", (LazyProxy,), namespace)
+
+
+def materialize(obj: object) -> object:
+    """Load the object of a lazy proxy, if not yet loaded.
+
+    Args:
+        obj (object): Lazy proxy, or any other object.
+
+    Returns:
+        object: Loaded object for proxies. Other objects are returned as is.
+    """    
+    if isinstance(obj, LazyProxy):
+        return obj._upandup_get()
+    return obj
+
+
+def is_materialized(obj: object) -> bool:
+    """Whether the object of a lazy proxy has been loaded.
+
+    Args:
+        obj (object): Lazy proxy, or any other object.
+
+    Returns:
+        bool: False for proxies not yet loaded, True otherwise.
+    """    
+    return not isinstance(obj, LazyProxy) or obj._upandup_obj is not _PENDING
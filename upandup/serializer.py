@@ -1,7 +1,31 @@
 from enum import Enum
 import os
-from typing import Union
+import re
+import json
+import inspect
+import functools
+import threading
+import contextlib
+import io
+import mmap
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
 from loguru import logger
+from upandup.proxy import LazyProxy, materialize
+
+
+TAG_KEY = "__upandup__"
+"Key under which the schema label and version tag is embedded in tagged output."
+
+TAG_HEADER_SIZE = 512
+"Number of characters at the start of a string payload that are searched for the tag."
+
+MMAP_MIN_SIZE = 1 << 20
+"Files of at least this size in bytes are memory-mapped when loaded, instead of read."
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+"Types of binary data accepted in addition to dictionaries and strings. Binary data is UTF-8 encoded."
+
+_TAG_HEADER_RE = re.compile(r'\A\s*\{?\s*"?' + TAG_KEY + r'"?\s*[:=]\s*"((?:[^"\\]|\\.)*)"')
 
 
 class Serializer(Enum):
@@ -19,9 +43,20 @@ class Serializer(Enum):
     TOML = "toml"
     "TOML format."
 
+    MSGPACK = "msgpack"
+    "MessagePack binary format, e.g. with the `mashumaro` DataClassMessagePackMixin."
 
+    CBOR = "cbor"
+    "CBOR binary format, e.g. with `upandup.cbor.DataClassCBORMixin`."
+
+
+BINARY_SERIALIZERS = (Serializer.MSGPACK, Serializer.CBOR)
+"Serializer formats producing bytes instead of strings."
+
+
+@functools.lru_cache(maxsize=None)
 def check_serializer(cls) -> Serializer:
-    """Check the serializer for a class.
+    """Check the serializer for a class. For proxy classes, see `proxy_class`, the serializer of the proxied class.
 
     Raises:
         AttributeError: Serializer class must have to_dict/from_dict or to_json/from_json methods
@@ -29,19 +64,25 @@ def check_serializer(cls) -> Serializer:
     Returns:
         Serializer: Serializer format.
     """    
+    if isinstance(cls, type) and issubclass(cls, LazyProxy):
+        cls = cls._upandup_proxied # type: ignore
     if hasattr(cls, "to_json") and hasattr(cls, "from_json"):
         return Serializer.JSON
     elif hasattr(cls, "to_yaml") and hasattr(cls, "from_yaml"):
         return Serializer.YAML
     elif hasattr(cls, "to_toml") and hasattr(cls, "from_toml"):
         return Serializer.TOML
+    elif hasattr(cls, "to_msgpack") and hasattr(cls, "from_msgpack"):
+        return Serializer.MSGPACK
+    elif hasattr(cls, "to_cbor") and hasattr(cls, "from_cbor"):
+        return Serializer.CBOR
     elif hasattr(cls, "to_dict") and hasattr(cls, "from_dict"):
         return Serializer.DICT
     else:
         raise AttributeError("Serializer class must have to_dict/from_dict or to_json/from_json methods")
 
 
-def serialize_obj(obj: object, serializer: Serializer) -> Union[dict,str]:
+def serialize_obj(obj: object, serializer: Serializer) -> Union[dict,str,bytes]:
     """Serialize an object.
 
     Args:
@@ -52,7 +93,7 @@ def serialize_obj(obj: object, serializer: Serializer) -> Union[dict,str]:
         ValueError: Unknown serializer.
 
     Returns:
-        Union[dict,str]: Serialized object.
+        Union[dict,str,bytes]: Serialized object. Bytes for binary formats.
     """    
     if serializer == Serializer.DICT:
         assert hasattr(obj, "to_dict") and hasattr(obj, "from_dict"), f"Serializer class must have to_dict/from_dict methods"
@@ -66,39 +107,307 @@ def serialize_obj(obj: object, serializer: Serializer) -> Union[dict,str]:
     elif serializer == Serializer.TOML:
         assert hasattr(obj, "to_toml") and hasattr(obj, "from_toml"), f"Serializer class must have to_toml/from_toml methods"
         return obj.to_toml() # type: ignore
+    elif serializer == Serializer.MSGPACK:
+        assert hasattr(obj, "to_msgpack") and hasattr(obj, "from_msgpack"), f"Serializer class must have to_msgpack/from_msgpack methods"
+        return obj.to_msgpack() # type: ignore
+    elif serializer == Serializer.CBOR:
+        assert hasattr(obj, "to_cbor") and hasattr(obj, "from_cbor"), f"Serializer class must have to_cbor/from_cbor methods"
+        return obj.to_cbor() # type: ignore
+    else:
+        raise ValueError(f"Unknown serializer: {serializer}")
+
+
+def qualified_name(cls: type) -> str:
+    """Module and qualified name of a class.
+
+    Args:
+        cls (type): Class.
+
+    Returns:
+        str: Name of the form "module.QualifiedName".
+    """    
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def make_tag(label: str, cls: type) -> str:
+    """Make the tag identifying the schema label and version of a class.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls (type): Class of the version.
+
+    Returns:
+        str: Tag of the form "label:ClassName", with the version name of the class if it is registered for the label.
+    """    
+    # Imported here, since the updater imports this module
+    from upandup.updater import version_name
+    return f"{label}:{version_name(label, cls)}"
+
+
+def parse_tag(tag: str) -> Tuple[str,str]:
+    """Parse a tag into the schema label and class name.
+
+    Args:
+        tag (str): Tag of the form "label:ClassName".
+
+    Returns:
+        Tuple[str,str]: Label and class name.
+    """    
+    label, _, cls_name = tag.rpartition(":")
+    return label, cls_name
+
+
+def embed_tag(data: Union[dict,str,bytes], serializer: Serializer, tag: str) -> Union[dict,str,bytes]:
+    """Embed a tag as the first key of serialized data.
+
+    Args:
+        data (Union[dict,str,bytes]): Serialized data.
+        serializer (Serializer): Serializer format of the data.
+        tag (str): Tag to embed.
+
+    Raises:
+        ValueError: Unknown serializer.
+
+    Returns:
+        Union[dict,str,bytes]: Serialized data with the tag embedded.
+    """    
+    if serializer == Serializer.DICT:
+        return {TAG_KEY: tag, **data} # type: ignore
+    elif serializer in BINARY_SERIALIZERS:
+        return _embed_binary_tag(data, serializer, tag) # type: ignore
+    
+    assert type(data) == str, f"Type of data must be str, not {type(data)}"
+    tag_str = json.dumps(tag)
+    if serializer == Serializer.JSON:
+        rest = data.lstrip()
+        assert rest.startswith("{"), f"Can only tag JSON objects, not: {data}"
+        rest = rest[1:].lstrip()
+        sep = "" if rest.startswith("}") else ", "
+        return f'{{"{TAG_KEY}": {tag_str}{sep}{rest}'
+    elif serializer == Serializer.YAML:
+        rest = "" if data.strip() == "{}" else data
+        return f'{TAG_KEY}: {tag_str}\n{rest}'
+    elif serializer == Serializer.TOML:
+        return f'{TAG_KEY} = {tag_str}\n{data}'
     else:
         raise ValueError(f"Unknown serializer: {serializer}")
 
 
-def serialize(obj: object) -> Union[dict,str]:
+def read_tag(data: Any) -> Optional[str]:
+    """Read the tag embedded in serialized data, if any. For strings and binary data, only the header of the data is searched.
+
+    Args:
+        data (Any): Serialized data.
+
+    Returns:
+        Optional[str]: Tag, or None if the data is not tagged.
+    """    
+    if type(data) == dict:
+        tag = data.get(TAG_KEY)
+        return tag if type(tag) == str else None
+    elif type(data) == str:
+        m = _TAG_HEADER_RE.match(data[:TAG_HEADER_SIZE])
+        return json.loads(f'"{m.group(1)}"') if m else None
+    elif isinstance(data, BUFFER_TYPES):
+        header = bytes(data[:TAG_HEADER_SIZE])
+        if len(header) and header[0] >= 0x80:
+            return _read_binary_tag(header)
+        return read_tag(header.decode("utf-8", errors="ignore"))
+    else:
+        return None
+
+
+def _binary_map_header(data: bytes) -> Tuple[Serializer,Optional[int],int]:
+    """Parse the header of a MessagePack or CBOR map.
+
+    Args:
+        data (bytes): Serialized data.
+
+    Raises:
+        ValueError: The data does not start with a map.
+
+    Returns:
+        Tuple[Serializer,Optional[int],int]: Format, number of items (None for indefinite-length CBOR maps), and length of the header.
+    """    
+    b0 = data[0]
+    if 0x80 <= b0 <= 0x8f:
+        return Serializer.MSGPACK, b0 & 0x0f, 1
+    elif b0 in (0xde, 0xdf):
+        n = 2 if b0 == 0xde else 4
+        return Serializer.MSGPACK, int.from_bytes(data[1:1+n], "big"), 1 + n
+    elif 0xa0 <= b0 <= 0xb7:
+        return Serializer.CBOR, b0 - 0xa0, 1
+    elif 0xb8 <= b0 <= 0xbb:
+        n = 1 << (b0 - 0xb8)
+        return Serializer.CBOR, int.from_bytes(data[1:1+n], "big"), 1 + n
+    elif b0 == 0xbf:
+        return Serializer.CBOR, None, 1
+    raise ValueError("Data does not start with a MessagePack or CBOR map")
+
+
+def _binary_map_header_bytes(serializer: Serializer, count: int) -> bytes:
+    """Encode the header of a MessagePack or CBOR map.
+
+    Args:
+        serializer (Serializer): Binary format.
+        count (int): Number of items.
+
+    Returns:
+        bytes: Header.
+    """    
+    if serializer == Serializer.MSGPACK:
+        if count < 16:
+            return bytes([0x80 | count])
+        return bytes([0xde]) + count.to_bytes(2, "big") if count < 1 << 16 else bytes([0xdf]) + count.to_bytes(4, "big")
+    if count < 24:
+        return bytes([0xa0 + count])
+    for i, n in enumerate((1, 2, 4, 8)):
+        if count < 1 << (8 * n):
+            return bytes([0xb8 + i]) + count.to_bytes(n, "big")
+    raise ValueError(f"Map too large: {count}")
+
+
+def _binary_str_bytes(serializer: Serializer, value: str) -> bytes:
+    """Encode a string in MessagePack or CBOR.
+
+    Args:
+        serializer (Serializer): Binary format.
+        value (str): String.
+
+    Returns:
+        bytes: Encoded string.
+    """    
+    b = value.encode("utf-8")
+    if serializer == Serializer.MSGPACK:
+        if len(b) < 32:
+            return bytes([0xa0 | len(b)]) + b
+        for prefix, n in ((0xd9, 1), (0xda, 2), (0xdb, 4)):
+            if len(b) < 1 << (8 * n):
+                return bytes([prefix]) + len(b).to_bytes(n, "big") + b
+    else:
+        if len(b) < 24:
+            return bytes([0x60 + len(b)]) + b
+        for i, n in enumerate((1, 2, 4, 8)):
+            if len(b) < 1 << (8 * n):
+                return bytes([0x78 + i]) + len(b).to_bytes(n, "big") + b
+    raise ValueError(f"String too long: {len(b)}")
+
+
+def _read_binary_str(data: bytes, offset: int, serializer: Serializer) -> Tuple[Optional[str],int]:
+    """Decode a MessagePack or CBOR string.
+
+    Args:
+        data (bytes): Serialized data.
+        offset (int): Offset of the string.
+        serializer (Serializer): Binary format.
+
+    Returns:
+        Tuple[Optional[str],int]: String, or None if there is no string at the offset, and offset after it.
+    """    
+    b0 = data[offset]
+    if serializer == Serializer.MSGPACK and 0xa0 <= b0 <= 0xbf:
+        n, start = b0 & 0x1f, offset + 1
+    elif serializer == Serializer.MSGPACK and b0 in (0xd9, 0xda, 0xdb):
+        size = 1 << (b0 - 0xd9)
+        n, start = int.from_bytes(data[offset+1:offset+1+size], "big"), offset + 1 + size
+    elif serializer == Serializer.CBOR and 0x60 <= b0 <= 0x77:
+        n, start = b0 - 0x60, offset + 1
+    elif serializer == Serializer.CBOR and 0x78 <= b0 <= 0x7b:
+        size = 1 << (b0 - 0x78)
+        n, start = int.from_bytes(data[offset+1:offset+1+size], "big"), offset + 1 + size
+    else:
+        return None, offset
+    if start + n > len(data):
+        return None, offset
+    return data[start:start+n].decode("utf-8"), start + n
+
+
+def _read_binary_tag(data: bytes) -> Optional[str]:
+    """Read the tag embedded as the first key of a MessagePack or CBOR map.
+
+    Args:
+        data (bytes): Header of the serialized data.
+
+    Returns:
+        Optional[str]: Tag, or None if the data is not tagged.
+    """    
+    try:
+        serializer, count, offset = _binary_map_header(data)
+        if count == 0:
+            return None
+        key, offset = _read_binary_str(data, offset, serializer)
+        if key != TAG_KEY:
+            return None
+        return _read_binary_str(data, offset, serializer)[0]
+    except (IndexError, ValueError):
+        return None
+
+
+def _embed_binary_tag(data: bytes, serializer: Serializer, tag: str) -> bytes:
+    """Embed a tag as the first key of a MessagePack or CBOR map, by rewriting the map header.
+
+    Args:
+        data (bytes): Serialized data.
+        serializer (Serializer): Binary format.
+        tag (str): Tag to embed.
+
+    Returns:
+        bytes: Serialized data with the tag embedded.
+    """    
+    serializer_data, count, offset = _binary_map_header(data)
+    assert serializer_data == serializer, f"Can only tag {serializer.value} maps"
+    header = data[:offset] if count is None else _binary_map_header_bytes(serializer, count + 1)
+    return header + _binary_str_bytes(serializer, TAG_KEY) + _binary_str_bytes(serializer, tag) + data[offset:]
+
+
+def strip_tag(data: Union[dict,str]) -> Union[dict,str]:
+    """Remove the tag from a dictionary. Strings are returned unchanged.
+
+    Args:
+        data (Union[dict,str]): Serialized data.
+
+    Returns:
+        Union[dict,str]: Serialized data without the tag.
+    """    
+    if type(data) == dict and TAG_KEY in data:
+        return {k: v for k, v in data.items() if k != TAG_KEY} # type: ignore
+    return data
+
+
+def serialize(obj: object, label: Optional[str] = None) -> Union[dict,str,bytes]:
     """Serialize an object.
 
     Args:
-        obj (object): Object to serialize.
+        obj (object): Object to serialize. Lazy proxies are loaded.
+        label (Optional[str], optional): If provided, embed a tag with the schema label and version so that `load` can skip trial deserialization. Defaults to None.
 
     Returns:
-        Union[dict,str]: Serialized object.
+        Union[dict,str,bytes]: Serialized object. Bytes for binary formats.
     """    
+    obj = materialize(obj)
     cls = type(obj)
     serializer = check_serializer(cls)
-    return serialize_obj(obj, serializer)
+    data = serialize_obj(obj, serializer)
+    if label is not None:
+        data = embed_tag(data, serializer, make_tag(label, cls))
+    return data
 
 
-def serialize_to_str(obj: object) -> str:
+def serialize_to_str(obj: object, label: Optional[str] = None) -> str:
     """Serialize an object to a string, and not a dictionary (uses json.dumps to serialize to a string).
 
     Args:
         obj (object): Object to serialize.
+        label (Optional[str], optional): If provided, embed a tag with the schema label and version. Defaults to None.
 
     Raises:
-        ValueError: Unknown type.
+        ValueError: Unknown type, e.g. bytes for binary formats. Use `serialize_to_bytes` for those.
 
     Returns:
         str: Serialized object.
     """    
-    d = serialize(obj)
+    d = serialize(obj, label=label)
     if type(d) == dict:
-        import json
         return json.dumps(d)
     elif type(d) == str:
         return d
@@ -106,6 +415,22 @@ def serialize_to_str(obj: object) -> str:
         raise ValueError(f"Unknown type: {type(d)}")
 
 
+def serialize_to_bytes(obj: object, label: Optional[str] = None) -> bytes:
+    """Serialize an object to bytes, as written to files: UTF-8 encoded text for text formats (with json.dumps for dictionaries), or the binary data for binary formats.
+
+    Args:
+        obj (object): Object to serialize.
+        label (Optional[str], optional): If provided, embed a tag with the schema label and version. Defaults to None.
+
+    Returns:
+        bytes: Serialized object.
+    """    
+    d = serialize(obj, label=label)
+    if type(d) == bytes:
+        return d
+    return (json.dumps(d) if type(d) == dict else d).encode("utf-8") # type: ignore
+
+
 def deserialize_obj(data: Union[dict,str], cls: type, serializer: Serializer) -> object:
     """Deserialize an object.
 
@@ -129,6 +454,12 @@ def deserialize_obj(data: Union[dict,str], cls: type, serializer: Serializer) ->
     elif serializer == Serializer.TOML:
         assert hasattr(cls, "to_toml") and hasattr(cls, "from_toml"), f"Serializer class must have to_toml/from_toml methods"
         return cls.from_toml(data) # type: ignore
+    elif serializer == Serializer.MSGPACK:
+        assert hasattr(cls, "to_msgpack") and hasattr(cls, "from_msgpack"), f"Serializer class must have to_msgpack/from_msgpack methods"
+        return cls.from_msgpack(data) # type: ignore
+    elif serializer == Serializer.CBOR:
+        assert hasattr(cls, "to_cbor") and hasattr(cls, "from_cbor"), f"Serializer class must have to_cbor/from_cbor methods"
+        return cls.from_cbor(data) # type: ignore
     elif serializer == Serializer.DICT:
         assert hasattr(cls, "to_dict") and hasattr(cls, "from_dict"), f"Serializer class must have to_dict/from_dict methods"
         assert type(data) == dict, f"Type of data must be dict, not {type(data)}: {data}"
@@ -137,31 +468,262 @@ def deserialize_obj(data: Union[dict,str], cls: type, serializer: Serializer) ->
         raise ValueError(f"Unknown serializer: {serializer}")
 
 
-def deserialize(data: Union[dict,str], cls: type) -> object:
+def deserialize(data: Any, cls: type) -> object:
     """Deserialize an object.
 
     Args:
-        data (Union[dict,str]): Data to deserialize.
+        data (Any): Data to deserialize: a dictionary, a string, binary data (see `BUFFER_TYPES`), a path, or a binary file object.
         cls (type): Class to deserialize to.
 
     Returns:
         object: Deserialized object.
     """    
-    serializer = check_serializer(cls)    
-    return deserialize_obj(data, cls, serializer)
+    if type(data) == dict or type(data) == str:
+        serializer = check_serializer(cls)    
+        return deserialize_obj(data, cls, serializer)
+    with open_input(data) as data_in:
+        return ParseOnce(data_in).deserialize(cls)
 
 
-def write_obj(obj: object, dir_name: str, bname_wo_ext: str):
+def is_input_source(data: Any) -> bool:
+    """Whether data is a source to read serialized data from, i.e. a path or a file object, rather than the serialized data itself. Strings are always data: wrap file names in `pathlib.Path`.
+
+    Args:
+        data (Any): Data.
+
+    Returns:
+        bool: True for paths and file objects.
+    """    
+    return isinstance(data, os.PathLike) or (hasattr(data, "read") and not isinstance(data, mmap.mmap))
+
+
+@contextlib.contextmanager
+def open_input(data: Any) -> Iterator[Any]:
+    """Open a source of serialized data. Files of at least `MMAP_MIN_SIZE` bytes are memory-mapped, so that parsers read the mapping without a copy of the whole file; smaller files are read. Other data is used as is.
+
+    Args:
+        data (Any): Path, binary file object, or serialized data.
+
+    Yields:
+        Iterator[Any]: Serialized data: a dictionary, a string, or binary data. Memory maps are closed on exit.
+    """    
+    if not is_input_source(data):
+        yield data
+        return
+
+    f = open(data, "rb") if isinstance(data, os.PathLike) else data
+    try:
+        mm = None
+        try:
+            fileno = f.fileno()
+            if os.fstat(fileno).st_size >= MMAP_MIN_SIZE:
+                mm = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            mm = None
+
+        if mm is None:
+            data_in = f.read()
+            assert isinstance(data_in, BUFFER_TYPES), f"File objects must be opened in binary mode, not: {f}"
+            yield data_in
+        else:
+            try:
+                yield mm
+            finally:
+                mm.close()
+    finally:
+        if f is not data:
+            f.close()
+
+
+def _decoder_input(data: Any, serializer: Serializer) -> Any:
+    """Binary data converted to an input the default decoder of a format accepts. Binary formats are parsed from the data directly, YAML from a stream over the data, and JSON and TOML from one decoded string, since their parsers only accept strings.
+
+    Args:
+        data (Any): Serialized data.
+        serializer (Serializer): Serializer format.
+
+    Returns:
+        Any: Input for the decoder. Other data is returned as is.
+    """    
+    if not isinstance(data, BUFFER_TYPES) or serializer in BINARY_SERIALIZERS:
+        return data
+    if serializer == Serializer.YAML:
+        if isinstance(data, mmap.mmap):
+            data.seek(0)
+            return data
+        return io.BytesIO(data)
+    return str(data, "utf-8")
+
+
+_FROM_METHODS = {
+    Serializer.JSON: "from_json",
+    Serializer.YAML: "from_yaml",
+    Serializer.TOML: "from_toml",
+    Serializer.MSGPACK: "from_msgpack",
+    Serializer.CBOR: "from_cbor",
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def decoder_for_cls(cls: type, serializer: Serializer) -> Optional[Callable[[Any], Any]]:
+    """Default decoder used by a class to parse strings, if the class exposes one (e.g. `mashumaro` mixins do).
+
+    Args:
+        cls (type): Class to deserialize to.
+        serializer (Serializer): Serializer format.
+
+    Returns:
+        Optional[Callable[[Any], Any]]: Decoder from string to a Python structure, or None if the class does not accept a decoder.
+    """    
+    method = _FROM_METHODS.get(serializer)
+    if method is None or not hasattr(cls, method):
+        return None
+    try:
+        param = inspect.signature(getattr(cls, method)).parameters.get("decoder")
+    except (TypeError, ValueError):
+        return None
+    if param is None or param.default is inspect.Parameter.empty or not callable(param.default):
+        return None
+    return param.default
+
+
+class ParseOnce:
+    """Deserialize the same data with several classes, parsing string and binary data only once per decoder.
+
+    For classes that accept a `decoder` argument (e.g. `mashumaro` mixins), the string is parsed with the class's own default decoder, and the parsed structure is handed to the class, so the result is identical to deserializing the string directly. Other classes deserialize the string as usual.
+    """    
+
+    def __init__(self, data: Any, transform: Optional[Callable[[dict], dict]] = None):
+        """Constructor.
+
+        Args:
+            data (Any): Data to deserialize: a dictionary, a string or binary data.
+            transform (Optional[Callable[[dict], dict]], optional): Function applied to the data once parsed as a dictionary, before any class deserializes it. Args: payload. Returns: payload, or a changed copy. Defaults to None.
+        """        
+        self.data = strip_tag(data)
+        self.is_buffer = isinstance(data, BUFFER_TYPES)
+        self.transform = transform
+
+        # Whether the transform changed the data
+        self.transformed = False
+        self._parsed: Dict[Callable[[Any], Any], Tuple[bool,Any]] = {}
+        if transform is not None and type(self.data) == dict:
+            self.data = self._transform(self.data) # type: ignore
+
+
+    def _transform(self, payload: dict) -> dict:
+        """Apply the transform to a parsed dictionary.
+
+        Args:
+            payload (dict): Parsed data.
+
+        Returns:
+            dict: Transformed data.
+        """        
+        payload_new = self.transform(payload) # type: ignore
+        self.transformed = self.transformed or payload_new is not payload
+        return payload_new
+
+
+    def _decoder(self, cls: type, serializer: Serializer) -> Optional[Callable[[Any], Any]]:
+        """Decoder to parse the data with for a class. Binary data is parsed as JSON for classes deserialized from dictionaries.
+
+        Args:
+            cls (type): Class to deserialize to.
+            serializer (Serializer): Serializer format of the class.
+
+        Returns:
+            Optional[Callable[[Any], Any]]: Decoder, or None if the data is not parsed first.
+        """        
+        if type(self.data) == dict:
+            return None
+        if self.is_buffer and serializer == Serializer.DICT:
+            return json.loads
+        return decoder_for_cls(cls, serializer)
+
+
+    def parsed(self, decoder: Callable[[Any], Any], serializer: Serializer = Serializer.JSON) -> Any:
+        """Data parsed with a decoder, parsing only on first use.
+
+        Args:
+            decoder (Callable[[Any], Any]): Decoder.
+            serializer (Serializer, optional): Serializer format of the decoder, used to convert binary data to an input it accepts. Defaults to Serializer.JSON.
+
+        Raises:
+            Exception: The exception raised by the decoder, if parsing failed.
+
+        Returns:
+            Any: Parsed data, without the tag.
+        """        
+        if decoder not in self._parsed:
+            try:
+                parsed = strip_tag(decoder(_decoder_input(self.data, serializer)))
+                if self.transform is not None and type(parsed) == dict:
+                    parsed = self._transform(parsed)
+                self._parsed[decoder] = (True, parsed)
+            except Exception as e:
+                self._parsed[decoder] = (False, e)
+        ok, parsed = self._parsed[decoder]
+        if not ok:
+            raise parsed
+        return parsed
+
+
+    def as_dict(self, cls: type) -> Optional[dict]:
+        """Data as a dictionary, parsed as the class would parse it.
+
+        Args:
+            cls (type): Class the data was serialized from.
+
+        Returns:
+            Optional[dict]: Parsed data, without the tag, or None if the class does not expose its decoder.
+        """        
+        if type(self.data) == dict:
+            return self.data # type: ignore
+        serializer = check_serializer(cls)
+        decoder = self._decoder(cls, serializer)
+        if decoder is None:
+            return None
+        parsed = self.parsed(decoder, serializer)
+        return parsed if type(parsed) == dict else None
+
+
+    def deserialize(self, cls: type) -> object:
+        """Deserialize the data.
+
+        Args:
+            cls (type): Class to deserialize to.
+
+        Returns:
+            object: Deserialized object.
+        """        
+        serializer = check_serializer(cls)
+        decoder = self._decoder(cls, serializer)
+        if decoder is None:
+            return deserialize_obj(str(self.data, "utf-8") if self.is_buffer and serializer not in BINARY_SERIALIZERS else self.data, cls, serializer)
+        
+        parsed = self.parsed(decoder, serializer)
+        if serializer == Serializer.DICT:
+            return deserialize_obj(parsed, cls, serializer)
+        return getattr(cls, _FROM_METHODS[serializer])(self.data, decoder=lambda _: parsed)
+
+
+def write_obj(obj: object, dir_name: str, bname_wo_ext: str, label: Optional[str] = None) -> int:
     """Write an object to a file.
 
     Args:
-        obj (object): Object to write.
+        obj (object): Object to write. Lazy proxies are loaded.
         dir_name (str): Directory to write to.
         bname_wo_ext (str): Basename without extension.
+        label (Optional[str], optional): If provided, embed a tag with the schema label and version. Defaults to None.
 
     Raises:
         ValueError: Unknown serializer.
+
+    Returns:
+        int: Number of bytes written.
     """    
+    obj = materialize(obj)
     cls = type(obj)
     serializer = check_serializer(cls)
 
@@ -169,17 +731,106 @@ def write_obj(obj: object, dir_name: str, bname_wo_ext: str):
     def file_path(ext: str):
         return os.path.join(dir_name, f"{bname_wo_ext}.{ext}")
 
+    fp = file_path(file_ext(serializer))
+    with open(fp, "wb") as f:
+        return f.write(serialize_to_bytes(obj, label=label))
+
+
+def file_ext(serializer: Serializer) -> str:
+    """File extension for a serializer format.
+
+    Args:
+        serializer (Serializer): Serializer format.
+
+    Raises:
+        ValueError: Unknown serializer.
+
+    Returns:
+        str: File extension, without the dot.
+    """    
     if serializer == Serializer.DICT:
-        ext = "json"
+        return "json"
     elif serializer == Serializer.JSON:
-        ext = "json"
+        return "json"
+    elif serializer == Serializer.YAML:
+        return "yaml"
+    elif serializer == Serializer.TOML:
+        return "toml"
+    elif serializer == Serializer.MSGPACK:
+        return "msgpack"
+    elif serializer == Serializer.CBOR:
+        return "cbor"
+    else:
+        raise ValueError(f"Unknown serializer: {serializer}")
+
+
+def serializer_for_ext(ext: str) -> Optional[Serializer]:
+    """Serializer format for a file extension.
+
+    Args:
+        ext (str): File extension, with or without the dot.
+
+    Returns:
+        Optional[Serializer]: Serializer format, or None if the extension is not known.
+    """    
+    return {
+        "json": Serializer.JSON,
+        "yaml": Serializer.YAML,
+        "yml": Serializer.YAML,
+        "toml": Serializer.TOML,
+        "msgpack": Serializer.MSGPACK,
+        "mpk": Serializer.MSGPACK,
+        "cbor": Serializer.CBOR
+        }.get(ext.lower().lstrip("."))
+
+
+def parse_str(data: Union[str,bytes], serializer: Serializer) -> Any:
+    """Parse a string to a Python structure, for classes that deserialize from dictionaries.
+
+    Args:
+        data (Union[str,bytes]): Data to parse. Bytes for binary formats.
+        serializer (Serializer): Serializer format of the data.
+
+    Raises:
+        ValueError: Unknown serializer.
+
+    Returns:
+        Any: Parsed data.
+    """    
+    if serializer in (Serializer.JSON, Serializer.DICT):
+        return json.loads(data)
     elif serializer == Serializer.YAML:
-        ext = "yaml"
+        import yaml
+        return yaml.safe_load(data)
     elif serializer == Serializer.TOML:
-        ext = "toml"
+        import tomllib
+        return tomllib.loads(data) # type: ignore
+    elif serializer == Serializer.MSGPACK:
+        import msgpack
+        return msgpack.unpackb(data)
+    elif serializer == Serializer.CBOR:
+        import cbor2
+        return cbor2.loads(data)
     else:
         raise ValueError(f"Unknown serializer: {serializer}")
 
-    fp = file_path(ext)
-    with open(fp, "w") as f:
-        f.write(serialize_to_str(obj))
+
+def write_atomic(fname: str, data: Union[str,bytes]):
+    """Write to a file atomically: the data is written to a temporary file in the same directory, which then replaces the file.
+
+    Args:
+        fname (str): File name.
+        data (Union[str,bytes]): Data to write.
+    """    
+    dir_name = os.path.dirname(fname) or "."
+    os.makedirs(dir_name, exist_ok=True)
+    fname_tmp = os.path.join(dir_name, f".{os.path.basename(fname)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(fname_tmp, "wb" if type(data) == bytes else "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(fname_tmp, fname)
+    finally:
+        if os.path.exists(fname_tmp):
+            os.remove(fname_tmp)
@@ -0,0 +1,204 @@
+from dataclasses import dataclass, fields, is_dataclass, MISSING
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+from types import MappingProxyType, NoneType, UnionType
+from mashumaro import DataClassDictMixin
+import collections.abc
+import functools
+
+
+@dataclass(frozen=True)
+class FieldSignature:
+    """Signature of the serialized dictionary of a class, derived from its dataclass fields.
+    """    
+
+    cls: type
+    "Class of the signature."
+
+    required_keys: FrozenSet[str]
+    "Keys without a default, which must be present."
+
+    keys: FrozenSet[str]
+    "All keys."
+
+    key_types: Mapping[str,Any]
+    "Type of the value for each key, where known."
+
+    mapping_keys: FrozenSet[str]
+    "Keys whose values must be dictionaries, e.g. nested dataclasses."
+
+    key_kinds: Mapping[str,FrozenSet[str]]
+    "Kinds of serialized values expected for each key, see `value_kind`, for keys whose type has known kinds."
+
+    def matches(self, payload: dict) -> bool:
+        """Whether a serialized dictionary matches the signature: all required keys are present, there are no unknown keys, and the values have the kinds the types of their keys expect, e.g. a string for a `str` field.
+
+        Args:
+            payload (dict): Serialized dictionary.
+
+        Returns:
+            bool: True if the dictionary matches.
+        """        
+        payload_keys = payload.keys()
+        if not self.required_keys <= payload_keys or not payload_keys <= self.keys:
+            return False
+        return all(value_kind(payload[k]) in kinds for k, kinds in self.key_kinds.items() if k in payload)
+
+
+    def excludes(self, payload: dict) -> bool:
+        """Whether deserializing a serialized dictionary with the class certainly fails: a required key is missing, or a key that needs a dictionary has another value. Unknown keys do not exclude the class, since they may be ignored.
+
+        Args:
+            payload (dict): Serialized dictionary.
+
+        Returns:
+            bool: True if the dictionary cannot be deserialized with the class.
+        """        
+        if not self.required_keys <= payload.keys():
+            return True
+        return any(type(payload[k]) != dict for k in self.mapping_keys if k in payload)
+
+
+_VALUE_KINDS = { bool: "bool", int: "int", float: "float", str: "str", list: "list", tuple: "list", dict: "dict", NoneType: "null" }
+
+_SCALAR_KINDS = { bool: frozenset({ "bool" }), int: frozenset({ "int" }), float: frozenset({ "int", "float" }), str: frozenset({ "str" }), NoneType: frozenset({ "null" }) }
+
+
+def value_kind(value: Any) -> str:
+    """Kind of a serialized value.
+
+    Args:
+        value (Any): Serialized value.
+
+    Returns:
+        str: One of "bool", "int", "float", "str", "list", "dict", "null", or "other".
+    """    
+    return _VALUE_KINDS.get(type(value), "other")
+
+
+def _kinds_for_type(tp: Any) -> Optional[FrozenSet[str]]:
+    """Kinds of the serialized values of a type, see `value_kind`: scalars, lists for collections, dictionaries for dataclasses and mappings, and unions of these.
+
+    Args:
+        tp (Any): Type.
+
+    Returns:
+        Optional[FrozenSet[str]]: Kinds, or None if they are not known, e.g. for enums or dates, whose serialized values depend on the serializer.
+    """    
+    if tp in _SCALAR_KINDS:
+        return _SCALAR_KINDS[tp]
+    if _requires_mapping(tp):
+        return frozenset({ "dict" })
+    origin = get_origin(tp) or tp
+    if origin is Union or origin is UnionType:
+        kinds_args = [ _kinds_for_type(arg) for arg in get_args(tp) ]
+        return frozenset().union(*kinds_args) if all(kinds is not None for kinds in kinds_args) else None # type: ignore
+    if isinstance(origin, type) and issubclass(origin, collections.abc.Collection) and not issubclass(origin, (str, bytes, bytearray)):
+        return frozenset({ "list" })
+    return None
+
+
+def _requires_mapping(tp: Any) -> bool:
+    """Whether values of a type must be deserialized from dictionaries.
+
+    Args:
+        tp (Any): Type.
+
+    Returns:
+        bool: True for dataclasses and dictionaries.
+    """    
+    if isinstance(tp, type) and is_dataclass(tp):
+        return True
+    origin = get_origin(tp) or tp
+    return isinstance(origin, type) and issubclass(origin, collections.abc.Mapping)
+
+
+@functools.lru_cache(maxsize=None)
+def signature_for_cls(cls: type) -> Optional[FieldSignature]:
+    """Signature of a class. Only dataclasses deserialized by `mashumaro` have a signature, since their keys are known from the fields.
+
+    Args:
+        cls (type): Class.
+
+    Returns:
+        Optional[FieldSignature]: Signature, or None if the keys of the class are not known.
+    """    
+    if not is_dataclass(cls) or not issubclass(cls, DataClassDictMixin):
+        return None
+
+    # Keys deserialized by name or by alias are ambiguous
+    config = getattr(cls, "Config", None)
+    if getattr(config, "allow_deserialization_not_by_alias", False):
+        return None
+    aliases: Dict[str,str] = dict(getattr(config, "aliases", None) or {})
+
+    try:
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+
+    required_keys, keys, mapping_keys = set(), set(), set()
+    key_types, key_kinds = {}, {}
+    for f in fields(cls):
+        if not f.init:
+            continue
+        key = f.metadata.get("alias") or aliases.get(f.name) or f.name
+        keys.add(key)
+        if f.default is MISSING and f.default_factory is MISSING:
+            required_keys.add(key)
+        if f.name in hints:
+            key_types[key] = hints[f.name]
+            if _requires_mapping(hints[f.name]):
+                mapping_keys.add(key)
+            kinds = _kinds_for_type(hints[f.name])
+            if kinds is not None:
+                key_kinds[key] = kinds
+
+    return FieldSignature(
+        cls=cls,
+        required_keys=frozenset(required_keys),
+        keys=frozenset(keys),
+        key_types=MappingProxyType(key_types),
+        mapping_keys=frozenset(mapping_keys),
+        key_kinds=MappingProxyType(key_kinds)
+        )
+
+
+def is_ambiguous(sig1: FieldSignature, sig2: FieldSignature) -> bool:
+    """Whether some serialized dictionary matches both signatures: the required keys of each are keys of the other, and the values of the required keys can have kinds both expect.
+
+    Args:
+        sig1 (FieldSignature): First signature.
+        sig2 (FieldSignature): Second signature.
+
+    Returns:
+        bool: True if the signatures are ambiguous.
+    """    
+    required_keys = sig1.required_keys | sig2.required_keys
+    if not required_keys <= (sig1.keys & sig2.keys):
+        return False
+
+    # Optional keys can be left out, so only the kinds of required keys must be compatible
+    for key in required_keys:
+        kinds1, kinds2 = sig1.key_kinds.get(key), sig2.key_kinds.get(key)
+        if kinds1 is not None and kinds2 is not None and not kinds1 & kinds2:
+            return False
+    return True
+
+
+def find_ambiguities(cls: type, classes: List[type]) -> List[Tuple[type,type]]:
+    """Find classes whose signatures are ambiguous with that of a class.
+
+    Args:
+        cls (type): Class.
+        classes (List[type]): Classes to compare to.
+
+    Returns:
+        List[Tuple[type,type]]: Pairs of ambiguous classes, each of the form (other class, cls). Classes without a signature are ambiguous with all classes.
+    """    
+    sig = signature_for_cls(cls)
+    ambiguities = []
+    for other in classes:
+        sig_other = signature_for_cls(other)
+        if sig is None or sig_other is None or is_ambiguous(sig_other, sig):
+            ambiguities.append((other, cls))
+    return ambiguities
@@ -0,0 +1,312 @@
+from upandup.serializer import serialize_to_bytes
+from upandup.updater import UpdatePlan, get_updater
+from upandup.load import _parse
+from upandup.proxy import materialize
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from loguru import logger
+import sqlite3
+import threading
+
+
+Version = Union[type,str]
+"Version of a schema: a registered class, or its name."
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    label TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    version_index INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (label, key)
+);
+CREATE INDEX IF NOT EXISTS {table}_version ON {table} (label, version_index);
+"""
+
+
+class VersionedStore:
+    """Store of versioned objects in a SQLite database.
+
+    Each row holds the label, key, version (class name and its index in the update chain) and serialized payload of an object. Objects are stored at the version they are given in, and migrated to the latest version when read: `get` writes the migrated row back, and `upgrade` migrates all rows below a version in batched transactions. Nested data declared with `register_nested` is migrated too, including in rows at the latest version. Queries by version and the version histogram use the index, without deserializing the payloads.
+
+    The store can be shared between threads. Several processes can open the same database: rows are only migrated if they have not changed since they were read.
+    """    
+
+    def __init__(self, fname: str = ":memory:", table: str = "upandup_objects"):
+        """Constructor.
+
+        Args:
+            fname (str, optional): Database file. Defaults to ":memory:", for an in-memory database.
+            table (str, optional): Table of the objects, created if needed. Defaults to "upandup_objects".
+        """        
+        assert table.isidentifier(), f"Table name must be an identifier, not: {table}"
+        self.fname = fname
+        self.table = table
+        self._conn = sqlite3.connect(fname, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA.format(table=table))
+
+
+    def __enter__(self) -> "VersionedStore":
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def close(self):
+        """Close the database.
+        """        
+        with self._lock:
+            self._conn.close()
+
+
+    def put(self, label: str, key: str, obj: object):
+        """Store an object at its version, replacing any object with the same key.
+
+        Args:
+            label (str): Unique label for the schema.
+            key (str): Key of the object.
+            obj (object): Object of any registered class of the schema, or a lazy proxy.
+        """        
+        self.put_many(label, [ (key, obj) ])
+
+
+    def put_many(self, label: str, items: Iterable[Tuple[str,object]]):
+        """Store objects at their versions in one transaction, replacing any objects with the same keys.
+
+        Args:
+            label (str): Unique label for the schema.
+            items (Iterable[Tuple[str,object]]): Key and object of each row. Lazy proxies are loaded.
+        """        
+        plan = get_updater(label).plan
+        items = [ (key, materialize(obj)) for key, obj in items ]
+        rows = [ (label, key, *_version_of(plan, type(obj)), serialize_to_bytes(obj)) for key, obj in items ]
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT OR REPLACE INTO {self.table} (label, key, version, version_index, payload) VALUES (?, ?, ?, ?, ?)", rows)
+
+
+    def get(self, label: str, key: str, migrate: bool = True) -> Optional[object]:
+        """Load an object, updated to the latest version.
+
+        Args:
+            label (str): Unique label for the schema.
+            key (str): Key of the object.
+            migrate (bool, optional): Write the updated object back if it or its nested data was stored at an older version, so later reads need no updates. Defaults to True.
+
+        Returns:
+            Optional[object]: Object, or None if no object is stored with the key.
+        """        
+        updater = get_updater(label)
+        plan = updater.plan
+        with self._lock:
+            row = self._conn.execute(f"SELECT version, payload FROM {self.table} WHERE label = ? AND key = ?", (label, key)).fetchone()
+        if row is None:
+            return None
+
+        version, payload = row
+        parse_once = _parse(plan, payload)
+        obj = parse_once.deserialize(_cls_for_name(plan, version))
+        if type(obj) != plan.latest:
+            obj = updater.update(obj, plan=plan)
+        elif not parse_once.transformed:
+            return obj
+        if migrate:
+            self._write_migrated(label, plan, [ (key, payload, obj) ])
+        return obj
+
+
+    def delete(self, label: str, key: str) -> bool:
+        """Delete an object.
+
+        Args:
+            label (str): Unique label for the schema.
+            key (str): Key of the object.
+
+        Returns:
+            bool: True if an object was deleted.
+        """        
+        with self._lock, self._conn:
+            return self._conn.execute(f"DELETE FROM {self.table} WHERE label = ? AND key = ?", (label, key)).rowcount > 0
+
+
+    def keys(self, label: str, version: Optional[Version] = None, below: Optional[Version] = None) -> List[str]:
+        """Keys of the objects stored at a version, using the index. The payloads are not read.
+
+        Args:
+            label (str): Unique label for the schema.
+            version (Optional[Version], optional): Only objects stored at this version. Defaults to None.
+            below (Optional[Version], optional): Only objects stored at versions older than this one. Defaults to None.
+
+        Returns:
+            List[str]: Keys, sorted.
+        """        
+        where, params = self._version_filter(label, version, below)
+        with self._lock:
+            return [ key for key, in self._conn.execute(f"SELECT key FROM {self.table} WHERE {where} ORDER BY key", params) ]
+
+
+    def histogram(self, label: str) -> Dict[str,int]:
+        """Number of objects stored at each version, using the index. The payloads are not read.
+
+        Args:
+            label (str): Unique label for the schema.
+
+        Returns:
+            Dict[str,int]: Number of objects by class name, oldest version first. Versions without objects are not included.
+        """        
+        with self._lock:
+            rows = self._conn.execute(f"SELECT version, COUNT(*) FROM {self.table} WHERE label = ? GROUP BY version_index, version ORDER BY version_index", (label,)).fetchall()
+        return { version: count for version, count in rows }
+
+
+    def upgrade(self, label: str, below: Optional[Version] = None, batch_size: int = 1000) -> int:
+        """Migrate the objects stored at versions older than a version to the latest version. Each batch is read, updated with `Updater.update_many` per version, and written in one transaction. Identical nested data is migrated once per batch.
+
+        When migrating to the latest version, objects stored at the latest version whose nested data is older are migrated too, e.g. after updates were registered for a nested label.
+
+        Args:
+            label (str): Unique label for the schema.
+            below (Optional[Version], optional): Migrate objects stored at versions older than this one. Defaults to None, for the latest version.
+            batch_size (int, optional): Number of objects per transaction. Defaults to 1000.
+
+        Returns:
+            int: Number of objects migrated.
+        """        
+        assert batch_size > 0, f"Batch size must be positive, not: {batch_size}"
+        updater = get_updater(label)
+        plan = updater.plan
+        assert plan.latest is not None, f"No updates registered for label: {label}"
+        below = below if below is not None else plan.latest
+        where, params = self._version_filter(label, None, below)
+
+        no_migrated = 0
+        while True:
+            # Rows that changed since they were read are not written, and are read again in the next batch if still old
+            with self._lock:
+                rows = self._conn.execute(f"SELECT key, version, payload FROM {self.table} WHERE {where} LIMIT ?", (*params, batch_size)).fetchall()
+            if len(rows) == 0:
+                break
+
+            groups: Dict[str,List[Tuple[str,bytes]]] = {}
+            for key, version, payload in rows:
+                groups.setdefault(version, []).append((key, payload))
+            nested_memo: Dict[Tuple[str,str],Optional[dict]] = {}
+            migrated = []
+            for version, group in groups.items():
+                cls = _cls_for_name(plan, version)
+                objs = updater.update_many([ _parse(plan, payload, nested_memo).deserialize(cls) for _, payload in group ], plan=plan)
+                migrated += [ (key, payload, obj) for (key, payload), obj in zip(group, objs) ]
+            no_migrated += self._write_migrated(label, plan, migrated)
+            logger.debug("Migrated {} objects of {} to {}", no_migrated, label, plan.latest.__name__)
+
+        if len(plan.nested) and _version_of(plan, below)[1] == len(plan.cls_list) - 1:
+            no_migrated += self._upgrade_nested(label, plan, batch_size)
+        return no_migrated
+
+
+    def _upgrade_nested(self, label: str, plan: UpdatePlan, batch_size: int) -> int:
+        """Migrate the nested data of the objects stored at the latest version. Rows are read in batches in key order, and only rows whose nested data was migrated are written.
+
+        Args:
+            label (str): Unique label for the schema.
+            plan (UpdatePlan): Update plan for the schema.
+            batch_size (int): Number of objects per transaction.
+
+        Returns:
+            int: Number of objects migrated.
+        """        
+        version, version_index = _version_of(plan, plan.latest) # type: ignore
+        no_migrated, key_last = 0, ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(f"SELECT key, payload FROM {self.table} WHERE label = ? AND version_index = ? AND key > ? ORDER BY key LIMIT ?", (label, version_index, key_last, batch_size)).fetchall()
+            if len(rows) == 0:
+                break
+            key_last = rows[-1][0]
+
+            nested_memo: Dict[Tuple[str,str],Optional[dict]] = {}
+            migrated = []
+            for key, payload in rows:
+                parse_once = _parse(plan, payload, nested_memo)
+                obj = parse_once.deserialize(plan.latest) # type: ignore
+                if parse_once.transformed:
+                    migrated.append((key, payload, obj))
+            if len(migrated):
+                no_migrated += self._write_migrated(label, plan, migrated)
+                logger.debug("Migrated nested data of {} objects of {} at {}", no_migrated, label, version)
+        return no_migrated
+
+
+    def _version_filter(self, label: str, version: Optional[Version], below: Optional[Version]) -> Tuple[str,tuple]:
+        """SQL condition selecting the rows of a label at a version, or below a version.
+
+        Args:
+            label (str): Unique label for the schema.
+            version (Optional[Version]): Version of the rows, if any.
+            below (Optional[Version]): Version the rows are older than, if any.
+
+        Returns:
+            Tuple[str,tuple]: Condition and its parameters.
+        """        
+        where, params = "label = ?", (label,)
+        if version is None and below is None:
+            return where, params
+        plan = get_updater(label).plan
+        if version is not None:
+            where, params = where + " AND version_index = ?", params + (_version_of(plan, version)[1],)
+        if below is not None:
+            where, params = where + " AND version_index < ?", params + (_version_of(plan, below)[1],)
+        return where, params
+
+
+    def _write_migrated(self, label: str, plan: UpdatePlan, migrated: List[Tuple[str,bytes,object]]) -> int:
+        """Write migrated objects in one transaction. Rows that changed since they were read, e.g. migrated by another process, are not written.
+
+        Args:
+            label (str): Unique label for the schema.
+            plan (UpdatePlan): Plan the objects were updated with.
+            migrated (List[Tuple[str,bytes,object]]): Key, payload read, and updated object of each row.
+
+        Returns:
+            int: Number of rows written.
+        """        
+        version, version_index = _version_of(plan, plan.latest) # type: ignore
+        rows = [ (version, version_index, serialize_to_bytes(obj), label, key, payload) for key, payload, obj in migrated ]
+        with self._lock, self._conn:
+            no_written = 0
+            for row in rows:
+                no_written += self._conn.execute(f"UPDATE {self.table} SET version = ?, version_index = ?, payload = ? WHERE label = ? AND key = ? AND payload = ?", row).rowcount
+        return no_written
+
+
+def _version_of(plan: UpdatePlan, version: Version) -> Tuple[str,int]:
+    """Version name and index in the update chain of a version.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        version (Version): Registered class, or its name.
+
+    Returns:
+        Tuple[str,int]: Version name and index.
+    """    
+    cls = _cls_for_name(plan, version) if type(version) == str else version
+    assert cls in plan.cls_list, f"Class is not registered for label: {plan.label}: {cls}"
+    return plan.version_names[cls], plan.cls_list.index(cls) # type: ignore
+
+
+def _cls_for_name(plan: UpdatePlan, cls_name: str) -> type:
+    """Registered class with a name.
+
+    Args:
+        plan (UpdatePlan): Update plan for the schema.
+        cls_name (str): Class name.
+
+    Returns:
+        type: Class.
+    """    
+    cls = plan.cls_by_name.get(cls_name)
+    assert cls is not None, f"Class {cls_name} is not registered for label: {plan.label}"
+    return cls
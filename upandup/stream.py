@@ -0,0 +1,182 @@
+from upandup.load import LoadOptions, make_load_fn
+from upandup.serializer import Serializer, check_serializer
+from upandup.updater import get_updater
+from typing import Callable, Iterator, Optional, Any, IO, Tuple, Union
+from loguru import logger
+import os
+import re
+import json
+
+
+class StreamError(Exception):
+    """Error loading one record of a stream.
+    """    
+
+    def __init__(self, message: str, index: int, line_no: int):
+        """Constructor.
+
+        Args:
+            message (str): Error message.
+            index (int): Index of the record in the stream, starting from 0.
+            line_no (int): Line number where the record starts, starting from 1.
+        """        
+        super().__init__(message)
+        self.index = index
+        self.line_no = line_no
+
+
+_EXTENSIONS = {
+    ".jsonl": Serializer.JSON,
+    ".ndjson": Serializer.JSON,
+    ".json": Serializer.JSON,
+    ".yaml": Serializer.YAML,
+    ".yml": Serializer.YAML
+    }
+
+_YAML_DOC_START_RE = re.compile(r"^---(\s|$)")
+_YAML_DOC_END_RE = re.compile(r"^\.\.\.(\s|$)")
+
+
+def stream_serializer(label: str, fname: Optional[str] = None) -> Serializer:
+    """Serializer format of a stream: from the file extension if it is known, otherwise from the latest class of the schema (JSON Lines for dictionaries).
+
+    Args:
+        label (str): Unique label for the schema.
+        fname (Optional[str], optional): File name of the stream. Defaults to None.
+
+    Returns:
+        Serializer: Serializer format.
+    """    
+    if fname is not None:
+        ext = os.path.splitext(fname)[1].lower()
+        if ext in _EXTENSIONS:
+            return _EXTENSIONS[ext]
+
+    plan = get_updater(label).plan
+    assert plan.latest is not None, f"No updates registered for label: {label}"
+    serializer = check_serializer(plan.latest)
+    return Serializer.JSON if serializer == Serializer.DICT else serializer
+
+
+def _iter_json_lines(f: IO[str]) -> Iterator[Tuple[int,str]]:
+    """Iterate over the records of a JSON Lines stream.
+
+    Args:
+        f (IO[str]): Stream.
+
+    Yields:
+        Tuple[int,str]: Line number and text of each record.
+    """    
+    for line_no, line in enumerate(f, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def _iter_yaml_docs(f: IO[str]) -> Iterator[Tuple[int,str]]:
+    """Iterate over the documents of a multi-document YAML stream, holding only one document in memory.
+
+    Args:
+        f (IO[str]): Stream.
+
+    Yields:
+        Tuple[int,str]: Line number where each document starts and text of the document.
+    """    
+    lines = []
+    start_line_no = 1
+    def doc() -> Optional[str]:
+        text = "".join(lines)
+        is_empty = all(not l.strip() or l.lstrip().startswith("#") for l in lines)
+        return None if is_empty else text
+
+    for line_no, line in enumerate(f, start=1):
+        if _YAML_DOC_START_RE.match(line) or _YAML_DOC_END_RE.match(line):
+            text = doc()
+            if text is not None:
+                yield start_line_no, text
+            lines = []
+            start_line_no = line_no
+
+            # Content may follow the document start marker on the same line
+            if _YAML_DOC_START_RE.match(line):
+                lines.append(line[3:])
+        else:
+            lines.append(line)
+
+    text = doc()
+    if text is not None:
+        yield start_line_no, text
+
+
+def _parse_record(text: str, serializer: Serializer) -> Any:
+    """Parse a record for classes that only deserialize from dictionaries.
+
+    Args:
+        text (str): Text of the record.
+        serializer (Serializer): Serializer format of the stream.
+
+    Returns:
+        Any: Parsed record.
+    """    
+    if serializer == Serializer.YAML:
+        import yaml
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def load_stream(
+    label: str,
+    stream: Union[str,os.PathLike,IO[str]],
+    options: LoadOptions = LoadOptions(),
+    serializer: Optional[Serializer] = None,
+    raise_on_error: bool = False,
+    on_error: Optional[Callable[[StreamError], None]] = None
+    ) -> Iterator[object]:
+    """Load records one at a time from a JSON Lines or multi-document YAML stream, automatically updating each to the latest version if necessary.
+
+    The stream is read incrementally, so memory use does not depend on the size of the stream. Records that fail to load are reported with their position in the stream and skipped, unless `raise_on_error` is set.
+
+    Args:
+        label (str): Unique label for the schema.
+        stream (Union[str,os.PathLike,IO[str]]): File name or open text file.
+        options (LoadOptions, optional): Options. Defaults to LoadOptions().
+        serializer (Optional[Serializer], optional): Serializer format of the stream: JSON for JSON Lines or YAML for multi-document YAML. Defaults to None, in which case it is detected from the file extension or the latest class of the schema.
+        raise_on_error (bool, optional): Raise a StreamError for the first record that fails to load. Defaults to False.
+        on_error (Optional[Callable[[StreamError], None]], optional): Called with a StreamError for each record that fails to load. Defaults to None.
+
+    Raises:
+        StreamError: A record failed to load and `raise_on_error` is set.
+
+    Yields:
+        Iterator[object]: Objects loaded from the records, in order.
+    """    
+    if isinstance(stream, (str, os.PathLike)):
+        with open(stream, "r", encoding="utf-8") as f:
+            yield from load_stream(label, f, options,
+                serializer=serializer or stream_serializer(label, os.fspath(stream)),
+                raise_on_error=raise_on_error,
+                on_error=on_error
+                )
+        return
+
+    if serializer is None:
+        serializer = stream_serializer(label, getattr(stream, "name", None))
+    assert serializer in (Serializer.JSON, Serializer.YAML), f"Streams must be JSON Lines or multi-document YAML, not: {serializer}"
+    records = _iter_yaml_docs(stream) if serializer == Serializer.YAML else _iter_json_lines(stream)
+
+    # Classes that deserialize only from dictionaries need the records parsed
+    plan = get_updater(label).plan
+    parse = plan.latest is not None and check_serializer(plan.latest) == Serializer.DICT
+
+    load_fn = make_load_fn(label)
+    for index, (line_no, text) in enumerate(records):
+        try:
+            obj = load_fn(_parse_record(text, serializer) if parse else text, options)
+        except Exception as e:
+            err = StreamError(f"Could not load record {index} at line {line_no}: {e}", index=index, line_no=line_no)
+            if raise_on_error:
+                raise err from e
+            logger.warning(str(err))
+            if on_error is not None:
+                on_error(err)
+            continue
+        yield obj
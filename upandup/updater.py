@@ -1,9 +1,19 @@
-from upandup.serializer import deserialize, serialize, write_obj
-from dataclasses import dataclass
-from typing import Callable, List, Optional, Any, Dict
+from upandup.serializer import deserialize, serialize, write_obj, qualified_name
+from upandup.signature import FieldSignature, signature_for_cls, find_ambiguities
+from upandup.metrics import LabelMetrics, MetricEvent
+from upandup import metrics
+from upandup.lazy import resolve_lazy, lazy_registrations, resolving
+from upandup.ordering import CandidateOrder
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable, Iterator, List, Optional, Any, Dict, Tuple, Mapping, FrozenSet
+from types import MappingProxyType
+from collections import Counter
 from loguru import logger
 import os
+import copy
 import json
+import threading
+import time
 from mashumaro import DataClassDictMixin
 
 
@@ -21,12 +31,252 @@ class UpdateInfo:
     cls_end: type
     "Class to update to."
 
-    fn_update: Callable[[type,type,object], object]
-    "Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end."
+    fn_update: Optional[Callable[[type,type,object], object]]
+    "Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end. None for dict-level steps."
+
+    fn_update_dict: Optional[Callable[[dict], dict]] = None
+    "Function to update the serialized dictionary of the start class to that of the end class, for dict-level steps. Args: dict_start. Returns: dict_end."
+
+    fn_update_columns: Optional[Callable[[Any], Any]] = None
+    "Vectorized function updating a table of serialized records of the start class to those of the end class, used by `load_table`. Args: df_start, a pandas DataFrame. Returns: df_end. None to update the rows of the table one by one."
+
+    cost: Optional[float] = None
+    "Relative cost of the step, used to plan the cheapest path to the latest class. None for the default cost of 1."
+
+    @property
+    def is_dict_level(self) -> bool:
+        """Whether the step updates serialized dictionaries instead of objects.
+
+        Returns:
+            bool: True for dict-level steps.
+        """        
+        return self.fn_update_dict is not None
+
+
+@dataclass(frozen=True)
+class UpdatePlan:
+    """Immutable plan for updating objects of a schema, compiled when update steps are registered.
+    """    
+
+    label: str
+    "Label for the schema."
+
+    updates: Tuple[UpdateInfo, ...]
+    "Update steps, in order."
+
+    cls_list: Tuple[type, ...]
+    "Classes involved in the update, in order. Empty if no update steps are registered."
+
+    step_index: Mapping[type,int]
+    "Index of the update step starting from each class. The latest class has no entry."
+
+    cls_newest_first: Tuple[type, ...]
+    "Classes involved in the update, most recent first. This is the order classes are tried in when deserializing."
+
+    cls_by_name: Mapping[str,type]
+    "Class for each version name, and for each module and qualified name. A `__name__` shared by several classes names the earliest of them, which it named in tags and stores before the later ones were registered."
+
+    version_names: Mapping[type,str]
+    "Name identifying each class in tags and stores: its `__name__`, or its module and qualified name if other classes of the chain share the `__name__`, e.g. `v1.Config` and `v2.Config`."
+
+    signatures: Mapping[type,Optional[FieldSignature]]
+    "Signature of the serialized dictionary for each class, used to find the class of serialized data without trial deserialization. None for classes whose keys are not known."
+
+    ambiguities: Tuple[Tuple[type,type], ...]
+    "Pairs of classes whose signatures some serialized data can match at once. Data matching several classes is resolved by trial deserialization."
+
+    signatures_check_values: bool
+    "Whether matching some signature depends on the values of serialized data, and not only on its keys."
+
+    chains: Mapping[type,Callable[[object,Any],object]]
+    "Precomposed function updating an object of each class to the latest class. Args: obj_start, options. Returns: obj_end."
+
+    dict_chains: Mapping[type,Callable[[dict,Any],object]]
+    "Precomposed function updating a serialized dictionary of each class to an object of the latest class, for classes whose first step is dict-level. Args: dict_start, options. Returns: obj_end."
+
+    shortcuts: Tuple[UpdateInfo, ...]
+    "Shortcut steps, each updating from one class directly to a later class than the next one."
+
+    paths: Mapping[type,Tuple[UpdateInfo, ...]]
+    "Cheapest path of update and shortcut steps from each class to the latest class. The chains follow these paths."
+
+    nested: Tuple[Tuple[str,str], ...]
+    "Keys of the serialized data holding nested data of other labels, each with its label. Nested data is migrated to its latest version before the data is deserialized."
+
+    candidates_by_keys: Dict[FrozenSet[Any],Tuple[type, ...]] = field(default_factory=dict, compare=False)
+    "Memo of the classes to try for each set of keys of serialized data, paired with the types of their values if some signature checks their kinds."
+
+    candidate_order: Optional[CandidateOrder] = field(default=None, compare=False)
+    "Observed frequencies of the classes data is deserialized with, to try the most frequent first, or None if adaptive ordering is disabled. Kept when the plan is recompiled."
+
+    @property
+    def latest(self) -> Optional[type]:
+        """Latest class, or None if no update steps are registered.
+
+        Returns:
+            Optional[type]: Latest class.
+        """        
+        return self.cls_list[-1] if len(self.cls_list) else None
+
+
+def _segments(steps: Tuple[UpdateInfo, ...]) -> List[Tuple[bool,Tuple[UpdateInfo, ...]]]:
+    """Split update steps into runs of consecutive object-level or dict-level steps.
+
+    Args:
+        steps (Tuple[UpdateInfo, ...]): Update steps, in order.
+
+    Returns:
+        List[Tuple[bool,Tuple[UpdateInfo, ...]]]: Runs of steps, in order, each with a flag that is True for dict-level runs.
+    """    
+    segments: List[Tuple[bool,Tuple[UpdateInfo, ...]]] = []
+    for info in steps:
+        if len(segments) and segments[-1][0] == info.is_dict_level:
+            segments[-1] = (info.is_dict_level, segments[-1][1] + (info,))
+        else:
+            segments.append((info.is_dict_level, (info,)))
+    return segments
+
+
+def _update_dict_steps(dicts: List[dict], steps: Tuple[UpdateInfo, ...], options: Any) -> List[object]:
+    """Run consecutive dict-level steps on serialized dictionaries, instantiating only the end class. If versions are written, the intermediate objects are also instantiated.
+
+    Args:
+        dicts (List[dict]): Serialized dictionaries of the start class of the first step.
+        steps (Tuple[UpdateInfo, ...]): Consecutive dict-level update steps.
+        options (Any): Options.
+
+    Returns:
+        List[object]: Objects of the end class of the last step, in the same order.
+    """    
+    logger.debug("Updating {} {} dicts from {} to {}", len(dicts), steps[0].label, steps[0].cls_start.__name__, steps[-1].cls_end.__name__)
+    recorder = metrics.recorder
+    for info in steps:
+        fn_update_dict = info.fn_update_dict
+        if recorder is None:
+            dicts = [ fn_update_dict(d) for d in dicts ] # type: ignore
+        else:
+            t_start = time.perf_counter()
+            dicts = [ fn_update_dict(d) for d in dicts ] # type: ignore
+            recorder.record(MetricEvent("step", info.label, time.perf_counter() - t_start, name=step_name(info.label, info.cls_start, info.cls_end), count=len(dicts)))
+
+        # Write versions if needed
+        if options.write_versions:
+            for d in dicts:
+                _write_obj_if_needed(info.label, info.cls_end.from_dict(d), options) # type: ignore
+
+    cls_end = steps[-1].cls_end
+    return [ cls_end.from_dict(d) for d in dicts ] # type: ignore
+
+
+def _make_chain(steps: Tuple[UpdateInfo, ...], start_from_dict: bool = False) -> Callable[[Any,Any],object]:
+    """Compose update steps into a single function. Consecutive dict-level steps are fused, so only the end class of each run is instantiated.
+
+    Args:
+        steps (Tuple[UpdateInfo, ...]): Update steps, in order.
+        start_from_dict (bool, optional): Whether the function takes the serialized dictionary of the start class instead of an object. The first step must be dict-level. Defaults to False.
+
+    Returns:
+        Callable[[Any,Any],object]: Function updating an object through all steps. Args: obj_start (or dict_start), options. Returns: obj_end.
+    """    
+    segments = _segments(steps)
+    assert not start_from_dict or segments[0][0], "First step must be dict-level to start from a dictionary"
+    def chain(obj: Any, options: Any) -> object:
+        is_dict = start_from_dict
+        recorder = metrics.recorder
+        for is_dict_level, segment in segments:
+            if is_dict_level:
+                obj = _update_dict_steps([ obj if is_dict else obj.to_dict() ], segment, options)[0] # type: ignore
+                is_dict = False
+                continue
+
+            for info in segment:
+                logger.debug("Updating {} from {} to {}", info.label, info.cls_start.__name__, info.cls_end.__name__)
+                if recorder is None:
+                    obj = _update_step(obj, info)
+                else:
+                    t_start = time.perf_counter()
+                    obj = _update_step(obj, info)
+                    recorder.record(MetricEvent("step", info.label, time.perf_counter() - t_start, name=step_name(info.label, info.cls_start, info.cls_end)))
+
+                # Write versions if needed
+                _write_obj_if_needed(info.label, obj, options)
+        return obj
+    return chain
+
+
+def _plan_paths(cls_list: Tuple[type, ...], steps: Tuple[UpdateInfo, ...]) -> Dict[type,Tuple[UpdateInfo, ...]]:
+    """Find the cheapest path from each class to the latest class. All steps go from older to newer classes, so the paths are found in one pass from the latest class back. Ties are broken by the number of steps, and then in favor of the registered order.
+
+    Args:
+        cls_list (Tuple[type, ...]): Classes involved in the update, in order.
+        steps (Tuple[UpdateInfo, ...]): Update and shortcut steps.
+
+    Returns:
+        Dict[type,Tuple[UpdateInfo, ...]]: Path for each class except the latest.
+    """    
+    steps_from: Dict[type,List[UpdateInfo]] = {}
+    for info in steps:
+        steps_from.setdefault(info.cls_start, []).append(info)
+
+    best: Dict[type,Tuple[float,int,Tuple[UpdateInfo, ...]]] = { cls_list[-1]: (0.0, 0, ()) } if len(cls_list) else {}
+    for cls in reversed(cls_list[:-1]):
+        for info in steps_from.get(cls, []):
+            cost_end, no_steps_end, path_end = best[info.cls_end]
+            candidate = (cost_end + (info.cost if info.cost is not None else 1.0), no_steps_end + 1, (info,) + path_end)
+            if cls not in best or candidate[:2] < best[cls][:2]:
+                best[cls] = candidate
+    return { cls: path for cls, (_, _, path) in best.items() if len(path) }
+
+
+def compile_plan(label: str, updates: Tuple[UpdateInfo, ...], ambiguities: Tuple[Tuple[type,type], ...] = (), shortcuts: Tuple[UpdateInfo, ...] = (), candidate_order: Optional[CandidateOrder] = None, nested: Tuple[Tuple[str,str], ...] = ()) -> UpdatePlan:
+    """Compile update steps into an update plan.
+
+    Args:
+        label (str): Unique label for the schema.
+        updates (Tuple[UpdateInfo, ...]): Update steps, in order.
+        ambiguities (Tuple[Tuple[type,type], ...], optional): Pairs of classes with ambiguous signatures. Defaults to ().
+        shortcuts (Tuple[UpdateInfo, ...], optional): Shortcut steps between the classes of the update steps. Defaults to ().
+        candidate_order (Optional[CandidateOrder], optional): Observed frequencies of the classes, for adaptive ordering. Defaults to None.
+        nested (Tuple[Tuple[str,str], ...], optional): Keys holding nested data of other labels, each with its label. Defaults to ().
+
+    Returns:
+        UpdatePlan: Update plan.
+    """    
+    cls_list = tuple(u.cls_start for u in updates) + ((updates[-1].cls_end,) if len(updates) else ())
+    signatures = { cls: signature_for_cls(cls) for cls in cls_list }
+    name_counts = Counter(cls.__name__ for cls in cls_list)
+    version_names = { cls: cls.__name__ if name_counts[cls.__name__] == 1 else qualified_name(cls) for cls in cls_list }
+    # A class was named by its `__name__` until a later class with the same name was registered, so the name keeps resolving to the earliest class
+    first_by_name = {}
+    for cls in cls_list:
+        first_by_name.setdefault(cls.__name__, cls)
+    paths = _plan_paths(cls_list, updates + shortcuts)
+    return UpdatePlan(
+        label=label,
+        updates=updates,
+        cls_list=cls_list,
+        step_index=MappingProxyType({ u.cls_start: i for i, u in enumerate(updates) }),
+        cls_newest_first=tuple(reversed(cls_list)),
+        cls_by_name=MappingProxyType({ **first_by_name, **{ qualified_name(cls): cls for cls in cls_list }, **{ name: cls for cls, name in version_names.items() } }),
+        version_names=MappingProxyType(version_names),
+        signatures=MappingProxyType(signatures),
+        ambiguities=ambiguities,
+        signatures_check_values=any(sig is not None and len(sig.key_kinds) > 0 for sig in signatures.values()),
+        chains=MappingProxyType({ cls: _make_chain(path) for cls, path in paths.items() }),
+        dict_chains=MappingProxyType({ cls: _make_chain(path, start_from_dict=True) for cls, path in paths.items() if path[0].is_dict_level }),
+        shortcuts=shortcuts,
+        paths=MappingProxyType(paths),
+        nested=nested,
+        candidate_order=candidate_order
+        )
+
+
+_lock = threading.RLock()
+"Lock serializing registrations. Registrations publish new immutable plans and registry snapshots, so loads never take it."
 
 
 class Updater:
-    """Updater for a schema.
+    """Updater for a schema. Registering steps compiles a new immutable plan and publishes it by replacing the current one, so updates in other threads use either the old or the new plan, never a partly registered one.
     """    
 
     def __init__(self, label: str):
@@ -36,8 +286,18 @@ class Updater:
             label (str): Unique label for the schema.
         """        
         self.label = label
-        self._updates: List[UpdateInfo] = []
-    
+        self._plan = compile_plan(label, ())
+
+
+    @property
+    def plan(self) -> UpdatePlan:
+        """Compiled update plan. Replaced whenever an update step is registered. Read it once per operation to use one consistent plan.
+
+        Returns:
+            UpdatePlan: Update plan.
+        """        
+        return self._plan
+
 
     @property
     def no_update_steps(self) -> int:
@@ -46,7 +306,7 @@ class Updater:
         Returns:
             int: Number of update steps.
         """        
-        return len(self._updates)
+        return len(self._plan.updates)
 
 
     @property
@@ -56,12 +316,24 @@ class Updater:
         Returns:
             List[type]: List of classes involved in the update, in order.
         """        
-        return [u.cls_start for u in self._updates] + [self._updates[-1].cls_end]
+        return list(self._plan.cls_list)
+
+
+    def cls_for_name(self, cls_name: str) -> Optional[type]:
+        """Class involved in the update with the given name.
 
+        Args:
+            cls_name (str): Name of the class.
 
-    def register_updates(self, 
-        cls_start: type, 
-        cls_end: type, 
+        Returns:
+            Optional[type]: Class with the given name, or None if no such class is registered.
+        """        
+        return self._plan.cls_by_name.get(cls_name)
+
+
+    def register_updates(self,
+        cls_start: type,
+        cls_end: type,
         fn_update: Callable[[type,type,object], object]
         ):
         """Register an update step.
@@ -71,18 +343,283 @@ class Updater:
             cls_end (type): End class.
             fn_update (Callable[[type,type,object], object]): Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end.
         """        
-        if len(self._updates) > 0:
+        self._register(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=fn_update))
+
+
+    def register_dict_updates(self,
+        cls_start: type,
+        cls_end: type,
+        fn_update_dict: Callable[[dict], dict]
+        ):
+        """Register a dict-level update step, which updates the serialized dictionary instead of the object. Consecutive dict-level steps are fused, so intermediate objects are not instantiated.
+
+        Args:
+            cls_start (type): Start class. Must have a to_dict method.
+            cls_end (type): End class. Must have a from_dict method.
+            fn_update_dict (Callable[[dict], dict]): Function to update the serialized dictionary of the start class to that of the end class. Args: dict_start. Returns: dict_end.
+        """        
+        assert hasattr(cls_start, "to_dict"), f"Start class of dict-level update must have to_dict method: {cls_start}"
+        assert hasattr(cls_end, "from_dict"), f"End class of dict-level update must have from_dict method: {cls_end}"
+        self._register(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=None, fn_update_dict=fn_update_dict))
 
-            # Check it's a one way
-            assert cls_start == self._updates[-1].cls_end, f"Class mismatch - start class: {cls_start} of new update step does not match most recent end class: {self._updates[-1].cls_end}"
 
-            # Check no loops
-            assert cls_end not in self.cls_list, f"Loop detected: {cls_end} in {self.cls_list}"
+    def register_chain(self,
+        classes: List[type],
+        fns_update: List[Callable],
+        dict_steps: Iterable[int] = ()
+        ):
+        """Register a chain of update steps at once. The chain is validated in one pass and the update plan is compiled once, instead of once per step.
 
-        info = UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=fn_update)
-        assert self._update_info_for_cls(info.cls_start) is None, f"Update already exists for start class: {info.cls_start}"
-        self._updates.append(info)
-        logger.debug(f"Registered update: {self.label} {cls_start.__name__} -> {cls_end.__name__}")
+        Args:
+            classes (List[type]): Classes of the chain, oldest first. If updates are already registered, the first class must be the most recent end class.
+            fns_update (List[Callable]): Function to update from each class to the next, one fewer than the classes. Same signatures as for `register_updates`, or as for `register_dict_updates` for dict-level steps.
+            dict_steps (Iterable[int], optional): Indexes of the dict-level steps in fns_update. Defaults to ().
+        """        
+        assert len(fns_update) == len(classes) - 1, f"Number of update functions: {len(fns_update)} must be one fewer than the number of classes: {len(classes)}"
+        dict_steps = set(dict_steps)
+        infos = []
+        for i, (cls_start, cls_end, fn) in enumerate(zip(classes[:-1], classes[1:], fns_update)):
+            if i in dict_steps:
+                assert hasattr(cls_start, "to_dict"), f"Start class of dict-level update must have to_dict method: {cls_start}"
+                assert hasattr(cls_end, "from_dict"), f"End class of dict-level update must have from_dict method: {cls_end}"
+                infos.append(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=None, fn_update_dict=fn))
+            else:
+                infos.append(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=fn))
+        self._register_many(infos)
+
+
+    def register_shortcut(self,
+        cls_start: type,
+        cls_end: type,
+        fn_update: Callable[[type,type,object], object],
+        cost: Optional[float] = None
+        ):
+        """Register a shortcut step, updating directly from a class to a later class, e.g. an optimized function skipping intermediate versions. Objects are updated along the cheapest path of update and shortcut steps.
+
+        Args:
+            cls_start (type): Start class. Must be registered.
+            cls_end (type): End class. Must be registered, and more recent than the start class.
+            fn_update (Callable[[type,type,object], object]): Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end.
+            cost (Optional[float], optional): Relative cost of the shortcut, where each update step costs 1 by default. Defaults to None, for a cost of 1.
+        """        
+        self._register_shortcut(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=fn_update, cost=cost))
+
+
+    def register_dict_shortcut(self,
+        cls_start: type,
+        cls_end: type,
+        fn_update_dict: Callable[[dict], dict],
+        cost: Optional[float] = None
+        ):
+        """Register a dict-level shortcut step. See `register_shortcut` and `register_dict_updates`.
+
+        Args:
+            cls_start (type): Start class. Must be registered, and have a to_dict method.
+            cls_end (type): End class. Must be registered, more recent than the start class, and have a from_dict method.
+            fn_update_dict (Callable[[dict], dict]): Function to update the serialized dictionary of the start class to that of the end class. Args: dict_start. Returns: dict_end.
+            cost (Optional[float], optional): Relative cost of the shortcut, where each update step costs 1 by default. Defaults to None, for a cost of 1.
+        """        
+        assert hasattr(cls_start, "to_dict"), f"Start class of dict-level update must have to_dict method: {cls_start}"
+        assert hasattr(cls_end, "from_dict"), f"End class of dict-level update must have from_dict method: {cls_end}"
+        self._register_shortcut(UpdateInfo(label=self.label, cls_start=cls_start, cls_end=cls_end, fn_update=None, fn_update_dict=fn_update_dict, cost=cost))
+
+
+    def register_column_updates(self,
+        cls_start: type,
+        cls_end: type,
+        fn_update_columns: Callable[[Any], Any]
+        ):
+        """Register a vectorized function for a registered update step, which `load_table` uses to update whole columns of tables at once, e.g. adding a column with a default, renaming a column, or computing a derived column.
+
+        Args:
+            cls_start (type): Start class of the step.
+            cls_end (type): End class of the step.
+            fn_update_columns (Callable[[Any], Any]): Function updating a pandas DataFrame of serialized records of the start class, one column per key, to a DataFrame of those of the end class, with the same index. Args: df_start. Returns: df_end.
+        """        
+        with _lock:
+            plan = self._plan
+            idx = plan.step_index.get(cls_start)
+            assert idx is not None and plan.updates[idx].cls_end == cls_end, f"Update step is not registered: {cls_start} -> {cls_end}"
+            updates = plan.updates[:idx] + (replace(plan.updates[idx], fn_update_columns=fn_update_columns),) + plan.updates[idx+1:]
+            self._plan = compile_plan(self.label, updates, plan.ambiguities, plan.shortcuts, plan.candidate_order, plan.nested)
+        logger.debug("Registered column updates: {} {} -> {}", self.label, cls_start.__name__, cls_end.__name__)
+
+
+    def register_nested(self, key: str, label: str):
+        """Declare that a key of the serialized data holds nested data of another label: a serialized dictionary, or a list of them. When data is loaded, the nested data is migrated to the latest version of its label before the data is deserialized, so the classes of this schema should type the field with the latest class of the nested label, and update steps do not need to migrate it.
+
+        Args:
+            key (str): Key of the serialized data, for all classes of the schema.
+            label (str): Label of the nested data. May be this label, for recursive data, and may be registered later.
+        """        
+        with _lock:
+            plan = self._plan
+            assert all(k != key for k, _ in plan.nested), f"Nested key already registered for label: {self.label}: {key}"
+            self._plan = replace(plan, nested=plan.nested + ((key, label),))
+        logger.debug("Registered nested key: {} {} -> {}", self.label, key, label)
+
+
+    def _register_shortcut(self, info: UpdateInfo):
+        """Register a shortcut step.
+
+        Args:
+            info (UpdateInfo): Update info.
+        """        
+        with _lock:
+            plan = self._plan
+            assert info.cls_start in plan.step_index, f"Start class of shortcut is not registered: {info.cls_start}"
+            assert info.cls_end in plan.cls_list, f"End class of shortcut is not registered: {info.cls_end}"
+            assert plan.cls_list.index(info.cls_end) > plan.step_index[info.cls_start] + 1, f"Shortcut must skip at least one class: {info.cls_start} -> {info.cls_end}"
+            assert all(s.cls_start != info.cls_start or s.cls_end != info.cls_end for s in plan.shortcuts), f"Shortcut already exists: {info.cls_start} -> {info.cls_end}"
+            self._plan = compile_plan(self.label, plan.updates, plan.ambiguities, plan.shortcuts + (info,), plan.candidate_order, plan.nested)
+        logger.debug("Registered shortcut: {} {} -> {}", self.label, info.cls_start.__name__, info.cls_end.__name__)
+
+
+    def set_costs(self, costs: Dict[Tuple[type,type],float]):
+        """Set the relative costs of update and shortcut steps, and replan the paths.
+
+        Args:
+            costs (Dict[Tuple[type,type],float]): Cost of each step, by start and end class. Steps not included keep their cost.
+        """        
+        def with_cost(info: UpdateInfo) -> UpdateInfo:
+            cost = costs.get((info.cls_start, info.cls_end))
+            return replace(info, cost=cost) if cost is not None else info
+        with _lock:
+            plan = self._plan
+            self._plan = compile_plan(self.label, tuple(map(with_cost, plan.updates)), plan.ambiguities, tuple(map(with_cost, plan.shortcuts)), plan.candidate_order, plan.nested)
+
+
+    def use_measured_costs(self, label_metrics: LabelMetrics):
+        """Set the costs of the steps to their mean latencies measured by the metrics recorder, and replan the paths. See `set_costs`.
+
+        Args:
+            label_metrics (LabelMetrics): Metrics of the label, e.g. from `metrics_snapshot()[label]`. Steps without measurements keep their cost.
+        """        
+        plan = self._plan
+        costs = {}
+        for info in plan.updates + plan.shortcuts:
+            stats = label_metrics.steps.get(step_name(self.label, info.cls_start, info.cls_end))
+            if stats is not None and stats.count > 0:
+                costs[(info.cls_start, info.cls_end)] = stats.total_s / stats.count
+        self.set_costs(costs)
+
+
+    def enable_adaptive_order(self, decay: float = 1.0, profile: Optional[Dict[str,float]] = None) -> CandidateOrder:
+        """Try the classes that data is most often deserialized with first, instead of the most recent first. Results do not change: see `CandidateOrder`.
+
+        Args:
+            decay (float, optional): Factor the frequencies are multiplied by at each load. Defaults to 1.0, for no decay.
+            profile (Optional[Dict[str,float]], optional): Frequencies to start from, by qualified class name, e.g. exported from an earlier run. Defaults to None.
+
+        Returns:
+            CandidateOrder: Frequencies, replacing any previous ones.
+        """        
+        order = CandidateOrder(decay=decay, profile=profile)
+        with _lock:
+            self._plan = replace(self._plan, candidate_order=order, candidates_by_keys={})
+        return order
+
+
+    def disable_adaptive_order(self):
+        """Try the most recent classes first again.
+        """        
+        with _lock:
+            self._plan = replace(self._plan, candidate_order=None, candidates_by_keys={})
+
+
+    def verify_shortcuts(self, samples: Iterable[object]) -> List[str]:
+        """Check that shortcuts give the same results as the registered update steps. For each sample object, the result of the canonical chain of update steps is compared to that of the planned path, and of each shortcut that applies to it: the object is updated to the start class of the shortcut, then through the shortcut, then through the update steps.
+
+        Args:
+            samples (Iterable[object]): Objects of any registered classes.
+
+        Returns:
+            List[str]: Description of each mismatch. Empty if all results match.
+        """        
+        plan = self._plan
+        options = Updater.Options()
+        linear = { u.cls_start: _make_chain(plan.updates[i:]) for i, u in enumerate(plan.updates) }
+        def to_latest(obj: object) -> object:
+            chain = linear.get(type(obj))
+            return chain(obj, options) if chain is not None else obj
+
+        mismatches = []
+        for obj in samples:
+            cls = type(obj)
+            idx = plan.step_index.get(cls)
+            if idx is None:
+                continue
+            expected = to_latest(copy.deepcopy(obj))
+
+            planned = plan.chains[cls](copy.deepcopy(obj), options)
+            if planned != expected:
+                path = " -> ".join([ cls.__name__ ] + [ info.cls_end.__name__ for info in plan.paths[cls] ])
+                mismatches.append(f"Planned path {path} gives {planned}, expected {expected}")
+
+            for shortcut in plan.shortcuts:
+                idx_shortcut = plan.step_index[shortcut.cls_start]
+                if idx_shortcut < idx:
+                    continue
+                obj_start = copy.deepcopy(obj)
+                if idx_shortcut > idx:
+                    obj_start = _make_chain(plan.updates[idx:idx_shortcut])(obj_start, options)
+                result = to_latest(_make_chain((shortcut,))(obj_start, options))
+                if result != expected:
+                    mismatches.append(f"Shortcut {shortcut.cls_start.__name__} -> {shortcut.cls_end.__name__} from {cls.__name__} gives {result}, expected {expected}")
+        return mismatches
+
+
+    def _register(self, info: UpdateInfo):
+        """Register an update step.
+
+        Args:
+            info (UpdateInfo): Update info.
+        """        
+        self._register_many([info])
+
+
+    def _register_many(self, infos: List[UpdateInfo]):
+        """Register consecutive update steps, validating them against the registered steps and each other, and compiling the update plan once.
+
+        Args:
+            infos (List[UpdateInfo]): Update infos, in order.
+        """        
+        with _lock:
+            plan = self._plan
+            if len(infos) == 0:
+                return
+            latest = plan.latest
+            cls_seen = set(plan.cls_list) if len(plan.updates) > 0 else { infos[0].cls_start }
+            names_seen = { qualified_name(cls): cls for cls in plan.cls_list } if len(plan.updates) > 0 else { qualified_name(infos[0].cls_start): infos[0].cls_start }
+            cls_list = list(plan.cls_list) if len(plan.updates) > 0 else [ infos[0].cls_start ]
+            ambiguities = []
+            for info in infos:
+                cls_start, cls_end = info.cls_start, info.cls_end
+                if latest is not None:
+
+                    # Check it's a one way
+                    assert cls_start == latest, f"Class mismatch - start class: {cls_start} of new update step does not match most recent end class: {latest}"
+
+                # Check no loops
+                assert cls_end not in cls_seen, f"Loop detected: {cls_end} in {cls_list}"
+
+                # Check classes can be told apart by name, since names identify versions in tags. Classes of different modules may share the `__name__`
+                name = qualified_name(cls_end)
+                assert name not in names_seen, f"Classes {names_seen.get(name)} and {cls_end} have the same module and qualified name: {name} - tags cannot tell them apart"
+
+                # Report classes that cannot be told apart by their signatures
+                ambiguities_step = find_ambiguities(cls_end, cls_list)
+                for cls1, cls2 in ambiguities_step:
+                    logger.info("Classes {} and {} of {} have ambiguous signatures - data matching both is resolved by trial deserialization", cls1.__name__, cls2.__name__, self.label)
+                ambiguities += ambiguities_step
+
+                latest = cls_end
+                cls_seen.add(cls_end)
+                names_seen[name] = cls_end
+                cls_list.append(cls_end)
+
+            self._plan = compile_plan(self.label, plan.updates + tuple(infos), plan.ambiguities + tuple(ambiguities), plan.shortcuts, plan.candidate_order, plan.nested)
+            logger.debug("Registered {} updates: {} {} -> {}", len(infos), self.label, infos[0].cls_start.__name__, infos[-1].cls_end.__name__)
 
 
     def _update_info_for_obj(self, obj_start: object) -> Optional[UpdateInfo]:
@@ -106,8 +643,9 @@ class Updater:
         Returns:
             Optional[UpdateInfo]: Update info for the class.
         """        
-        updates_exist = [u for u in self._updates if u.cls_start == cls_start]
-        return updates_exist[0] if len(updates_exist) else None
+        plan = self._plan
+        idx = plan.step_index.get(cls_start)
+        return plan.updates[idx] if idx is not None else None
 
 
     @dataclass
@@ -124,51 +662,148 @@ class Updater:
         write_version_prefix: str = ""
         "Prefix for version files. Only used if write_versions is True. Default: ''."
 
+        tag_versions: bool = False
+        "Flag to embed the schema label and version tag in version files. Only used if write_versions is True. Default: False."
 
-    def _write_obj_if_needed(self, obj: object, options: Options):
-        """Write object if needed.
-
-        Args:
-            obj (object): Object to write.
-            options (Options): Options.
-        """        
-        if options.write_versions:
-            cls_name = obj.__class__.__name__
-            bname_wo_ext = f"{options.write_version_prefix}_{cls_name}" if options.write_version_prefix else cls_name
-            write_obj(obj, options.write_versions_dir, bname_wo_ext)
+        writer: Any = None
+        "Optional `VersionWriter` to queue versions to, instead of writing them synchronously. Only used if write_versions is True. Default: None."
 
 
-    def update(self, obj_start: object, options: Options = Options()) -> object:
+    def update(self, obj_start: object, options: Options = Options(), plan: Optional[UpdatePlan] = None) -> object:
         """Update an object, if needed.
 
         Args:
             obj_start (object): Object to update.
             options (Options, optional): Options. Defaults to Options().
+            plan (Optional[UpdatePlan], optional): Plan to update with, e.g. the one the object was deserialized with. Defaults to None, for the current plan.
 
         Returns:
             object: Object after updating.
         """        
         # Write initial version if needed
-        self._write_obj_if_needed(obj_start, options)
+        _write_obj_if_needed(self.label, obj_start, options)
+
+        chain = (plan or self._plan).chains.get(type(obj_start))
+        return chain(obj_start, options) if chain is not None else obj_start
+
 
-        info = self._update_info_for_obj(obj_start)
-        while info:
-            logger.debug(f"Updating {info.label} from {info.cls_start.__name__} to {info.cls_end.__name__}")
-            obj_start = _update_step(obj_start, info)
-            info = self._update_info_for_obj(obj_start)
+    def update_many(self, objs_start: List[object], options: Options = Options(), plan: Optional[UpdatePlan] = None) -> List[object]:
+        """Update objects of the same class, applying each update step to all objects at once.
+
+        Args:
+            objs_start (List[object]): Objects to update, all of the same class.
+            options (Options, optional): Options. Defaults to Options().
+            plan (Optional[UpdatePlan], optional): Plan to update with. Defaults to None, for the current plan.
 
-            # Write versions if needed
-            self._write_obj_if_needed(obj_start, options)
+        Returns:
+            List[object]: Objects after updating, in the same order.
+        """        
+        if len(objs_start) == 0:
+            return []
         
-        return obj_start
+        # Write initial versions if needed
+        if options.write_versions:
+            for obj in objs_start:
+                _write_obj_if_needed(self.label, obj, options)
+
+        plan = plan or self._plan
+        cls_start = type(objs_start[0])
+        assert all(type(obj) == cls_start for obj in objs_start), f"All objects must be of class: {cls_start}"
+        path = plan.paths.get(cls_start)
+        if path is None:
+            return objs_start
+
+        objs = objs_start
+        recorder = metrics.recorder
+        for is_dict_level, segment in _segments(path):
+            if is_dict_level:
+                objs = _update_dict_steps([ obj.to_dict() for obj in objs ], segment, options) # type: ignore
+                continue
+
+            for info in segment:
+                logger.debug("Updating {} objects of {} from {} to {}", len(objs), info.label, info.cls_start.__name__, info.cls_end.__name__)
+                fn_update, cls_from, cls_to = info.fn_update, info.cls_start, info.cls_end
+                if recorder is None:
+                    objs = [ fn_update(cls_from, cls_to, obj) for obj in objs ] # type: ignore
+                else:
+                    t_start = time.perf_counter()
+                    objs = [ fn_update(cls_from, cls_to, obj) for obj in objs ] # type: ignore
+                    recorder.record(MetricEvent("step", info.label, time.perf_counter() - t_start, name=step_name(info.label, cls_from, cls_to), count=len(objs)))
+
+                # Write versions if needed
+                if options.write_versions:
+                    for obj in objs:
+                        _write_obj_if_needed(self.label, obj, options)
+        return objs
+
+class UpdaterRegistry(Mapping[str,Updater]):
+    """Registry of the updaters by label. Labels are only ever added, each by a single dictionary insertion under the registration lock, so lookups never lock and registering a label costs O(1). Immutable snapshots are copied on demand, at most once per registration.
+    """    
+
+    def __init__(self):
+        """Constructor.
+        """        
+        self._updaters: Dict[str,Updater] = {}
+
+        # Number of labels published, and the snapshot copied at that count
+        self._version = 0
+        self._snapshot: Tuple[int,Mapping[str,Updater]] = (0, MappingProxyType({}))
+
+
+    def snapshot(self) -> Mapping[str,Updater]:
+        """Current snapshot. It does not change when labels are registered later. Copied only if labels were registered since the last snapshot.
+
+        Returns:
+            Mapping[str,Updater]: Immutable mapping of the updaters by label.
+        """        
+        version, snapshot = self._snapshot
+        if version != self._version:
+
+            # Read the count first: labels published while copying are included, and copied again next time
+            version = self._version
+            snapshot = MappingProxyType(dict(self._updaters))
+            self._snapshot = (version, snapshot)
+        return snapshot
+
+
+    def __getitem__(self, label: str) -> Updater:
+        return self._updaters[label]
+
+
+    def get(self, label: str, default: Any = None) -> Any:
+        return self._updaters.get(label, default)
+
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._updaters
+
 
-# Global dictionary of updaters
-updaters: Dict[str,Updater] = {}
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.snapshot())
+
+
+    def __len__(self) -> int:
+        return len(self._updaters)
+
+
+    def _publish(self, updater: Updater):
+        """Publish a new updater. The registration lock must be held.
+
+        Args:
+            updater (Updater): Updater to add.
+        """        
+        assert updater.label not in self._updaters, f"Label already registered: {updater.label}"
+        self._updaters[updater.label] = updater
+        self._version += 1
+
+
+# Global registry of updaters
+updaters = UpdaterRegistry()
 
 def register_updates(
-    label: str, 
-    cls_start: type, 
-    cls_end: type, 
+    label: str,
+    cls_start: type,
+    cls_end: type,
     fn_update: Callable[[type,type,object], object]
     ):
     """Register an update step.
@@ -179,7 +814,264 @@ def register_updates(
         cls_end (type): Class to update to.
         fn_update (Callable[[type,type,object], object]): Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end.
     """    
-    updaters.setdefault(label, Updater(label)).register_updates(cls_start, cls_end, fn_update)
+    _updater_for(label).register_updates(cls_start, cls_end, fn_update)
+
+
+def register_dict_updates(
+    label: str,
+    cls_start: type,
+    cls_end: type,
+    fn_update_dict: Callable[[dict], dict]
+    ):
+    """Register a dict-level update step, which updates the serialized dictionary instead of the object. Consecutive dict-level steps are fused, so intermediate objects are not instantiated.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls_start (type): Class to update from. Must have a to_dict method.
+        cls_end (type): Class to update to. Must have a from_dict method.
+        fn_update_dict (Callable[[dict], dict]): Function to update the serialized dictionary of the start class to that of the end class. Args: dict_start. Returns: dict_end.
+    """    
+    _updater_for(label).register_dict_updates(cls_start, cls_end, fn_update_dict)
+
+
+def register_chain(
+    label: str,
+    classes: List[type],
+    fns_update: List[Callable],
+    dict_steps: Iterable[int] = ()
+    ):
+    """Register a chain of update steps at once, validating the whole chain in one pass. See `Updater.register_chain`.
+
+    Args:
+        label (str): Unique label for the schema.
+        classes (List[type]): Classes of the chain, oldest first.
+        fns_update (List[Callable]): Function to update from each class to the next, one fewer than the classes.
+        dict_steps (Iterable[int], optional): Indexes of the dict-level steps in fns_update. Defaults to ().
+    """    
+    _updater_for(label).register_chain(classes, fns_update, dict_steps=dict_steps)
+
+
+def register_shortcut(
+    label: str,
+    cls_start: type,
+    cls_end: type,
+    fn_update: Callable[[type,type,object], object],
+    cost: Optional[float] = None
+    ):
+    """Register a shortcut step, updating directly from a class to a later class. See `Updater.register_shortcut`.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls_start (type): Class to update from.
+        cls_end (type): Class to update to.
+        fn_update (Callable[[type,type,object], object]): Function to update from start to end class. Args: cls_start, cls_end, obj_start. Returns: obj_end.
+        cost (Optional[float], optional): Relative cost of the shortcut, where each update step costs 1 by default. Defaults to None, for a cost of 1.
+    """    
+    get_updater(label).register_shortcut(cls_start, cls_end, fn_update, cost=cost)
+
+
+def register_dict_shortcut(
+    label: str,
+    cls_start: type,
+    cls_end: type,
+    fn_update_dict: Callable[[dict], dict],
+    cost: Optional[float] = None
+    ):
+    """Register a dict-level shortcut step. See `Updater.register_dict_shortcut`.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls_start (type): Class to update from. Must have a to_dict method.
+        cls_end (type): Class to update to. Must have a from_dict method.
+        fn_update_dict (Callable[[dict], dict]): Function to update the serialized dictionary of the start class to that of the end class. Args: dict_start. Returns: dict_end.
+        cost (Optional[float], optional): Relative cost of the shortcut, where each update step costs 1 by default. Defaults to None, for a cost of 1.
+    """    
+    get_updater(label).register_dict_shortcut(cls_start, cls_end, fn_update_dict, cost=cost)
+
+
+def register_column_updates(
+    label: str,
+    cls_start: type,
+    cls_end: type,
+    fn_update_columns: Callable[[Any], Any]
+    ):
+    """Register a vectorized function for a registered update step, used by `load_table`. See `Updater.register_column_updates`.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls_start (type): Start class of the step.
+        cls_end (type): End class of the step.
+        fn_update_columns (Callable[[Any], Any]): Function updating a pandas DataFrame of serialized records of the start class to a DataFrame of those of the end class, with the same index. Args: df_start. Returns: df_end.
+    """    
+    get_updater(label).register_column_updates(cls_start, cls_end, fn_update_columns)
+
+
+def register_nested(label: str, key: str, nested_label: str):
+    """Declare that a key of the serialized data of a label holds nested data of another label, migrated automatically when loading. See `Updater.register_nested`.
+
+    Args:
+        label (str): Unique label for the schema.
+        key (str): Key of the serialized data.
+        nested_label (str): Label of the nested data.
+    """    
+    _updater_for(label).register_nested(key, nested_label)
+
+
+def enable_adaptive_order(label: str, decay: float = 1.0, profile: Optional[Dict[str,float]] = None) -> CandidateOrder:
+    """Try the classes that data is most often deserialized with first. See `Updater.enable_adaptive_order`.
+
+    Args:
+        label (str): Unique label for the schema.
+        decay (float, optional): Factor the frequencies are multiplied by at each load. Defaults to 1.0, for no decay.
+        profile (Optional[Dict[str,float]], optional): Frequencies to start from, by qualified class name, e.g. from `order_profile` in an earlier run. Defaults to None.
+
+    Returns:
+        CandidateOrder: Frequencies.
+    """    
+    return get_updater(label).enable_adaptive_order(decay=decay, profile=profile)
+
+
+def order_profile(label: str) -> Dict[str,float]:
+    """Observed frequencies of the classes that data of a label is deserialized with, to save and pass to `enable_adaptive_order` in a later run.
+
+    Args:
+        label (str): Unique label for the schema.
+
+    Returns:
+        Dict[str,float]: Relative frequency of each qualified class name, most frequent first. Empty if adaptive ordering is disabled.
+    """    
+    order = get_updater(label).plan.candidate_order
+    return order.profile() if order is not None else {}
+
+
+def verify_shortcuts(label: str, samples: Iterable[object]) -> List[str]:
+    """Check that shortcuts give the same results as the registered update steps. See `Updater.verify_shortcuts`.
+
+    Args:
+        label (str): Unique label for the schema.
+        samples (Iterable[object]): Objects of any registered classes.
+
+    Returns:
+        List[str]: Description of each mismatch. Empty if all results match.
+    """    
+    return get_updater(label).verify_shortcuts(samples)
+
+
+def _updater_for(label: str) -> Updater:
+    """Updater for a label to register updates with, created if needed.
+
+    Args:
+        label (str): Unique label for the schema.
+
+    Returns:
+        Updater: Updater for the label.
+    """    
+    updater = updaters.get(label)
+    if updater is None:
+        with _lock:
+            updater = updaters.get(label)
+            if updater is None:
+                updater = _pending.get(label)
+            if updater is None:
+                updater = Updater(label)
+
+                # Labels being resolved lazily are published once their registration module is imported
+                if label in resolving:
+                    _pending[label] = updater
+                else:
+                    updaters._publish(updater)
+    return updater
+
+
+_pending: Dict[str,Updater] = {}
+"Updaters of lazily declared labels registered while their registration module is imported, not yet published."
+
+
+def _publish_pending(label: str) -> bool:
+    """Publish the updater of a lazily declared label once its registration module is imported.
+
+    Args:
+        label (str): Unique label for the schema.
+
+    Returns:
+        bool: Whether the label has a registered updater.
+    """    
+    with _lock:
+        updater = _pending.pop(label, None)
+        if updater is not None:
+            updaters._publish(updater)
+        return updaters.get(label) is not None
+
+
+def get_updater(label: str) -> Updater:
+    """Updater registered for a label. Labels declared lazily are registered on their first use.
+
+    Args:
+        label (str): Unique label for the schema.
+
+    Returns:
+        Updater: Updater for the label.
+    """    
+    # Lookups of labels still declared lazily wait for their registration to finish
+    if label in lazy_registrations:
+        resolve_lazy(label, _publish_pending)
+    updater = updaters.get(label)
+    if updater is None and label in resolving:
+
+        # Looked up by the registration module being imported in this thread
+        updater = _pending.get(label)
+    assert updater is not None, f"No updates registered for label: {label}"
+    return updater
+
+
+def version_name(label: str, cls: type) -> str:
+    """Name identifying a class of a schema in tags and stores. See `UpdatePlan.version_names`.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls (type): Class.
+
+    Returns:
+        str: Version name, or the `__name__` of classes not registered for the label.
+    """    
+    updater = updaters.get(label)
+    name = updater.plan.version_names.get(cls) if updater is not None else None
+    return name if name is not None else cls.__name__
+
+
+def step_name(label: str, cls_start: type, cls_end: type) -> str:
+    """Name of an update step in the metrics, from the version names of its classes. See `version_name`.
+
+    Args:
+        label (str): Unique label for the schema.
+        cls_start (type): Start class.
+        cls_end (type): End class.
+
+    Returns:
+        str: Name of the form 'ClassStart->ClassEnd'.
+    """    
+    return f"{version_name(label, cls_start)}->{version_name(label, cls_end)}"
+
+
+def _write_obj_if_needed(label: str, obj: object, options: Updater.Options):
+    """Write object if needed.
+
+    Args:
+        label (str): Unique label for the schema.
+        obj (object): Object to write.
+        options (Updater.Options): Options.
+    """    
+    if options.write_versions:
+        cls_name = version_name(label, type(obj))
+        bname_wo_ext = f"{options.write_version_prefix}_{cls_name}" if options.write_version_prefix else cls_name
+        recorder = metrics.recorder
+        t_start = time.perf_counter() if recorder is not None else 0.0
+        if options.writer is not None:
+            size = options.writer.write(obj, options.write_versions_dir, bname_wo_ext, label=label if options.tag_versions else None)
+        else:
+            size = write_obj(obj, options.write_versions_dir, bname_wo_ext, label=label if options.tag_versions else None)
+        if recorder is not None:
+            recorder.record(MetricEvent("write", label, time.perf_counter() - t_start, size=size))
 
 
 def _update_step(obj_start: object, info: UpdateInfo) -> object:
@@ -196,4 +1088,6 @@ def _update_step(obj_start: object, info: UpdateInfo) -> object:
     assert cls_start == info.cls_start, f"Class mismatch: {cls_start} != {info.cls_start}"
 
     # Update
-    return info.fn_update(cls_start, info.cls_end, obj_start)
\ No newline at end of file
+    if info.fn_update_dict is not None:
+        return info.cls_end.from_dict(info.fn_update_dict(obj_start.to_dict())) # type: ignore
+    return info.fn_update(cls_start, info.cls_end, obj_start) # type: ignore
@@ -0,0 +1,171 @@
+from upandup.serializer import check_serializer, file_ext, serialize_to_bytes, BINARY_SERIALIZERS
+from upandup.proxy import materialize
+from typing import Any, Optional, Set
+from enum import Enum
+from loguru import logger
+import base64
+import gzip
+import json
+import os
+import queue
+import threading
+import zipfile
+
+
+class WriterMode(Enum):
+    """Output modes of the version writer.
+    """    
+    FILES = "files"
+    "One file per version, as written by `write_obj`."
+
+    JSONL = "jsonl"
+    "One JSON Lines file per run, with one record per version. Versions in binary formats are base64 encoded."
+
+    ARCHIVE = "archive"
+    "One compressed zip archive per run, with one entry per version."
+
+
+_STOP = object()
+
+
+class VersionWriter:
+    """Writer of intermediate versions, which queues them and writes them on a background thread.
+
+    Pass it as `LoadOptions.writer` along with `write_versions=True`. Objects are serialized when queued, so they can be changed afterwards; only the file I/O runs in the background. The queue is bounded: queuing blocks when it is full.
+
+    Call `flush` to wait for all queued versions to be written, and `close` (or use the writer as a context manager) when done. Errors in the background thread are raised by the next `write`, `flush` or `close`.
+    """    
+
+    def __init__(self, mode: WriterMode = WriterMode.FILES, fname: Optional[str] = None, max_queue: int = 1024, compress: bool = False):
+        """Constructor.
+
+        Args:
+            mode (WriterMode, optional): Output mode. Defaults to WriterMode.FILES.
+            fname (Optional[str], optional): Output file for the JSONL and ARCHIVE modes. Not used in the FILES mode, where the directory from the options is used. Defaults to None.
+            max_queue (int, optional): Maximum number of versions waiting to be written. Defaults to 1024.
+            compress (bool, optional): Gzip the JSONL file. The archive is always compressed. Defaults to False.
+        """        
+        assert max_queue > 0, f"Maximum queue size must be positive, not: {max_queue}"
+        assert mode == WriterMode.FILES or fname is not None, f"File name is required for mode: {mode}"
+        self.mode = mode
+        self.fname = fname
+        self.compress = compress
+        self.no_written = 0
+        self.bytes_written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._error: Optional[BaseException] = None
+        self._dirs_made: Set[str] = set()
+        self._closed = False
+        self._file: Any = None
+        self._thread = threading.Thread(target=self._run, name="upandup-version-writer", daemon=True)
+        self._thread.start()
+
+
+    def __enter__(self) -> "VersionWriter":
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def write(self, obj: object, dir_name: str, bname_wo_ext: str, label: Optional[str] = None) -> int:
+        """Queue an object to be written. Same arguments as `write_obj`.
+
+        Args:
+            obj (object): Object to write.
+            dir_name (str): Directory to write to, in the FILES mode.
+            bname_wo_ext (str): Basename without extension.
+            label (Optional[str], optional): If provided, embed a tag with the schema label and version. Defaults to None.
+
+        Returns:
+            int: Number of bytes queued.
+        """        
+        self._raise_if_failed()
+        assert not self._closed, "Writer is closed"
+        obj = materialize(obj)
+        serializer = check_serializer(type(obj))
+        name = f"{bname_wo_ext}.{file_ext(serializer)}"
+        data = serialize_to_bytes(obj, label=label)
+        self._queue.put((dir_name, name, label, data, serializer in BINARY_SERIALIZERS))
+        return len(data)
+
+
+    def flush(self):
+        """Wait for all queued versions to be written.
+        """        
+        self._queue.join()
+        if self._file is not None and self._error is None and hasattr(self._file, "flush"):
+            self._file.flush()
+        self._raise_if_failed()
+
+
+    def close(self):
+        """Write all queued versions, stop the background thread and close the output file.
+        """        
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_if_failed()
+
+
+    def _raise_if_failed(self):
+        """Raise the error of the background thread, if any.
+        """        
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+    def _run(self):
+        """Background thread writing the queued versions.
+        """        
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is _STOP:
+                        return
+                    if self._error is None:
+                        self._write_item(*item)
+                except BaseException as e:
+                    logger.error(f"Failed to write version: {e}")
+                    self._error = e
+                finally:
+                    self._queue.task_done()
+        finally:
+            if self._file is not None:
+                self._file.close()
+
+
+    def _write_item(self, dir_name: str, name: str, label: Optional[str], data: bytes, is_binary: bool):
+        """Write one version.
+
+        Args:
+            dir_name (str): Directory to write to, in the FILES mode.
+            name (str): File name of the version.
+            label (Optional[str]): Schema label, if the version is tagged.
+            data (bytes): Serialized version.
+            is_binary (bool): Whether the version is in a binary format. In the JSONL mode, binary versions are base64 encoded.
+        """        
+        if self.mode == WriterMode.FILES:
+            if dir_name not in self._dirs_made:
+                os.makedirs(dir_name, exist_ok=True)
+                self._dirs_made.add(dir_name)
+            with open(os.path.join(dir_name, name), "wb") as f:
+                f.write(data)
+        elif self.mode == WriterMode.JSONL:
+            if self._file is None:
+                self._file = gzip.open(self.fname, "wt") if self.compress else open(self.fname, "w") # type: ignore
+            record = { "name": name, "label": label, "data_base64": base64.b64encode(data).decode("ascii") } if is_binary else { "name": name, "label": label, "data": data.decode("utf-8") }
+            self._file.write(json.dumps(record) + "\n")
+        elif self.mode == WriterMode.ARCHIVE:
+            if self._file is None:
+                self._file = zipfile.ZipFile(self.fname, "w", compression=zipfile.ZIP_DEFLATED) # type: ignore
+            # Entries are numbered, since a class can be written more than once per run
+            self._file.writestr(f"{self.no_written:08d}_{name}", data)
+        else:
+            raise ValueError(f"Unknown writer mode: {self.mode}")
+        self.no_written += 1
+        self.bytes_written += len(data)